@@ -1,14 +1,51 @@
 from fastapi import FastAPI, Request, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.templating import Jinja2Templates
+from fastapi.exception_handlers import http_exception_handler as default_http_exception_handler
 from starlette.exceptions import HTTPException as StarletteHTTPException
+import time
 import datetime
+from contextlib import asynccontextmanager
 from routes.stockRoutes import router as stock_router
 from routes.agentRoutes import router as agent_router
+from controllers import executor, scheduler, registry, health, metrics, httpClients, analysisJobs
+from controllers.responses import ResponsePipeline
+from controllers.topStocks import refresh_top_stocks, TOP_STOCKS_REFRESH_SECONDS
+from controllers.newsDigest import refresh_digest, NEWS_REFRESH_SECONDS
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    httpClients.start()
+    # Upstream refreshes run in one worker; the others read what it stores
+    scheduler.start_periodic("top-stocks", TOP_STOCKS_REFRESH_SECONDS, refresh_top_stocks, leader_only=True)
+    scheduler.start_periodic("news-digest", NEWS_REFRESH_SECONDS, refresh_digest, leader_only=True)
+    scheduler.start_periodic("health-probes", health.HEALTH_PROBE_INTERVAL, health.run_probes)
+    analysisJobs.start_workers()
+    if registry.AGENT_WARMUP:
+        scheduler.spawn(registry.warm_up(), name="agent-warmup")
+    yield
+    await scheduler.stop_all()
+    await httpClients.close()
+    executor.shutdown()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 templates = Jinja2Templates(directory="templates")
+# Added first so it sits innermost and sees each response body in one piece
+app.add_middleware(ResponsePipeline)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record request latency per route template."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics.observe_request(route.path if route else "unmatched", request.method, status, time.perf_counter() - start)
 
 app.add_middleware(
     CORSMiddleware,
@@ -38,7 +75,7 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
             },
             status_code=405
         )
-    raise Exception # Re-raise other HTTP exceptions
+    return await default_http_exception_handler(request, exc) # Default handling for other HTTP exceptions
 
 app.include_router(stock_router)
 app.include_router(agent_router)
@@ -1,50 +1,107 @@
 import os
 from dotenv import load_dotenv
 from textwrap import dedent
-
-# AI assistant imports
-from agno.agent import Agent
-from agno.models.groq import Groq
-from agno.tools.yfinance import YFinanceTools
-from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.agent import Agent
+from controllers.registry import register, get_agent
+from controllers.httpClients import groq_model
 
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise ValueError("Please provide a GROQ API key")
 
-# Initialize the web search agent
-web_search_agent = Agent(
-    name="Web Search Agent",
-    role="Search the web for real-time information based on user queries.",
-    model=Groq(id="deepseek-r1-distill-llama-70b", api_key=GROQ_API_KEY),
-    tools=[DuckDuckGoTools()],
-    instructions=[
-        "Search for the most relevant and recent information.",
-        "Gather data from multiple sources and ensure accuracy.",
-        "Present findings in a clear and concise manner."
-    ],
-    markdown=True,
-)
-
-# Initialize the financial analysis agent
-financial_agent = Agent(
-    name="Financial Analysis Agent",
-    role="Analyze financial metrics and provide insights.",
-    model=Groq(id="deepseek-r1-distill-llama-70b", api_key=GROQ_API_KEY),
-    tools=[YFinanceTools(enable_all=True)],
-    instructions=dedent("""\
-        You are a financial analyst. Your task is to retrieve and analyze financial data about stocks.
-        Present the data in a structured format, including key metrics and insights.
-    """),
-    markdown=True,
-)
-
-# Combine both agents into a multi-agent system
-multi_agent = Agent(
-    team=[web_search_agent, financial_agent],
-    model=Groq(id="deepseek-r1-distill-llama-70b", api_key=GROQ_API_KEY),
-    instructions="Coordinate between web search and financial analysis to provide comprehensive insights.",
-    markdown=True,
-)
+AGENT_MODEL_ID = "deepseek-r1-distill-llama-70b"
+COORDINATOR_INSTRUCTIONS = "Coordinate between web search and financial analysis to provide comprehensive insights."
+# Small model that splits a question into member tasks for the parallel fan-out
+PLANNER_MODEL_ID = os.getenv("PLANNER_MODEL_ID", "llama-3.1-8b-instant")
+
+# Agents are built on first use (or by the startup warm-up) so importing this
+# module does not pull in agno, groq and yfinance
+
+def build_web_search_agent():
+    """Initialize the web search agent"""
+    from agno.agent import Agent
+    from agno.tools.duckduckgo import DuckDuckGoTools
+    from controllers.toolCache import memoize
+
+    return Agent(
+        name="Web Search Agent",
+        role="Search the web for real-time information based on user queries.",
+        model=groq_model(AGENT_MODEL_ID),
+        tools=[memoize(DuckDuckGoTools())],
+        instructions=[
+            "Search for the most relevant and recent information.",
+            "Gather data from multiple sources and ensure accuracy.",
+            "Present findings in a clear and concise manner."
+        ],
+        markdown=True,
+    )
+
+def build_financial_agent():
+    """Initialize the financial analysis agent"""
+    from agno.agent import Agent
+    from agno.tools.yfinance import YFinanceTools
+    from controllers.indicatorTools import IndicatorTools
+    from controllers.toolCache import memoize
+
+    return Agent(
+        name="Financial Analysis Agent",
+        role="Analyze financial metrics and provide insights.",
+        model=groq_model(AGENT_MODEL_ID),
+        tools=[memoize(YFinanceTools(enable_all=True)), IndicatorTools()],
+        instructions=dedent("""\
+            You are a financial analyst. Your task is to retrieve and analyze financial data about stocks.
+            Present the data in a structured format, including key metrics and insights.
+        """),
+        markdown=True,
+    )
+
+def build_multi_agent():
+    """Combine both agents into a multi-agent system"""
+    from agno.agent import Agent
+
+    return Agent(
+        team=[get_agent("web_search_agent"), get_agent("financial_agent")],
+        model=groq_model(AGENT_MODEL_ID),
+        instructions=COORDINATOR_INSTRUCTIONS,
+        markdown=True,
+    )
+
+def build_planner_agent():
+    """Splits a question into sub-tasks for the team members of the parallel fan-out"""
+    from agno.agent import Agent
+
+    return Agent(
+        name="Planner",
+        model=groq_model(PLANNER_MODEL_ID),
+        instructions=[
+            "You plan work for a team of agents that run at the same time.",
+            "Only reply with the requested JSON object.",
+        ],
+    )
+
+def build_synthesis_agent():
+    """Writes the final answer of the parallel fan-out from the members' findings"""
+    from agno.agent import Agent
+
+    return Agent(
+        name="Synthesizer",
+        model=groq_model(AGENT_MODEL_ID),
+        instructions=[
+            COORDINATOR_INSTRUCTIONS,
+            "You receive a question and the findings of the web search and financial analysis agents.",
+            "Combine them into one comprehensive answer; if a member has no result, say what is missing.",
+        ],
+        markdown=True,
+    )
+
+register("web_search_agent", build_web_search_agent)
+register("financial_agent", build_financial_agent)
+register("multi_agent", build_multi_agent)
+register("planner_agent", build_planner_agent)
+register("synthesis_agent", build_synthesis_agent)
+
+def __getattr__(name):
+    # Keep `from controllers.agent import multi_agent` working; it builds on access
+    if name in ("web_search_agent", "financial_agent", "multi_agent"):
+        return get_agent(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
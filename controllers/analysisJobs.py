@@ -0,0 +1,213 @@
+import os
+import json
+import asyncio
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+from dotenv import load_dotenv
+from controllers.stockAgent import create_default_stock_data, merge_stock_data
+from controllers.stockAnalysis import get_analysis, AnalysisParseError
+from controllers.executor import run_blocking
+from controllers.fundamentals import fast_analyses
+from controllers import scheduler, rateLimiter
+
+load_dotenv()
+
+# Queue file shared by every uvicorn worker, analyses run at once per worker,
+# how often idle workers look for work, and the largest job accepted
+JOBS_STORE_PATH = os.getenv("JOBS_STORE_PATH", "data/jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+JOB_MAX_SYMBOLS = int(os.getenv("JOB_MAX_SYMBOLS", "500"))
+# A claimed task not finished within the lease (e.g. its worker died) is
+# claimed again, up to JOB_MAX_ATTEMPTS times; finished jobs are kept JOB_KEEP_SECONDS
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "600"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_KEEP_SECONDS = float(os.getenv("JOB_KEEP_SECONDS", "604800"))
+
+# Route group of the queue's SQLite calls, which run in the thread pool
+JOBS_ROUTE = "jobs"
+
+# Identifies the process holding a task, for debugging stuck jobs
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobStore:
+    """Analysis jobs and their per-symbol tasks, queued in SQLite.
+
+    The database runs in WAL mode and tasks are claimed with a single
+    UPDATE ... RETURNING, so any number of processes can share one file
+    without handing the same task to two workers.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, mode TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "job_id TEXT NOT NULL REFERENCES jobs(id) ON DELETE CASCADE, symbol TEXT NOT NULL, "
+            "status TEXT NOT NULL DEFAULT 'queued', attempts INTEGER NOT NULL DEFAULT 0, "
+            "worker TEXT, lease_until REAL, result TEXT, error TEXT, finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_job ON tasks (job_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_until)")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+
+    def create(self, symbols, mode):
+        """Queue a job analysing symbols; returns its id."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("INSERT INTO jobs (id, mode, created_at) VALUES (?, ?, ?)", (job_id, mode, now))
+                self._conn.executemany(
+                    "INSERT INTO tasks (job_id, symbol) VALUES (?, ?)", [(job_id, symbol) for symbol in symbols]
+                )
+                self._conn.execute("DELETE FROM jobs WHERE created_at < ?", (now - JOB_KEEP_SECONDS,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def claim(self):
+        """Take the oldest queued task, or one whose lease ran out; returns (task_id, symbol, mode) or None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE tasks SET status = 'running', attempts = attempts + 1, worker = ?, lease_until = ? "
+                "WHERE id = (SELECT id FROM tasks WHERE status = 'queued' "
+                "OR (status = 'running' AND lease_until < ?) ORDER BY id LIMIT 1) "
+                "RETURNING id, symbol, attempts, (SELECT mode FROM jobs WHERE jobs.id = tasks.job_id)",
+                (WORKER_ID, now + JOB_LEASE_SECONDS, now),
+            ).fetchone()
+        if row is None:
+            return None
+        task_id, symbol, attempts, mode = row
+        if attempts > JOB_MAX_ATTEMPTS:
+            self.finish(task_id, error=f"Gave up after {JOB_MAX_ATTEMPTS} attempts")
+            return self.claim()
+        return task_id, symbol, mode
+
+    def finish(self, task_id, result=None, error=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL WHERE id = ?",
+                ("failed" if error else "done", json.dumps(result) if result is not None else None, error, time.time(), task_id),
+            )
+
+    def release(self, task_id):
+        """Put a task interrupted by shutdown back in the queue."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tasks SET status = 'queued', attempts = attempts - 1, worker = NULL, lease_until = NULL WHERE id = ?",
+                (task_id,),
+            )
+
+    def get(self, job_id):
+        """Progress and the results finished so far of a job, or None."""
+        with self._lock:
+            job = self._conn.execute("SELECT mode, created_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT symbol, status, result, error, finished_at FROM tasks WHERE job_id = ? ORDER BY id", (job_id,)
+            ).fetchall()
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        results, errors = {}, {}
+        for symbol, status, result, error, _ in rows:
+            counts[status] += 1
+            if result is not None:
+                results[symbol] = json.loads(result)
+            if error is not None:
+                errors[symbol] = error
+        finished = counts["done"] + counts["failed"]
+        return {
+            "job_id": job_id,
+            "mode": job[0],
+            "status": "completed" if finished == len(rows) else "running" if finished or counts["running"] else "queued",
+            "total": len(rows),
+            **counts,
+            "progress": round(finished / len(rows), 4) if rows else 1.0,
+            "created_at": job[1],
+            "updated_at": max((row[4] for row in rows if row[4] is not None), default=job[1]),
+            "results": results,
+            "errors": errors,
+        }
+
+    def stats(self):
+        """Tasks per status across every job, for /health."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        return dict(rows)
+
+
+store = JobStore(JOBS_STORE_PATH)
+
+
+async def analyse(symbol, mode):
+    """One symbol's analysis, normalised to the create_default_stock_data structure."""
+    if mode == "fast":
+        data = (await fast_analyses([symbol]))[symbol]
+    else:
+        data, _, _ = await get_analysis(symbol, endpoint="jobs")
+    return merge_stock_data(create_default_stock_data(symbol), data)
+
+
+async def work():
+    """Run queued tasks until the queue is empty; each worker loop polls this.
+
+    An analysis whose output could not be parsed marks its symbol failed
+    instead of storing the zero-filled default as a result.
+    """
+    while True:
+        task = await run_blocking(JOBS_ROUTE, store.claim)
+        if task is None:
+            return
+        task_id, symbol, mode = task
+        try:
+            result = await rateLimiter.as_background(analyse(symbol, mode))
+        except asyncio.CancelledError:
+            # Shutting down; a quick write, done before the loop goes away
+            store.release(task_id)
+            raise
+        except AnalysisParseError as e:
+            print(f"❌ Job analysis of {symbol} failed: {e}")
+            await run_blocking(JOBS_ROUTE, store.finish, task_id, error="Analysis output could not be parsed")
+        except Exception as e:
+            print(f"❌ Job analysis of {symbol} failed: {e}")
+            await run_blocking(JOBS_ROUTE, store.finish, task_id, error=str(e))
+        else:
+            await run_blocking(JOBS_ROUTE, store.finish, task_id, result=result)
+
+
+async def submit(symbols, mode="agent"):
+    """Queue an analysis job for symbols; returns the job id."""
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    job_id = await run_blocking(JOBS_ROUTE, store.create, symbols, mode)
+    print(f"✅ Queued job {job_id} with {len(symbols)} symbols")
+    return job_id
+
+
+async def get_job(job_id):
+    return await run_blocking(JOBS_ROUTE, store.get, job_id)
+
+
+async def stats():
+    """Tasks per status, for /health."""
+    return await run_blocking(JOBS_ROUTE, store.stats)
+
+
+def start_workers():
+    """Start JOB_WORKERS worker loops in this process; called from the app lifespan."""
+    for i in range(JOB_WORKERS):
+        scheduler.start_periodic(f"job-worker-{i}", JOB_POLL_SECONDS, work)
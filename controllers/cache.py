@@ -0,0 +1,251 @@
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from controllers import sharedCache
+
+_MISSING = object()
+
+# Every cache and single-flight group registers itself here so its
+# counters can be reported
+caches = {}
+flights = {}
+
+# Route group of shared-tier I/O run from async code
+CACHE_ROUTE = "cache"
+
+
+async def _run_blocking(fn, *args):
+    # Imported here: the executor imports modules that build caches at import time
+    from controllers.executor import run_blocking
+    return await run_blocking(CACHE_ROUTE, fn, *args)
+
+
+class TTLCache:
+    """Thread-safe in-process cache with per-entry TTL and LRU eviction.
+
+    With shared=True, entries are also written to the shared tier
+    (sharedCache.CACHE_BACKEND) so every worker process sees them; the
+    in-process copy then only lives for SHARED_CACHE_LOCAL_TTL seconds.
+    Shared values are stored as JSON, so tuples come back as lists. Async
+    code uses the a* methods, which keep the shared tier's I/O off the
+    event loop.
+    """
+
+    def __init__(self, name, maxsize=1024, ttl=60.0, shared=False):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        caches[name] = self
+
+    def _tier(self):
+        return sharedCache.tier() if self.shared else None
+
+    def _shared_key(self, key):
+        return f"{self.name}:{key}"
+
+    def _get_local(self, key):
+        entry = self._data.get(key, _MISSING)
+        if entry is not _MISSING:
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                return value
+            del self._data[key]
+        return _MISSING
+
+    def _set_local(self, key, value, ttl):
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired."""
+        return self.get_many([key]).get(key, default)
+
+    def get_many(self, keys):
+        """{key: value} of the keys found, with one shared-tier lookup for all local misses."""
+        found = self._get_local_many(keys)
+        missing = [key for key in keys if key not in found]
+        if missing and self._tier() is not None:
+            found.update(self._get_shared(missing))
+        self._count_misses(len(keys) - len(found))
+        return found
+
+    async def aget(self, key, default=None):
+        """get for async code: a shared-tier lookup runs in the thread pool, off the event loop."""
+        return (await self.aget_many([key])).get(key, default)
+
+    async def aget_many(self, keys):
+        """get_many for async code; keys found in this process never leave the event loop."""
+        found = self._get_local_many(keys)
+        missing = [key for key in keys if key not in found]
+        if missing and self._tier() is not None:
+            found.update(await _run_blocking(self._get_shared, missing))
+        self._count_misses(len(keys) - len(found))
+        return found
+
+    def _get_local_many(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                value = self._get_local(key)
+                if value is not _MISSING:
+                    found[key] = value
+            self.hits += len(found)
+        return found
+
+    def _get_shared(self, keys):
+        try:
+            shared = self._tier().get_many([self._shared_key(key) for key in keys])
+        except Exception as e:
+            print(f"⚠️ Shared cache read for {self.name} failed: {e}")
+            return {}
+        found = {}
+        for key in keys:
+            entry = shared.get(self._shared_key(key))
+            if entry is None:
+                continue
+            data, ttl_left = entry
+            try:
+                value = sharedCache.loads(data)
+            except ValueError:
+                # Written in an older format; treated as a miss and overwritten
+                continue
+            found[key] = value
+            with self._lock:
+                self._set_local(key, value, min(ttl_left, sharedCache.SHARED_CACHE_LOCAL_TTL))
+                self.hits += 1
+                self.shared_hits += 1
+        return found
+
+    def _count_misses(self, misses):
+        with self._lock:
+            self.misses += misses
+
+    def set(self, key, value, ttl=None):
+        """Store value under key, evicting the least recently used entries."""
+        ttl = self.ttl if ttl is None else ttl
+        self._set_local_entry(key, value, ttl)
+        if self._tier() is not None:
+            self._set_shared({key: value}, ttl)
+
+    async def aset(self, key, value, ttl=None):
+        """set for async code: the shared-tier write runs in the thread pool."""
+        await self.aset_many({key: value}, ttl)
+
+    async def aset_many(self, items, ttl=None):
+        """Store every key: value of items, with one trip to the thread pool for the shared tier."""
+        ttl = self.ttl if ttl is None else ttl
+        for key, value in items.items():
+            self._set_local_entry(key, value, ttl)
+        if items and self._tier() is not None:
+            await _run_blocking(self._set_shared, items, ttl)
+
+    def _set_local_entry(self, key, value, ttl):
+        local_ttl = min(ttl, sharedCache.SHARED_CACHE_LOCAL_TTL) if self._tier() is not None else ttl
+        with self._lock:
+            self._set_local(key, value, local_ttl)
+
+    def _set_shared(self, items, ttl):
+        tier = self._tier()
+        for key, value in items.items():
+            try:
+                tier.set(self._shared_key(key), sharedCache.dumps(value), ttl)
+            except Exception as e:
+                print(f"⚠️ Shared cache write for {self.name} failed: {e}")
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+        tier = self._tier()
+        if tier is not None:
+            tier.delete(self._shared_key(key))
+
+    def clear(self):
+        """Drop this process's entries; shared entries expire on their own."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Return hit/miss counters for TTL tuning."""
+        lookups = self.hits + self.misses
+        stats = {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+        if self._tier() is not None:
+            stats["shared_hits"] = self.shared_hits
+        return stats
+
+
+class LeaderCancelled(Exception):
+    """The caller running a single-flight call was cancelled before it finished."""
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one upstream call.
+
+    If the caller running the call is cancelled (e.g. its client went away),
+    the waiting callers do not fail with it; one of them runs the call again.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._inflight = {}
+        self.coalesced = 0
+        flights[name] = self
+
+    async def do(self, key, fn, *args, **kwargs):
+        """Await fn(*args, **kwargs), sharing the result with concurrent callers of key."""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except LeaderCancelled:
+                return await self.do(key, fn, *args, **kwargs)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.set_exception(LeaderCancelled(key))
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+
+def cache_stats():
+    """Return the counters of every registered cache."""
+    stats = {name: cache.stats() for name, cache in caches.items()}
+    for name, flight in flights.items():
+        stats.setdefault(name, {})["coalesced"] = flight.coalesced
+    return stats
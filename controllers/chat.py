@@ -1,24 +1,32 @@
-import groq
 import os
 from dotenv import load_dotenv
+from controllers.responseCache import llm_cache
+from controllers.httpClients import groq_client as get_groq_client
 
 load_dotenv()
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-groq_client = groq.Client(api_key=GROQ_API_KEY)
 
 def groq_chat(query: str):
     if not query:
         return {"error": "Query parameter is required"}
     
+    model_id = "llama-3.3-70b-versatile"
+    system_prompt = "You are an AI investment assistant. You are here to help users with investment-related questions."
+    cached = llm_cache.get(query, model_id, system_prompt)
+    if cached is not None:
+        return {"question": query, "answer": cached}
+
     try:
-        response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile", 
-            messages=[{"role": "system", "content": "You are an AI investment assistant. You are here to help users with investment-related questions."},
+        response = get_groq_client().chat.completions.create(
+            model=model_id, 
+            messages=[{"role": "system", "content": system_prompt},
                       {"role": "user", "content": query}]
         )
         
         answer = response.choices[0].message.content
+        if answer:
+            llm_cache.set(query, model_id, system_prompt, answer)
         return {"question": query, "answer": answer}
     
     except Exception as e:
@@ -0,0 +1,103 @@
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from dotenv import load_dotenv
+from controllers import metrics, rateLimiter, toolCache
+
+load_dotenv()
+
+# Size of the shared pool used for blocking calls (yfinance, sync SDKs)
+EXECUTOR_MAX_WORKERS = int(os.getenv("EXECUTOR_MAX_WORKERS", "32"))
+
+# Maximum number of in-flight calls per route group, so a burst on one
+# route (e.g. /agent) cannot take every slot from another (e.g. /stock)
+ROUTE_LIMITS = {
+    "agent": int(os.getenv("AGENT_CONCURRENCY", "4")),
+    "chat": int(os.getenv("CHAT_CONCURRENCY", "16")),
+    "news": int(os.getenv("NEWS_CONCURRENCY", "2")),
+    "analysis": int(os.getenv("ANALYSIS_CONCURRENCY", "4")),
+    "stock": int(os.getenv("STOCK_CONCURRENCY", "16")),
+}
+DEFAULT_ROUTE_LIMIT = int(os.getenv("DEFAULT_ROUTE_CONCURRENCY", "8"))
+
+_pool = None
+_limiters = {}
+
+
+def get_pool():
+    """Return the shared thread pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=EXECUTOR_MAX_WORKERS, thread_name_prefix="blocking")
+    return _pool
+
+
+def limiter(route):
+    """Return the concurrency limiter for a route group."""
+    if route not in _limiters:
+        _limiters[route] = asyncio.Semaphore(ROUTE_LIMITS.get(route, DEFAULT_ROUTE_LIMIT))
+    return _limiters[route]
+
+
+async def run_blocking(route, fn, *args, **kwargs):
+    """Run a blocking callable in the shared pool under the route's limit.
+
+    A thread cannot be stopped, so when the caller is cancelled or times out
+    the route's slot stays taken until the thread has actually finished;
+    otherwise retries against a slow upstream would pile up threads.
+    """
+    semaphore = limiter(route)
+    await semaphore.acquire()
+
+    def release(done):
+        semaphore.release()
+        # Nobody may be awaiting any more; mark a late error as retrieved
+        if not done.cancelled():
+            done.exception()
+
+    try:
+        future = asyncio.get_running_loop().run_in_executor(get_pool(), partial(fn, *args, **kwargs))
+    except BaseException:
+        semaphore.release()
+        raise
+    future.add_done_callback(release)
+    return await asyncio.shield(future)
+
+
+async def run_agent(route, agent, message, **kwargs):
+    """Run an agno agent natively async under the route's limit.
+
+    Agents keep per-run state on the instance, so every request works on
+    its own copy instead of sharing the module-level agent. The run waits
+    for room in its model's rate limit first. Durations, token counts and
+    tool calls of the run are recorded in the metrics, and the tool calls
+    served from the tool cache in the response's metrics.
+    """
+    model_id = agent.model.id if agent.model is not None else None
+    reserved = rateLimiter.estimate_tokens(message)
+    await rateLimiter.acquire(model_id, route, reserved)
+    async with limiter(route):
+        agent = agent.deep_copy()
+        start = time.perf_counter()
+        failed = True
+        tool_cache = toolCache.start_run()
+        try:
+            response = await agent.arun(message, **kwargs)
+            if response is not None and response.metrics is not None:
+                response.metrics["tool_cache_hits"] = tool_cache["hits"]
+                response.metrics["tool_cache_misses"] = tool_cache["misses"]
+            failed = False
+            return response
+        finally:
+            metrics.record_agent_run(agent, route, time.perf_counter() - start, error=failed, tool_cache=tool_cache)
+            rateLimiter.settle_agent(agent, reserved)
+
+
+def shutdown():
+    """Stop the shared pool; called from the app lifespan."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
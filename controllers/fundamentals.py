@@ -0,0 +1,95 @@
+import os
+import asyncio
+import numpy as np
+from dotenv import load_dotenv
+from controllers.stockAgent import create_default_stock_data, merge_stock_data
+from controllers.cache import TTLCache
+from controllers.executor import run_blocking
+from controllers import resilience
+from controllers.httpClients import yahoo_session
+
+load_dotenv()
+
+FUNDAMENTALS_TTL = float(os.getenv("FUNDAMENTALS_TTL", "3600"))
+fundamentals_cache = TTLCache("fundamentals", maxsize=2048, ttl=FUNDAMENTALS_TTL, shared=True)
+
+# yfinance .info fields used to fill create_default_stock_data
+INFO_FIELDS = [
+    "currentPrice", "regularMarketPrice", "marketCap", "trailingPE", "trailingEps", "priceToBook",
+    "bookValue", "enterpriseToEbitda", "enterpriseValue", "ebitda", "returnOnEquity", "returnOnAssets",
+    "operatingMargins", "profitMargins", "debtToEquity", "currentRatio", "quickRatio",
+    "trailingAnnualDividendYield", "dividendYield", "fiftyTwoWeekLow", "fiftyTwoWeekHigh",
+]
+
+
+def fetch_info(symbol):
+    """Raw yfinance .info for symbol, cached for FUNDAMENTALS_TTL seconds."""
+    import yfinance as yf
+
+    info = fundamentals_cache.get(symbol)
+    if info is None:
+        info = yf.Ticker(symbol, session=yahoo_session()).info
+        fundamentals_cache.set(symbol, info)
+    return info
+
+
+def compute_stock_data(infos):
+    """Build the create_default_stock_data structure for many symbols at once.
+
+    infos maps symbol to its .info dict. Ratios Yahoo leaves out are derived
+    column-wise over the whole batch; anything still unknown stays 0.0 like
+    the defaults.
+    """
+    import pandas as pd
+
+    symbols = list(infos)
+    frame = pd.DataFrame.from_records(
+        [{field: infos[s].get(field) for field in INFO_FIELDS} for s in symbols], index=symbols, columns=INFO_FIELDS
+    ).apply(pd.to_numeric, errors="coerce")
+
+    price = frame["currentPrice"].fillna(frame["regularMarketPrice"])
+    columns = {
+        "current_price": price,
+        "market_cap": frame["marketCap"],
+        "pe_ratio": frame["trailingPE"].fillna(price / frame["trailingEps"]),
+        "pb_ratio": frame["priceToBook"].fillna(price / frame["bookValue"]),
+        "ev_ebitda": frame["enterpriseToEbitda"].fillna(frame["enterpriseValue"] / frame["ebitda"]),
+        # Yahoo reports these as fractions, the schema uses percentages
+        "roe": frame["returnOnEquity"] * 100,
+        "roa": frame["returnOnAssets"] * 100,
+        "operating_margin": frame["operatingMargins"] * 100,
+        "net_margin": frame["profitMargins"] * 100,
+        # Yahoo reports debt/equity in percent, the schema uses a plain ratio
+        "debt_to_equity": frame["debtToEquity"] / 100,
+        "current_ratio": frame["currentRatio"],
+        "quick_ratio": frame["quickRatio"],
+        "eps": frame["trailingEps"],
+        "book_value": frame["bookValue"],
+        # dividendYield is already a percentage, the trailing one is a fraction
+        "dividend_yield": (frame["trailingAnnualDividendYield"] * 100).fillna(frame["dividendYield"]),
+        "fifty_two_week_low": frame["fiftyTwoWeekLow"],
+        "fifty_two_week_high": frame["fiftyTwoWeekHigh"],
+    }
+    values = pd.DataFrame(columns).replace([np.inf, -np.inf], np.nan).round(4)
+
+    results = {}
+    for symbol, row in zip(symbols, values.to_dict("records")):
+        present = {key: value for key, value in row.items() if not pd.isna(value)}
+        default_data = create_default_stock_data(symbol)
+        api_data = {
+            "symbol": symbol.upper(),
+            "company_name": infos[symbol].get("longName") or infos[symbol].get("shortName") or default_data["company_name"],
+            **{key: present[key] for key in ("current_price", "market_cap") if key in present},
+        }
+        for section, fields in default_data.items():
+            if isinstance(fields, dict):
+                api_data[section] = {key: present[key] for key in fields if key in present}
+        results[symbol] = merge_stock_data(default_data, api_data)
+    return results
+
+
+async def fast_analyses(symbols):
+    """Deterministic analyses for symbols straight from yfinance, without the LLM."""
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    infos = await asyncio.gather(*(resilience.call("yahoo", run_blocking, "stock", fetch_info, symbol) for symbol in symbols))
+    return compute_stock_data(dict(zip(symbols, infos)))
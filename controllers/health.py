@@ -0,0 +1,92 @@
+import os
+import time
+import asyncio
+import datetime
+import httpx
+from dotenv import load_dotenv
+from controllers import httpClients
+
+load_dotenv()
+
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+# How often upstreams are probed, the timeout of each probe, and which
+# upstreams must be reachable for /health/ready to pass
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", "30"))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "5"))
+HEALTH_REQUIRED = [name for name in os.getenv("HEALTH_REQUIRED", "groq,gemini,yahoo").replace(" ", "").split(",") if name]
+
+PROBES = {
+    "groq": lambda: {
+        "url": "https://api.groq.com/openai/v1/models",
+        "headers": {"Authorization": f"Bearer {GROQ_API_KEY}"},
+    },
+    "gemini": lambda: {
+        "url": "https://generativelanguage.googleapis.com/v1beta/models",
+        "params": {"key": GEMINI_API_KEY},
+    },
+    "yahoo": lambda: {
+        "url": "https://query1.finance.yahoo.com/v1/finance/search",
+        "params": {"q": "AAPL", "quotesCount": 1, "newsCount": 0},
+        "headers": {"User-Agent": "Chrome/122.0.0.0"},
+    },
+}
+
+_results = {}
+_public_ip = None
+
+
+def get_client(name):
+    """Probe Groq and Gemini over their shared pools, which keeps those connections warm."""
+    return httpClients.async_client(name if name in ("groq", "gemini") else "health")
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+async def probe(name):
+    """Probe one upstream and record reachability, latency and last success."""
+    previous = _results.get(name, {})
+    start = time.perf_counter()
+    try:
+        response = await get_client(name).get(timeout=HEALTH_PROBE_TIMEOUT, **PROBES[name]())
+        ok = response.status_code < 400
+        error = None if ok else f"HTTP {response.status_code}"
+    except httpx.HTTPError as e:
+        ok, error = False, str(e) or e.__class__.__name__
+    now = _now()
+    _results[name] = {
+        "ok": ok,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        "last_checked": now,
+        "last_success": now if ok else previous.get("last_success"),
+        "error": error,
+    }
+
+
+async def refresh_ip():
+    global _public_ip
+    try:
+        _public_ip = (await get_client("ipify").get("https://api.ipify.org", timeout=HEALTH_PROBE_TIMEOUT)).text
+    except httpx.HTTPError:
+        pass
+
+
+async def run_probes():
+    """One round of probes; scheduled every HEALTH_PROBE_INTERVAL seconds."""
+    await asyncio.gather(*(probe(name) for name in PROBES), refresh_ip())
+
+
+def probe_results():
+    return dict(_results)
+
+
+def public_ip():
+    return _public_ip
+
+
+def is_ready():
+    """True once every required upstream was reachable on its last probe."""
+    return all(_results.get(name, {}).get("ok") for name in HEALTH_REQUIRED)
@@ -0,0 +1,227 @@
+import os
+import json
+import threading
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+# Connection pool of each upstream: open connections, idle keep-alive
+# connections and how long those stay open, plus default timeouts
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "120"))
+# Multiplex concurrent requests over one connection where the upstream supports it (needs h2)
+HTTP2 = os.getenv("HTTP2", "1") == "1"
+# Connections kept per host by the requests session yfinance uses; match EXECUTOR_MAX_WORKERS
+YAHOO_POOL_SIZE = int(os.getenv("YAHOO_POOL_SIZE", "32"))
+
+# google-genai offers no way to hand it an httpx client, so the Gemini pool
+# replaces a private method; it is only installed on the SDK version (pinned
+# in requirements.txt) and method signature it was written against
+GEMINI_POOLED_SDK_VERSION = "1.5.0"
+GEMINI_POOLED_SIGNATURE = ("self", "http_request", "stream")
+
+# Upstreams started with the app; other pools are created on first use
+POOLS = ["groq", "gemini", "health"]
+
+_lock = threading.RLock()
+_async_clients = {}
+_sync_clients = {}
+_sessions = {}
+_sdk_clients = {}
+
+
+def http2_enabled():
+    if not HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _pool_options():
+    return {
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+    }
+
+
+def async_client(name):
+    """Shared keep-alive httpx.AsyncClient for the upstream name."""
+    with _lock:
+        if name not in _async_clients:
+            _async_clients[name] = httpx.AsyncClient(http2=http2_enabled(), **_pool_options())
+        return _async_clients[name]
+
+
+def sync_client(name):
+    """Shared keep-alive httpx.Client for the upstream name, for SDK calls made from threads."""
+    with _lock:
+        if name not in _sync_clients:
+            _sync_clients[name] = httpx.Client(http2=http2_enabled(), **_pool_options())
+        return _sync_clients[name]
+
+
+def yahoo_session():
+    """Shared requests session for yfinance, sized for the blocking thread pool."""
+    with _lock:
+        if "yahoo" not in _sessions:
+            session = requests.Session()
+            session.headers.update({"User-Agent": "Chrome/122.0.0.0"})
+            adapter = HTTPAdapter(pool_connections=YAHOO_POOL_SIZE, pool_maxsize=YAHOO_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions["yahoo"] = session
+        return _sessions["yahoo"]
+
+
+def _shared(cls):
+    """Subclass of an SDK client class whose instances are never copied.
+
+    agno deep-copies an agent's model for every run; the clients set on the
+    model have to survive that as the same objects so their pools are reused.
+    """
+    return type(f"Shared{cls.__name__}", (cls,), {
+        "__copy__": lambda self: self,
+        "__deepcopy__": lambda self, memo: self,
+    })
+
+
+def _sdk_client(name, build):
+    with _lock:
+        if name not in _sdk_clients:
+            _sdk_clients[name] = build()
+        return _sdk_clients[name]
+
+
+def groq_client():
+    """The process-wide sync Groq client."""
+    def build():
+        import groq
+        return _shared(groq.Client)(api_key=GROQ_API_KEY, http_client=sync_client("groq"))
+    return _sdk_client("groq", build)
+
+
+def async_groq_client():
+    """The process-wide async Groq client."""
+    def build():
+        import groq
+        return _shared(groq.AsyncClient)(api_key=GROQ_API_KEY, http_client=async_client("groq"))
+    return _sdk_client("groq_async", build)
+
+
+async def _pooled_gemini_request(api_client, http_request, stream=False):
+    # Same as BaseApiClient._async_request for API-key auth, but over the
+    # shared pool; google-genai 1.5 opens a new httpx client per call
+    from google.genai import errors
+    from google.genai._api_client import HttpResponse
+
+    client = async_client("gemini")
+    request = client.build_request(
+        method=http_request.method,
+        url=http_request.url,
+        headers=http_request.headers,
+        content=json.dumps(http_request.data) if http_request.data else None,
+        timeout=http_request.timeout or httpx.USE_CLIENT_DEFAULT,
+    )
+    response = await client.send(request, stream=stream)
+    errors.APIError.raise_for_response(response)
+    return HttpResponse(response.headers, response if stream else [response.text])
+
+
+def gemini_pool_supported():
+    """True if the installed google-genai matches the version the pooled request replaces."""
+    from inspect import signature
+    from google import genai
+    from google.genai._api_client import BaseApiClient
+
+    request = getattr(BaseApiClient, "_async_request", None)
+    return (
+        genai.__version__ == GEMINI_POOLED_SDK_VERSION
+        and request is not None
+        and tuple(signature(request).parameters) == GEMINI_POOLED_SIGNATURE
+    )
+
+
+def gemini_client():
+    """The process-wide Gemini client; its async calls go through the shared pool when supported."""
+    def build():
+        from google import genai
+
+        client = _shared(genai.Client)(api_key=GEMINI_API_KEY)
+        api_client = client._api_client
+        if api_client.vertexai:
+            return client
+        if not gemini_pool_supported():
+            print(f"⚠️ Gemini pool needs google-genai {GEMINI_POOLED_SDK_VERSION} (found {genai.__version__}), "
+                  "using the SDK's own connections")
+            return client
+        api_client._async_request = lambda http_request, stream=False: _pooled_gemini_request(
+            api_client, http_request, stream
+        )
+        return client
+    return _sdk_client("gemini", build)
+
+
+def groq_model(model_id, **kwargs):
+    """agno Groq model that uses the shared Groq clients."""
+    from agno.models.groq import Groq
+    return Groq(id=model_id, api_key=GROQ_API_KEY, client=groq_client(), async_client=async_groq_client(), **kwargs)
+
+
+def gemini_model(model_id, **kwargs):
+    """agno Gemini model that uses the shared Gemini client."""
+    from agno.models.google import Gemini
+    return Gemini(id=model_id, api_key=GEMINI_API_KEY, client=gemini_client(), **kwargs)
+
+
+def start():
+    """Open the pools of the main upstreams; called from the app lifespan."""
+    for name in POOLS:
+        async_client(name)
+    yahoo_session()
+
+
+async def close():
+    """Close every pool; called from the app lifespan on shutdown."""
+    with _lock:
+        async_clients = list(_async_clients.values())
+        sync_clients = list(_sync_clients.values())
+        sessions = list(_sessions.values())
+        _async_clients.clear()
+        _sync_clients.clear()
+        _sessions.clear()
+        _sdk_clients.clear()
+    for client in async_clients:
+        await client.aclose()
+    for client in sync_clients:
+        client.close()
+    for session in sessions:
+        session.close()
+
+
+def stats():
+    """Open connections per pool, for /health."""
+    result = {}
+    for name, client in list(_async_clients.items()):
+        connections = client._transport._pool.connections
+        result[name] = {
+            "http2": http2_enabled(),
+            "connections": len(connections),
+            "idle": sum(1 for connection in connections if connection.is_idle()),
+        }
+    return result
@@ -0,0 +1,26 @@
+from agno.tools import Toolkit
+from controllers.indicators import technical_indicators
+
+
+class IndicatorTools(Toolkit):
+    """Technical indicators computed locally from the stored price history."""
+
+    def __init__(self):
+        super().__init__(name="indicator_tools")
+        self.register(self.get_technical_indicators)
+
+    def get_technical_indicators(self, symbol: str, interval: str = "1d", bars: int = 5) -> str:
+        """Use this function to get technical indicators for a stock.
+
+        Args:
+            symbol (str): The stock symbol, e.g. AAPL.
+            interval (str): Bar interval, one of 1d, 1h, 30m, 15m, 5m, 1m. Defaults to 1d.
+            bars (int): Number of most recent bars to return. Defaults to 5.
+
+        Returns:
+            str: JSON with SMA, EMA, RSI, MACD (line, signal, histogram), Bollinger bands and ATR per bar.
+        """
+        try:
+            return technical_indicators(symbol, interval, bars)
+        except Exception as e:
+            return f"Error fetching technical indicators for {symbol}: {e}"
@@ -0,0 +1,307 @@
+import os
+import json
+import asyncio
+import threading
+from dataclasses import dataclass
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from dotenv import load_dotenv
+from controllers.priceHistory import get_history, load_history
+from controllers.executor import run_blocking
+
+load_dotenv()
+
+# Indicator periods; MACD is fast,slow,signal and Bollinger width is in standard deviations
+SMA_PERIOD = int(os.getenv("SMA_PERIOD", "20"))
+EMA_PERIOD = int(os.getenv("EMA_PERIOD", "20"))
+RSI_PERIOD = int(os.getenv("RSI_PERIOD", "14"))
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = (int(p) for p in os.getenv("MACD_PERIODS", "12,26,9").split(","))
+BOLLINGER_PERIOD = int(os.getenv("BOLLINGER_PERIOD", "20"))
+BOLLINGER_WIDTH = float(os.getenv("BOLLINGER_WIDTH", "2"))
+ATR_PERIOD = int(os.getenv("ATR_PERIOD", "14"))
+
+INDICATORS = (
+    "sma", "ema", "rsi", "macd", "macd_signal", "macd_hist", "bb_upper", "bb_middle", "bb_lower", "atr",
+)
+
+# Bars kept from the end of each series for the rolling windows of the next update
+TAIL = max(SMA_PERIOD, BOLLINGER_PERIOD) - 1
+
+
+class Smoother:
+    """Exponential smoothing of each row of a matrix, seeded with the mean of its first period values.
+
+    The state carries over between calls, so running it on new bars
+    continues every row exactly where the previous call stopped.
+    """
+
+    def __init__(self, periods, alphas):
+        self.periods = np.asarray(periods, dtype=float)
+        self.alphas = np.asarray(alphas, dtype=float)
+        self.value = np.full(len(self.periods), np.nan)
+        self.seed_sum = np.zeros(len(self.periods))
+        self.seed_count = np.zeros(len(self.periods))
+
+    def take(self, rows):
+        """A copy holding only the given rows."""
+        smoother = Smoother(self.periods[rows], self.alphas[rows])
+        smoother.value, smoother.seed_sum, smoother.seed_count = self.value[rows], self.seed_sum[rows], self.seed_count[rows]
+        return smoother
+
+    @classmethod
+    def stack(cls, smoothers, blocks=1):
+        """One smoother running the rows of all smoothers, each made of the same number of row blocks."""
+        def join(name):
+            parts = [np.split(getattr(smoother, name), blocks) for smoother in smoothers]
+            return np.concatenate([part[block] for block in range(blocks) for part in parts])
+
+        smoother = cls(join("periods"), join("alphas"))
+        smoother.value, smoother.seed_sum, smoother.seed_count = join("value"), join("seed_sum"), join("seed_count")
+        return smoother
+
+    def run(self, x):
+        """Smooth x (rows x bars); NaN inputs give NaN and leave the row's state as it was."""
+        out = np.full(x.shape, np.nan)
+        value, seed_sum, seed_count = self.value, self.seed_sum, self.seed_count
+        for t in range(x.shape[1]):
+            xt = x[:, t]
+            valid = ~np.isnan(xt)
+            seeding = valid & np.isnan(value)
+            seed_sum = seed_sum + np.where(seeding, xt, 0.0)
+            seed_count = seed_count + seeding
+            value = np.where(valid & ~seeding, value + self.alphas * (xt - value), value)
+            value = np.where(seeding & (seed_count == self.periods), seed_sum / self.periods, value)
+            out[:, t] = np.where(valid, value, np.nan)
+        self.value, self.seed_sum, self.seed_count = value, seed_sum, seed_count
+        return out
+
+
+@dataclass
+class IndicatorState:
+    """What compute needs to extend the indicators of a set of symbols with new bars."""
+    tail: np.ndarray
+    prev_close: np.ndarray
+    prices: Smoother
+    signal: Smoother
+
+    @classmethod
+    def empty(cls, symbols):
+        # One stacked smoother for EMA, MACD fast and slow, RSI gains and losses, and ATR
+        periods = [EMA_PERIOD, MACD_FAST, MACD_SLOW, RSI_PERIOD, RSI_PERIOD, ATR_PERIOD]
+        alphas = [2 / (EMA_PERIOD + 1), 2 / (MACD_FAST + 1), 2 / (MACD_SLOW + 1), 1 / RSI_PERIOD, 1 / RSI_PERIOD, 1 / ATR_PERIOD]
+        return cls(
+            tail=np.full((symbols, TAIL), np.nan),
+            prev_close=np.full(symbols, np.nan),
+            prices=Smoother(np.repeat(periods, symbols), np.repeat(alphas, symbols)),
+            signal=Smoother(np.full(symbols, MACD_SIGNAL), np.full(symbols, 2 / (MACD_SIGNAL + 1))),
+        )
+
+    def take(self, row):
+        """The state of a single symbol."""
+        symbols = len(self.prev_close)
+        return IndicatorState(
+            tail=self.tail[row:row + 1],
+            prev_close=self.prev_close[row:row + 1],
+            prices=self.prices.take(np.arange(6) * symbols + row),
+            signal=self.signal.take([row]),
+        )
+
+    @classmethod
+    def stack(cls, states):
+        """One state for the symbols of all states, in order."""
+        return cls(
+            tail=np.concatenate([state.tail for state in states]),
+            prev_close=np.concatenate([state.prev_close for state in states]),
+            prices=Smoother.stack([state.prices for state in states], blocks=6),
+            signal=Smoother.stack([state.signal for state in states]),
+        )
+
+
+def _windows(close, tail, period):
+    """Rolling windows of period bars ending at each bar of close, continuing from tail."""
+    padded = np.concatenate([tail[:, tail.shape[1] - (period - 1):], close], axis=1)
+    return sliding_window_view(padded, period, axis=1)
+
+
+def compute(high, low, close, state=None):
+    """SMA, EMA, RSI, MACD, Bollinger bands and ATR for (symbols x bars) price matrices.
+
+    Rows may be left-padded with NaN when symbols have histories of different
+    lengths. Passing the state returned by an earlier call computes only the
+    new bars given. Returns (indicators, state); every indicator is a
+    (symbols x bars) array.
+    """
+    high, low, close = (np.atleast_2d(np.asarray(a, dtype=float)) for a in (high, low, close))
+    symbols = close.shape[0]
+    state = state or IndicatorState.empty(symbols)
+    if not close.shape[1]:
+        return {name: np.empty((symbols, 0)) for name in INDICATORS}, state
+
+    prev_close = np.concatenate([state.prev_close[:, None], close[:, :-1]], axis=1)
+    delta = close - prev_close
+    # fmax skips the missing previous close of a first bar, leaving high - low
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+    smoothed = state.prices.run(np.concatenate([close, close, close, np.maximum(delta, 0), np.maximum(-delta, 0), true_range]))
+    ema, fast, slow, gain, loss, atr = np.split(smoothed, 6)
+    macd = fast - slow
+    signal = state.signal.run(macd)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(loss == 0, np.where(gain == 0, 50.0, 100.0), 100 - 100 / (1 + gain / loss))
+    rsi[np.isnan(gain) | np.isnan(loss)] = np.nan
+
+    bands = _windows(close, state.tail, BOLLINGER_PERIOD)
+    middle = bands.mean(axis=-1)
+    width = BOLLINGER_WIDTH * bands.std(axis=-1)
+
+    indicators = {
+        "sma": _windows(close, state.tail, SMA_PERIOD).mean(axis=-1),
+        "ema": ema,
+        "rsi": rsi,
+        "macd": macd,
+        "macd_signal": signal,
+        "macd_hist": macd - signal,
+        "bb_upper": middle + width,
+        "bb_middle": middle,
+        "bb_lower": middle - width,
+        "atr": atr,
+    }
+
+    state.prev_close = np.where(np.isnan(close[:, -1]), state.prev_close, close[:, -1])
+    state.tail = np.concatenate([state.tail, close], axis=1)[:, close.shape[1]:] if TAIL else state.tail
+    return indicators, state
+
+
+def pad_rows(series):
+    """Stack 1-D arrays of different lengths into a matrix, left-padded with NaN."""
+    width = max((len(values) for values in series), default=0)
+    matrix = np.full((len(series), width), np.nan)
+    for row, values in enumerate(series):
+        if len(values):
+            matrix[row, width - len(values):] = values
+    return matrix
+
+
+class IndicatorCache:
+    """Indicators over every stored bar per symbol and interval, extended as new bars arrive."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol, interval, bars):
+        """Indicators aligned with bars, the full column views from the history store."""
+        key = (symbol.upper(), interval)
+        rows = len(bars["timestamp"])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["rows"] == rows:
+                return entry["values"]
+            if entry is not None and entry["rows"] < rows:
+                start = entry["rows"]
+                new, state = compute(bars["high"][start:], bars["low"][start:], bars["close"][start:], entry["state"])
+                values = {name: np.concatenate([entry["values"][name], new[name][0]]) for name in INDICATORS}
+            else:
+                computed, state = compute(bars["high"], bars["low"], bars["close"])
+                values = {name: array[0] for name, array in computed.items()}
+            self._entries[key] = {"rows": rows, "values": values, "state": state}
+        return values
+
+    def fill(self, symbols, interval, histories):
+        """Indicators of many symbols, computed together and cached.
+
+        Like get, symbols seen before only have their new bars computed, in
+        one vectorized pass per number of new bars; the others go through
+        one pass over their full histories.
+        """
+        results, extend, full = {}, {}, []
+        with self._lock:
+            for symbol, bars in zip(symbols, histories):
+                rows = len(bars["timestamp"])
+                entry = self._entries.get((symbol.upper(), interval))
+                if entry is not None and entry["rows"] == rows:
+                    results[symbol] = entry["values"]
+                elif entry is not None and entry["rows"] < rows:
+                    extend.setdefault(rows - entry["rows"], []).append((symbol, bars, entry))
+                else:
+                    full.append((symbol, bars))
+
+        updates = []
+        for group in extend.values():
+            start = [entry["rows"] for _, _, entry in group]
+            new, state = compute(
+                *(np.stack([bars[column][s:] for (_, bars, _), s in zip(group, start)]) for column in ("high", "low", "close")),
+                IndicatorState.stack([entry["state"] for _, _, entry in group]),
+            )
+            for row, (symbol, bars, entry) in enumerate(group):
+                values = {name: np.concatenate([entry["values"][name], new[name][row]]) for name in INDICATORS}
+                updates.append((symbol, len(bars["timestamp"]), values, state.take(row)))
+        if full:
+            matrices = [pad_rows([bars[column] for _, bars in full]) for column in ("high", "low", "close")]
+            computed, state = compute(*matrices)
+            width = matrices[2].shape[1]
+            for row, (symbol, bars) in enumerate(full):
+                rows = len(bars["timestamp"])
+                values = {name: array[row, width - rows:] for name, array in computed.items()}
+                updates.append((symbol, rows, values, state.take(row)))
+
+        with self._lock:
+            for symbol, rows, values, state in updates:
+                self._entries[(symbol.upper(), interval)] = {"rows": rows, "values": values, "state": state}
+                results[symbol] = values
+        return results
+
+
+indicator_cache = IndicatorCache()
+
+
+def _round(value):
+    return None if value != value else round(float(value), 4)
+
+
+def _bar(timestamp, values, index):
+    return {"timestamp": int(timestamp), **{name: _round(values[name][index]) for name in INDICATORS}}
+
+
+async def get_indicators(symbol, interval="1d", start=None, end=None):
+    """(timestamps, indicators) of symbol between start and end.
+
+    Indicators are computed over the full stored history, so the first bars
+    of a range get properly warmed-up values.
+    """
+    bars = await get_history(symbol, interval)
+    values = await run_blocking("stock", indicator_cache.get, symbol, interval, bars)
+    timestamps = bars["timestamp"]
+    lo = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+    hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side="left"))
+    return timestamps[lo:hi], {name: array[lo:hi] for name, array in values.items()}
+
+
+async def latest_indicators(symbols, interval="1d"):
+    """Latest indicator values of many symbols, computed together in one pass."""
+    histories = await asyncio.gather(*(get_history(symbol, interval) for symbol in symbols), return_exceptions=True)
+    available = [(symbol, bars) for symbol, bars in zip(symbols, histories) if not isinstance(bars, Exception)]
+    computed = await run_blocking(
+        "stock", indicator_cache.fill, [s for s, _ in available], interval, [b for _, b in available]
+    ) if available else {}
+    results = []
+    for symbol, bars in zip(symbols, histories):
+        if isinstance(bars, Exception):
+            results.append({"symbol": symbol, "error": str(bars)})
+        elif not len(bars["timestamp"]):
+            results.append({"symbol": symbol, "error": "no history"})
+        else:
+            results.append({"symbol": symbol, **_bar(bars["timestamp"][-1], computed[symbol], -1)})
+    return results
+
+
+def technical_indicators(symbol, interval="1d", bars=5):
+    """Technical indicators of the last bars of symbol as JSON; blocking, for agent tools."""
+    history = load_history(symbol, interval)
+    timestamps = history["timestamp"]
+    if not len(timestamps):
+        return json.dumps({"symbol": symbol.upper(), "error": "no price history available"})
+    values = indicator_cache.get(symbol, interval, history)
+    rows = [_bar(timestamps[i], values, i) for i in range(max(0, len(timestamps) - bars), len(timestamps))]
+    return json.dumps({"symbol": symbol.upper(), "interval": interval, "bars": rows})
@@ -0,0 +1,210 @@
+import threading
+from collections import defaultdict
+from controllers.cache import cache_stats
+from controllers.resilience import breaker_stats
+
+# Latency buckets in seconds, from fast cached reads up to long agent runs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_metrics = []
+_collectors = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class Metric:
+    """Base class for metrics rendered in the Prometheus text format."""
+
+    kind = "untyped"
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation):
+        super().__init__(name, documentation)
+        self._values = defaultdict(float)
+
+    def inc(self, amount=1.0, **labels):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] += amount
+
+    def set_total(self, value, **labels):
+        """Mirror a monotonic total that is counted elsewhere."""
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = value
+
+    def render(self):
+        with self._lock:
+            return self.header() + [f"{self.name}{_format_labels(k)} {v}" for k, v in self._values.items()]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation):
+        super().__init__(name, documentation)
+        self._values = {}
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = value
+
+    def inc(self, amount=1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self):
+        with self._lock:
+            return self.header() + [f"{self.name}{_format_labels(k)} {v}" for k, v in self._values.items()]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(buckets)
+        self._counts = {}
+        self._sums = defaultdict(float)
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            self._sums[key] += value
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            for key, counts in self._counts.items():
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {counts[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {self._sums[key]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {counts[-1]}")
+        return lines
+
+
+def register_collector(fn):
+    """Register fn, called on every scrape to refresh gauges from live state."""
+    _collectors.append(fn)
+    return fn
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    for collector in _collectors:
+        try:
+            collector()
+        except Exception as e:
+            print(f"❌ Metrics collector {collector.__name__} failed: {e}")
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+http_request_duration = Histogram("http_request_duration_seconds", "HTTP request latency by route")
+agent_run_duration = Histogram("agent_run_duration_seconds", "Wall-clock duration of agent runs")
+agent_run_errors = Counter("agent_run_errors_total", "Agent runs that raised an error")
+model_call_duration = Histogram("agent_model_call_duration_seconds", "Duration of individual model calls made by agents")
+model_tokens = Counter("agent_model_tokens_total", "Tokens used by agent model calls")
+tool_call_duration = Histogram("agent_tool_call_duration_seconds", "Duration of agent tool calls")
+tool_call_errors = Counter("agent_tool_call_errors_total", "Agent tool calls that failed")
+tool_cache_hits = Counter("agent_tool_cache_hits_total", "Agent tool calls answered from the tool cache, by run")
+cache_hits = Counter("cache_hits_total", "Cache hits by cache")
+cache_misses = Counter("cache_misses_total", "Cache misses by cache")
+cache_size = Gauge("cache_entries", "Entries currently held by each cache")
+breaker_state = Gauge("upstream_circuit_open", "1 while an upstream circuit breaker is open, 0.5 while half-open")
+breaker_failures = Gauge("upstream_consecutive_failures", "Consecutive failed calls per upstream")
+
+BREAKER_STATE_VALUES = {"closed": 0, "half_open": 0.5, "open": 1}
+
+
+def observe_request(route, method, status, seconds):
+    http_request_duration.observe(seconds, route=route, method=method, status=status)
+
+
+def _agent_label(agent, default):
+    return agent.name or default
+
+
+def _record_messages(agent_label, model_id, messages):
+    for message in messages or []:
+        metrics = message.metrics
+        if message.role == "tool":
+            tool = message.tool_name or "unknown"
+            if metrics is not None and metrics.time is not None:
+                tool_call_duration.observe(metrics.time, agent=agent_label, tool=tool)
+            if message.tool_call_error:
+                tool_call_errors.inc(agent=agent_label, tool=tool)
+        elif message.role == "assistant" and metrics is not None:
+            if metrics.time is not None:
+                model_call_duration.observe(metrics.time, agent=agent_label, model=model_id)
+            if metrics.input_tokens:
+                model_tokens.inc(metrics.input_tokens, agent=agent_label, model=model_id, kind="input")
+            if metrics.output_tokens:
+                model_tokens.inc(metrics.output_tokens, agent=agent_label, model=model_id, kind="output")
+
+
+def record_agent_run(agent, default_label, seconds=None, error=False, tool_cache=None):
+    """Record a finished run of agent, and of any team members it delegated to.
+
+    Per-call durations and token counts come from the messages agno keeps on
+    each run's RunResponse; tool_cache holds the run's toolCache.start_run counts.
+    """
+    label = _agent_label(agent, default_label)
+    if seconds is not None:
+        agent_run_duration.observe(seconds, agent=label)
+    if error:
+        agent_run_errors.inc(agent=label)
+    if tool_cache and tool_cache["hits"]:
+        tool_cache_hits.inc(tool_cache["hits"], agent=label)
+    model_id = agent.model.id if agent.model is not None else "unknown"
+    runs = getattr(agent.memory, "runs", None) or []
+    for run in runs:
+        if run.response is not None:
+            _record_messages(label, model_id, run.response.messages)
+    for member in agent.team or []:
+        record_agent_run(member, "member")
+
+
+@register_collector
+def collect_cache_stats():
+    for name, stats in cache_stats().items():
+        cache_hits.set_total(float(stats.get("hits", 0)), cache=name)
+        cache_misses.set_total(float(stats.get("misses", 0)), cache=name)
+        cache_size.set(stats.get("size", 0), cache=name)
+
+
+@register_collector
+def collect_breaker_stats():
+    for upstream, stats in breaker_stats().items():
+        breaker_state.set(BREAKER_STATE_VALUES[stats["state"]], upstream=upstream)
+        breaker_failures.set(stats["failures"], upstream=upstream)
@@ -0,0 +1,234 @@
+import os
+import re
+import time
+import threading
+from dotenv import load_dotenv
+from controllers import metrics, rateLimiter, resilience
+from controllers.executor import limiter
+from controllers.httpClients import async_groq_client
+from controllers.agent import AGENT_MODEL_ID
+
+load_dotenv()
+
+# How /chat and /agent pick a model per query: off (always the route's own
+# model), heuristic (keyword and length rules, no model call) or llm (ask
+# ROUTER_MODEL_ID to classify, falling back to the heuristics)
+MODEL_ROUTER = os.getenv("MODEL_ROUTER", "heuristic")
+ROUTER_MODEL_ID = os.getenv("ROUTER_MODEL_ID", "llama-3.1-8b-instant")
+# Models answering simple and moderate queries; complex ones keep the route's model
+ROUTER_SIMPLE_MODEL = os.getenv("ROUTER_SIMPLE_MODEL", "llama-3.1-8b-instant")
+ROUTER_MODERATE_MODEL = os.getenv("ROUTER_MODERATE_MODEL", "llama-3.3-70b-versatile")
+# Ask the next larger model when an answer fails validation (1/0), and the
+# shortest answer that passes
+ROUTER_CASCADE = os.getenv("ROUTER_CASCADE", "1") == "1"
+ROUTER_MIN_ANSWER_CHARS = int(os.getenv("ROUTER_MIN_ANSWER_CHARS", "40"))
+# Word counts above which a query is no longer simple, and is always complex
+ROUTER_SIMPLE_MAX_WORDS = int(os.getenv("ROUTER_SIMPLE_MAX_WORDS", "25"))
+ROUTER_COMPLEX_MIN_WORDS = int(os.getenv("ROUTER_COMPLEX_MIN_WORDS", "80"))
+
+LEVELS = ("simple", "moderate", "complex")
+DIRECT_SYSTEM_PROMPT = "You are an AI investment assistant. You are here to help users with investment-related questions."
+
+# Model answering each level per route; None hands the query to the route's
+# own pipeline (the /agent team). The complex model is the baseline savings
+# are measured against
+ROUTES = {
+    "chat": {"simple": ROUTER_SIMPLE_MODEL, "moderate": ROUTER_MODERATE_MODEL, "complex": "llama-3.3-70b-versatile"},
+    "agent": {"simple": ROUTER_SIMPLE_MODEL, "moderate": ROUTER_MODERATE_MODEL, "complex": None},
+}
+BASELINE_LABELS = {"agent": AGENT_MODEL_ID}
+
+# Questions about live data need the agents' tools
+LIVE_DATA = re.compile(
+    r"\b(price|prices|quote|today|tomorrow|yesterday|now|current|currently|latest|recent|news|headlines|"
+    r"this (week|month|quarter|year)|earnings|trading at|market cap|dividend yield|52[- ]week)\b",
+    re.IGNORECASE,
+)
+REASONING = re.compile(
+    r"\b(why|compare|comparison|versus|vs|better|should i|strategy|portfolio|allocate|allocation|forecast|predict|"
+    r"analy[sz]e|analysis|evaluate|pros and cons|trade-?offs?|risks?|outlook|recommend)\b",
+    re.IGNORECASE,
+)
+TICKER = re.compile(r"\$[A-Za-z]{1,5}\b|\b[A-Z]{2,5}\b")
+# Upper-case words that are finance vocabulary rather than tickers
+NOT_TICKERS = {
+    "AI", "API", "CEO", "CFO", "EPS", "ETF", "ETFS", "FX", "GDP", "IPO", "IRA", "LLC", "NAV", "OK", "PE", "REIT",
+    "ROE", "ROI", "SEC", "USA", "US", "USD", "EUR", "ESG", "APR", "APY", "CD", "CPI", "FED", "FOMC", "DCF",
+}
+# Answers that show the model could not answer on its own
+UNSURE = re.compile(
+    r"\b(i (do not|don't|cannot|can't|am unable to|'m unable to) (know|access|provide|browse|predict)|"
+    r"i'?m not sure|i am not sure|real[- ]time (data|information|prices)|as of my (knowledge|last) (cutoff|update)|"
+    r"my (knowledge|training) (cutoff|data))",
+    re.IGNORECASE,
+)
+
+route_requests = metrics.Counter("model_router_requests_total", "Queries answered per route, complexity level and model")
+route_escalations = metrics.Counter("model_router_escalations_total", "Answers that failed validation and went to a larger model")
+route_saved_seconds = metrics.Gauge("model_router_saved_seconds", "Latency saved by routing, against the route's baseline model")
+route_saved_tokens = metrics.Gauge("model_router_saved_tokens", "Tokens saved by routing, against the route's baseline model")
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def has_ticker(query):
+    return any(match.lstrip("$").upper() not in NOT_TICKERS for match in TICKER.findall(query))
+
+
+def classify(query):
+    """simple, moderate or complex from keywords and length alone."""
+    words = len(query.split())
+    reasoning = len(REASONING.findall(query))
+    if LIVE_DATA.search(query) or has_ticker(query) or words > ROUTER_COMPLEX_MIN_WORDS or reasoning >= 3:
+        return "complex"
+    if reasoning or words > ROUTER_SIMPLE_MAX_WORDS or query.count("?") > 1:
+        return "moderate"
+    return "simple"
+
+
+async def complete(route, model_id, system_prompt, query, **kwargs):
+    """One rate-limited Groq chat completion; returns (answer, finish_reason)."""
+    reserved = rateLimiter.estimate_tokens(system_prompt, query)
+    await rateLimiter.acquire(model_id, route, reserved)
+    async with limiter(route):
+        response = await resilience.call(
+            "groq", async_groq_client().chat.completions.create, model=model_id,
+            messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": query}], **kwargs
+        )
+    rateLimiter.settle(model_id, reserved, response.usage.total_tokens if response.usage else reserved)
+    choice = response.choices[0]
+    return choice.message.content, choice.finish_reason
+
+
+async def classify_with_model(query):
+    """Level picked by ROUTER_MODEL_ID, or the heuristic one if it does not give a usable reply."""
+    try:
+        reply, _ = await complete(
+            "router", ROUTER_MODEL_ID,
+            "Classify how hard an investment question is to answer. Reply with one word: "
+            "simple (a definition or fact any assistant knows), moderate (needs explanation or reasoning) or "
+            "complex (needs live market data, news, specific stocks or multi-step analysis).",
+            query, max_tokens=4, temperature=0,
+        )
+        level = (reply or "").strip().lower().strip(".")
+        if level in LEVELS:
+            return level
+    except Exception as e:
+        print(f"⚠️ Router classification failed, using heuristics: {e}")
+    return classify(query)
+
+
+async def route(query):
+    """Complexity level of query according to MODEL_ROUTER."""
+    if MODEL_ROUTER == "heuristic":
+        return classify(query)
+    if MODEL_ROUTER == "llm":
+        return await classify_with_model(query)
+    return "complex"
+
+
+def model_for(route_name, level):
+    return ROUTES[route_name][level]
+
+
+def label_for(route_name, model):
+    """Name of a model for headers, metrics and cache keys; None is the route's own pipeline."""
+    return model or BASELINE_LABELS.get(route_name, "route")
+
+
+def validate(answer, finish_reason=None):
+    """Why an answer should go to a larger model, or None if it is fine."""
+    if not answer or len(answer.strip()) < ROUTER_MIN_ANSWER_CHARS:
+        return "too short"
+    if finish_reason == "length":
+        return "truncated"
+    if UNSURE.search(answer):
+        return "unsure"
+    return None
+
+
+def record(route_name, level, model, seconds, tokens, escalations=0):
+    """Count an answered query and update the savings against the route's baseline model."""
+    label = label_for(route_name, model)
+    route_requests.inc(route=route_name, level=level, model=label)
+    if escalations:
+        route_escalations.inc(escalations, route=route_name)
+    with _lock:
+        stats = _stats.setdefault(route_name, {
+            "requests": 0, "escalations": 0, "levels": {}, "baseline": {"requests": 0, "seconds": 0.0, "tokens": 0},
+            "routed": {"requests": 0, "seconds": 0.0, "tokens": 0},
+        })
+        stats["requests"] += 1
+        stats["escalations"] += escalations
+        stats["levels"][level] = stats["levels"].get(level, 0) + 1
+        # Answers from the baseline model set the yardstick, whatever level
+        # they were routed at; answers from the other models are what routing bought
+        bucket = stats["baseline"] if model == ROUTES[route_name]["complex"] else stats["routed"]
+        bucket["requests"] += 1
+        bucket["seconds"] += seconds
+        bucket["tokens"] += tokens
+
+
+def savings(stats):
+    """Seconds and tokens the routed answers saved, assuming the baseline model's average cost."""
+    baseline, routed = stats["baseline"], stats["routed"]
+    if not baseline["requests"] or not routed["requests"]:
+        return {"saved_seconds": 0.0, "saved_tokens": 0, "baseline_requests": baseline["requests"]}
+    mean_seconds = baseline["seconds"] / baseline["requests"]
+    mean_tokens = baseline["tokens"] / baseline["requests"]
+    return {
+        "saved_seconds": round(mean_seconds * routed["requests"] - routed["seconds"], 3),
+        "saved_tokens": round(mean_tokens * routed["requests"] - routed["tokens"]),
+        "baseline_requests": baseline["requests"],
+        "baseline_mean_ms": round(mean_seconds * 1000, 1),
+        "routed_mean_ms": round(routed["seconds"] / routed["requests"] * 1000, 1),
+    }
+
+
+async def answer(route_name, query, level, fallback=None, system_prompt=DIRECT_SYSTEM_PROMPT):
+    """Answer query starting at level, escalating on failed validation.
+
+    fallback is awaited for the levels the route answers with its own
+    pipeline. Returns (answer, {"level", "model", "escalations"}).
+    """
+    start = time.perf_counter()
+    usage = rateLimiter.track_usage()
+    escalations = 0
+    # Levels answered by the same model as a lower one are skipped, so an
+    # escalation always reaches a different model
+    levels = []
+    for candidate in LEVELS[LEVELS.index(level):]:
+        if all(model_for(route_name, candidate) != model_for(route_name, kept) for kept in levels):
+            levels.append(candidate)
+    for i, current in enumerate(levels):
+        model = model_for(route_name, current)
+        if model is None:
+            text = await fallback()
+            break
+        text, finish_reason = await complete(route_name, model, system_prompt, query)
+        problem = validate(text, finish_reason) if ROUTER_CASCADE and i < len(levels) - 1 else None
+        if problem is None:
+            break
+        print(f"⚠️ {route_name} answer from {model} was {problem}, escalating")
+        escalations += 1
+    record(route_name, current, model, time.perf_counter() - start, usage["tokens"], escalations)
+    return text, {"level": current, "model": label_for(route_name, model), "escalations": escalations}
+
+
+def stats():
+    """Requests per level, escalations and savings per route, for /health."""
+    with _lock:
+        return {
+            name: {
+                "requests": s["requests"], "levels": dict(s["levels"]), "escalations": s["escalations"], **savings(s),
+            }
+            for name, s in _stats.items()
+        }
+
+
+@metrics.register_collector
+def collect_router_stats():
+    for name, s in stats().items():
+        route_saved_seconds.set(s["saved_seconds"], route=name)
+        route_saved_tokens.set(s["saved_tokens"], route=name)
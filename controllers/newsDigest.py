@@ -0,0 +1,122 @@
+import os
+import time
+import sqlite3
+import threading
+from dotenv import load_dotenv
+from controllers.stockNews import afetch_news, NEWS_PROMPT
+from controllers.cache import SingleFlight
+from controllers.executor import run_blocking
+from controllers import rateLimiter
+from controllers.responses import content_etag
+
+load_dotenv()
+
+# How often the digest is rebuilt, where versions are stored and how many are kept
+NEWS_REFRESH_SECONDS = float(os.getenv("NEWS_REFRESH_SECONDS", "900"))
+NEWS_STORE_PATH = os.getenv("NEWS_STORE_PATH", "data/news.sqlite3")
+NEWS_KEEP_VERSIONS = int(os.getenv("NEWS_KEEP_VERSIONS", "96"))
+# Executor route of the store's SQLite calls, which can wait on other workers' writes
+STORE_ROUTE = "news_store"
+
+news_flight = SingleFlight("news")
+
+
+def digest_etag(answer):
+    """Strong ETag derived from the digest content."""
+    return content_etag(answer.encode("utf-8"))
+
+
+class DigestStore:
+    """Versions of the news digest with their creation time, in SQLite."""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS digests (version INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "question TEXT NOT NULL, answer TEXT NOT NULL, etag TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+
+    @staticmethod
+    def _row(row):
+        if row is None:
+            return None
+        version, question, answer, etag, created_at = row
+        return {"version": version, "question": question, "answer": answer, "etag": etag, "created_at": created_at}
+
+    def latest(self):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, question, answer, etag, created_at FROM digests ORDER BY version DESC LIMIT 1"
+            ).fetchone()
+        return self._row(row)
+
+    def save(self, question, answer):
+        """Store a new version and drop the oldest beyond NEWS_KEEP_VERSIONS."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO digests (question, answer, etag, created_at) VALUES (?, ?, ?, ?)",
+                (question, answer, digest_etag(answer), time.time()),
+            )
+            self._conn.execute(
+                "DELETE FROM digests WHERE version <= ?", (cursor.lastrowid - NEWS_KEEP_VERSIONS,)
+            )
+            row = self._conn.execute(
+                "SELECT version, question, answer, etag, created_at FROM digests WHERE version = ?", (cursor.lastrowid,)
+            ).fetchone()
+        return self._row(row)
+
+    def versions(self):
+        """Metadata of the stored versions, newest first."""
+        with self._lock:
+            rows = self._conn.execute("SELECT version, etag, created_at FROM digests ORDER BY version DESC").fetchall()
+        return [{"version": version, "etag": etag, "created_at": created_at} for version, etag, created_at in rows]
+
+
+store = DigestStore(NEWS_STORE_PATH)
+
+
+async def latest_digest():
+    """Latest stored digest, or None."""
+    return await run_blocking(STORE_ROUTE, store.latest)
+
+
+async def digest_versions():
+    """Metadata of the stored digest versions, newest first."""
+    return await run_blocking(STORE_ROUTE, store.versions)
+
+
+async def save_digest(answer):
+    """Store answer as the latest digest unless it is unchanged; return the latest version."""
+    latest = await latest_digest()
+    if latest is not None and latest["etag"] == digest_etag(answer):
+        return latest
+    digest = await run_blocking(STORE_ROUTE, store.save, NEWS_PROMPT, answer)
+    print(f"✅ News digest version {digest['version']} stored")
+    return digest
+
+
+async def build_digest():
+    result = await afetch_news()
+    if not result["answer"]:
+        raise RuntimeError("News agent returned an empty digest")
+    return await save_digest(result["answer"])
+
+
+async def refresh_digest():
+    """Rebuild the digest; scheduled every NEWS_REFRESH_SECONDS behind interactive LLM calls.
+
+    A digest younger than the interval, e.g. one stored before a restart, is kept.
+    """
+    latest = await latest_digest()
+    if latest is not None and time.time() - latest["created_at"] < NEWS_REFRESH_SECONDS:
+        return latest
+    return await rateLimiter.as_background(news_flight.do("digest", build_digest))
+
+
+async def get_digest():
+    """Latest digest, building the first one if none is stored yet."""
+    return await latest_digest() or await news_flight.do("digest", build_digest)
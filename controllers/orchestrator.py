@@ -0,0 +1,162 @@
+import os
+import time
+import asyncio
+from dotenv import load_dotenv
+from controllers.registry import aget_agent
+from controllers.executor import run_agent
+from controllers.stockAgent import extract_json_from_response
+from controllers.streaming import sse, stream_agent
+from controllers import resilience
+
+load_dotenv()
+
+# How /agent answers: "team" lets the multi_agent coordinator delegate to its
+# members one after another, "parallel" plans once, runs the members
+# concurrently and synthesizes from whatever finished within the timeout
+AGENT_MODE = os.getenv("AGENT_MODE", "team")
+MEMBER_TIMEOUT_SECONDS = float(os.getenv("MEMBER_TIMEOUT_SECONDS", "60"))
+MEMBERS = ["web_search_agent", "financial_agent"]
+
+
+class Trace:
+    """Start and end of each step of one fan-out, relative to its start.
+
+    progress, if given, is called with ("step", span) as each step ends.
+    """
+
+    def __init__(self, progress=None):
+        self.start = time.perf_counter()
+        self.spans = []
+        self.progress = progress
+
+    async def span(self, name, coro):
+        """Await coro as the step name, recording its timing and outcome."""
+        begin = time.perf_counter()
+        status = "ok"
+        try:
+            return await coro
+        except asyncio.TimeoutError:
+            status = "timeout"
+            raise
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            span = {
+                "name": name,
+                "start_ms": round((begin - self.start) * 1000, 1),
+                "end_ms": round((time.perf_counter() - self.start) * 1000, 1),
+                "status": status,
+            }
+            self.spans.append(span)
+            if self.progress is not None:
+                self.progress("step", span)
+
+    def summary(self):
+        """Spans plus how much member work overlapped: member time summed vs wall-clock."""
+        members = [span for span in self.spans if span["name"] in MEMBERS]
+        work = sum(span["end_ms"] - span["start_ms"] for span in members)
+        wall = max((span["end_ms"] for span in members), default=0) - min((span["start_ms"] for span in members), default=0)
+        return {
+            "total_ms": round((time.perf_counter() - self.start) * 1000, 1),
+            "spans": sorted(self.spans, key=lambda span: span["start_ms"]),
+            "members_work_ms": round(work, 1),
+            "members_wall_ms": round(wall, 1),
+            "overlap": round(work / wall, 2) if wall else 0.0,
+        }
+
+
+async def plan(query, trace):
+    """{member: task} for the members the query needs; every member gets the query if planning fails."""
+    members = {name: (await aget_agent(name)).role for name in MEMBERS}
+    prompt = (
+        f"Question: {query}\n\nTeam members:\n"
+        + "\n".join(f"- {name}: {role}" for name, role in members.items())
+        + '\n\nReply with a JSON object {"tasks": {"<member>": "<task>"}} giving each member that is needed '
+        "a self-contained sub-task. Leave out members that are not needed."
+    )
+    try:
+        response = await trace.span("plan", resilience.call("groq", run_agent, "agent", await aget_agent("planner_agent"), prompt, retry=False))
+        tasks = (extract_json_from_response(response.content) or {}).get("tasks")
+        tasks = {name: task for name, task in tasks.items() if name in members and isinstance(task, str) and task.strip()}
+    except Exception as e:
+        print(f"⚠️ Planning failed, sending the question to every member: {e}")
+        tasks = None
+    return tasks or {name: query for name in members}
+
+
+async def run_member(name, task, trace):
+    agent = await aget_agent(name)
+    response = await trace.span(name, asyncio.wait_for(
+        resilience.call("groq", run_agent, "agent", agent, task, retry=False), MEMBER_TIMEOUT_SECONDS
+    ))
+    return response.content
+
+
+async def prepare(query, progress=None):
+    """Plan, run the members concurrently and return (synthesis prompt, trace).
+
+    progress, if given, is called with ("plan", tasks) and with every finished step.
+    """
+    trace = Trace(progress)
+    tasks = await plan(query, trace)
+    if progress is not None:
+        progress("plan", {"tasks": tasks})
+    results = await asyncio.gather(*(run_member(name, task, trace) for name, task in tasks.items()), return_exceptions=True)
+
+    sections = []
+    for (name, task), result in zip(tasks.items(), results):
+        if isinstance(result, asyncio.TimeoutError):
+            result = f"(no result: timed out after {MEMBER_TIMEOUT_SECONDS:.0f}s)"
+        elif isinstance(result, Exception):
+            result = f"(no result: {result})"
+        sections.append(f"## {name}\nTask: {task}\n\n{result or '(empty result)'}")
+    summary = trace.summary()
+    print(f"⏱️ Fan-out ran {summary['members_work_ms']:.0f}ms of member work in {summary['members_wall_ms']:.0f}ms")
+    return f"Question: {query}\n\nFindings of the team members:\n\n" + "\n\n".join(sections), trace
+
+
+async def run_parallel(query):
+    """Answer query with a parallel fan-out; returns (answer, trace)."""
+    prompt, trace = await prepare(query)
+    response = await trace.span("synthesize", resilience.call("groq", run_agent, "agent", await aget_agent("synthesis_agent"), prompt, retry=False))
+    return response.content, trace
+
+
+async def stream_parallel(query, request, on_complete=None):
+    """Stream a parallel fan-out as SSE: plan and step events while the members
+    run, then the synthesis as stream_agent events.
+
+    The members are cancelled as soon as the client disconnects.
+    """
+    events = asyncio.Queue()
+    fan_out = asyncio.create_task(prepare(query, lambda event, data: events.put_nowait((event, data))))
+    fan_out.add_done_callback(lambda _: events.put_nowait(None))
+    try:
+        while (event := await events.get()) is not None:
+            if await request.is_disconnected():
+                print("⚠️ agent client disconnected, cancelling fan-out")
+                return
+            yield sse(*event)
+        try:
+            prompt, _ = fan_out.result()
+        except Exception as e:
+            yield sse("error", {"error": str(e)})
+            return
+        async for chunk in stream_agent("agent", await aget_agent("synthesis_agent"), prompt, request, on_complete=on_complete):
+            yield chunk
+    finally:
+        fan_out.cancel()
+
+
+def render(summary, width=60):
+    """Text timeline of a trace summary, one bar per step."""
+    total = max(summary["total_ms"], 1)
+    lines = []
+    for span in summary["spans"]:
+        begin = int(span["start_ms"] / total * width)
+        end = max(begin + 1, int(span["end_ms"] / total * width))
+        bar = " " * begin + "█" * (end - begin)
+        lines.append(f"{span['name']:<18}{bar:<{width}} {span['end_ms'] - span['start_ms']:>7.0f}ms {span['status']}")
+    lines.append(f"members: {summary['members_work_ms']:.0f}ms of work in {summary['members_wall_ms']:.0f}ms (overlap {summary['overlap']}x)")
+    return "\n".join(lines)
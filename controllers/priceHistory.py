@@ -0,0 +1,237 @@
+import os
+import time
+import datetime
+import threading
+from contextlib import contextmanager
+import numpy as np
+from dotenv import load_dotenv
+from controllers.cache import SingleFlight
+from controllers.executor import run_blocking
+from controllers.httpClients import yahoo_session
+from controllers import resilience
+
+try:
+    import fcntl
+except ImportError:
+    # No inter-process lock (Windows); only run a single worker there
+    fcntl = None
+
+load_dotenv()
+
+# Root of the bar store, and how long after a check for new bars another one may run
+HISTORY_DIR = os.getenv("HISTORY_DIR", "data/history")
+HISTORY_RECHECK_SECONDS = float(os.getenv("HISTORY_RECHECK_SECONDS", "900"))
+
+# Supported bar intervals: bar length in seconds and how far back Yahoo serves them
+INTERVALS = {
+    "1d": (86400, os.getenv("HISTORY_DAILY_PERIOD", "max")),
+    "1h": (3600, "730d"),
+    "30m": (1800, "60d"),
+    "15m": (900, "60d"),
+    "5m": (300, "60d"),
+    "1m": (60, "7d"),
+}
+
+# One file per column; timestamps are int64 UTC epoch seconds, the rest float64
+COLUMNS = ("open", "high", "low", "close", "volume")
+
+history_flight = SingleFlight("history")
+
+
+class BarSeries:
+    """Append-only columnar bars of one symbol and interval, read through memory maps.
+
+    Every column is a raw little-endian array in its own file. Appends write
+    the value columns first and the timestamps last, so the length of the
+    timestamp file is the number of complete rows; anything a crashed append
+    left beyond it is truncated on the next append. Appends hold a lock file
+    as well, since every worker process writes to the same files.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._maps = None
+        self._rows = -1
+
+    def _path(self, column):
+        return os.path.join(self.directory, f"{column}.bin")
+
+    def rows(self):
+        try:
+            return os.path.getsize(self._path("timestamp")) // 8
+        except FileNotFoundError:
+            return 0
+
+    def columns(self):
+        """Memory-mapped views of all columns; remapped only when rows were appended."""
+        rows = self.rows()
+        maps = self._maps
+        if maps is None or self._rows != rows:
+            maps = {"timestamp": self._map("timestamp", "<i8", rows)}
+            maps.update({column: self._map(column, "<f8", rows) for column in COLUMNS})
+            self._maps, self._rows = maps, rows
+        return maps
+
+    def _map(self, column, dtype, rows):
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._path(column), dtype=dtype, mode="r", shape=(rows,))
+
+    def last_timestamp(self):
+        timestamps = self.columns()["timestamp"]
+        return int(timestamps[-1]) if len(timestamps) else None
+
+    @contextmanager
+    def locked(self):
+        """Exclusive access to the series across threads and worker processes."""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.directory, ".lock"), "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def append(self, timestamps, values):
+        """Append bars newer than the last stored one; returns the number appended."""
+        with self.locked():
+            return self._append(timestamps, values)
+
+    def extend(self, fetch):
+        """Append the bars fetch(last stored timestamp) returns, holding the lock from reading the tail to writing.
+
+        Another worker that fetched the same bars meanwhile waits, then only
+        appends what is still newer than the tail it finds.
+        """
+        with self.locked():
+            timestamps, values = fetch(self.last_timestamp())
+            return self._append(timestamps, values)
+
+    def _append(self, timestamps, values):
+        rows = self.rows()
+        last = self.last_timestamp()
+        # Sorted, without duplicates and strictly after the stored tail, so the
+        # timestamps stay increasing for searchsorted
+        timestamps, order = np.unique(np.asarray(timestamps, dtype="<i8"), return_index=True)
+        if last is not None:
+            newer = timestamps > last
+            timestamps, order = timestamps[newer], order[newer]
+        if not len(timestamps):
+            return 0
+        for column in COLUMNS:
+            with open(self._path(column), "ab") as f:
+                f.truncate(rows * 8)
+                f.write(np.ascontiguousarray(np.asarray(values[column])[order], dtype="<f8").tobytes())
+        with open(self._path("timestamp"), "ab") as f:
+            f.write(np.ascontiguousarray(timestamps, dtype="<i8").tobytes())
+        return len(timestamps)
+
+    def slice(self, start=None, end=None):
+        """Zero-copy views of the bars with start <= timestamp < end."""
+        maps = self.columns()
+        timestamps = maps["timestamp"]
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side="left"))
+        return {column: array[lo:hi] for column, array in maps.items()}
+
+
+_series = {}
+_series_lock = threading.Lock()
+_last_checked = {}
+
+
+def get_series(symbol, interval):
+    key = (symbol.upper(), interval)
+    with _series_lock:
+        if key not in _series:
+            _series[key] = BarSeries(os.path.join(HISTORY_DIR, interval, symbol.upper()))
+        return _series[key]
+
+
+def download_bars(symbol, interval, since=None):
+    """Complete bars of symbol from Yahoo, newer than since when given."""
+    import yfinance as yf
+
+    bar_seconds, period = INTERVALS[interval]
+    ticker = yf.Ticker(symbol, session=yahoo_session())
+    if since is None:
+        frame = ticker.history(period=period, interval=interval, auto_adjust=False)
+    else:
+        start = datetime.datetime.fromtimestamp(since + 1, datetime.timezone.utc)
+        frame = ticker.history(start=start, interval=interval, auto_adjust=False)
+    if frame is None or frame.empty:
+        return np.empty(0, dtype="<i8"), {column: np.empty(0) for column in COLUMNS}
+
+    index = frame.index
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    timestamps = index.to_numpy("datetime64[s]").astype("int64")
+    values = {column: frame[column.capitalize()].to_numpy(dtype=float) for column in COLUMNS}
+    # Skip rows without prices and the bar still in progress, which would be frozen half-built
+    complete = ~np.isnan(values["close"]) & (timestamps + bar_seconds <= time.time())
+    return timestamps[complete], {column: array[complete] for column, array in values.items()}
+
+
+def update_series(symbol, interval):
+    """Append the bars published since the last stored one; returns the number appended."""
+    series = get_series(symbol, interval)
+    appended = series.extend(lambda since: download_bars(symbol, interval, since))
+    _last_checked[(symbol.upper(), interval)] = time.time()
+    if appended:
+        print(f"✅ Stored {appended} {interval} bars for {symbol.upper()}")
+    return appended
+
+
+def needs_update(series, symbol, interval, end=None):
+    """True if bars newer than the stored ones may be needed and may exist."""
+    last = series.last_timestamp()
+    if last is None:
+        return True
+    bar_seconds = INTERVALS[interval][0]
+    if end is not None and end <= last + bar_seconds:
+        return False
+    checked = _last_checked.get((symbol.upper(), interval), 0)
+    return last + 2 * bar_seconds <= time.time() and time.time() - checked >= HISTORY_RECHECK_SECONDS
+
+
+async def get_history(symbol, interval="1d", start=None, end=None):
+    """Bars of symbol between start and end (epoch seconds) as zero-copy column views.
+
+    Only bars newer than the stored ones are fetched, and ranges that end
+    before the last stored bar never touch the network. If Yahoo is
+    unavailable the stored bars are served as they are.
+    """
+    series = get_series(symbol, interval)
+    if needs_update(series, symbol, interval, end):
+        key = f"{symbol.upper()}:{interval}"
+        try:
+            await history_flight.do(key, resilience.call, "yahoo", run_blocking, "stock", update_series, symbol, interval)
+        except Exception as e:
+            if series.last_timestamp() is None:
+                raise
+            print(f"⚠️ Serving stored {interval} bars for {symbol.upper()}: {e}")
+    return series.slice(start, end)
+
+
+def load_history(symbol, interval="1d", start=None, end=None):
+    """Blocking get_history for code already running in a worker thread, such as agent tools.
+
+    Makes a single attempt and respects the Yahoo circuit breaker.
+    """
+    series = get_series(symbol, interval)
+    breaker = resilience.breakers["yahoo"]
+    if needs_update(series, symbol, interval, end) and breaker.allow():
+        try:
+            update_series(symbol, interval)
+            breaker.record_success()
+        except Exception as e:
+            breaker.record_failure()
+            if series.last_timestamp() is None:
+                raise
+            print(f"⚠️ Serving stored {interval} bars for {symbol.upper()}: {e}")
+    return series.slice(start, end)
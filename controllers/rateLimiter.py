@@ -0,0 +1,240 @@
+import os
+import time
+import asyncio
+import contextvars
+from collections import OrderedDict, deque
+from dotenv import load_dotenv
+from controllers import metrics
+
+load_dotenv()
+
+# Priority classes: lower values are served first
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# Requests and tokens per minute per model, as model:rpm:tpm pairs
+DEFAULT_MODEL_RATE_LIMITS = (
+    "llama-3.3-70b-versatile:30:6000,"
+    "deepseek-r1-distill-llama-70b:30:6000,"
+    "llama-3.1-8b-instant:30:6000,"
+    "gemini-2.0-flash:15:1000000"
+)
+MODEL_RATE_LIMITS = {
+    model: (float(rpm), float(tpm))
+    for model, rpm, tpm in (
+        item.rsplit(":", 2) for item in os.getenv("MODEL_RATE_LIMITS", DEFAULT_MODEL_RATE_LIMITS).replace(" ", "").split(",") if item
+    )
+}
+# Worker processes sharing those quotas; each keeps an equal share of every
+# budget. gunicorn.conf.py sets it to its worker count
+RATE_LIMIT_WORKERS = max(1, int(os.getenv("RATE_LIMIT_WORKERS") or "1"))
+# Completion tokens reserved per call until the real usage is known
+RATE_LIMIT_COMPLETION_ESTIMATE = int(os.getenv("RATE_LIMIT_COMPLETION_ESTIMATE", "1024"))
+
+_priority = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+_usage = contextvars.ContextVar("llm_usage", default=None)
+
+queue_wait = metrics.Histogram("llm_queue_wait_seconds", "Time LLM calls waited for rate limit capacity")
+queue_depth = metrics.Gauge("llm_queue_depth", "LLM calls waiting for rate limit capacity")
+tokens_available = metrics.Gauge("llm_rate_tokens_available", "Tokens left in each model's per-minute budget")
+
+
+class TokenBucket:
+    """Refills continuously at rate_per_minute up to one minute's worth."""
+
+    def __init__(self, rate_per_minute):
+        self.capacity = rate_per_minute
+        self.level = rate_per_minute
+        self.rate = rate_per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until amount is available; amounts above capacity wait for a full bucket."""
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount):
+        # Usage beyond the estimate may push the level below zero; later calls then wait it off
+        self.level = max(-self.capacity, self.level - amount)
+
+
+class ModelLimiter:
+    """Requests-per-minute and tokens-per-minute budget of one model.
+
+    Waiting calls are queued per priority class and, within a class, per
+    route; routes take turns so one busy route cannot starve the others.
+    """
+
+    def __init__(self, model, rpm, tpm):
+        self.model = model
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._queues = {priority: OrderedDict() for priority in PRIORITY_NAMES}
+        self._timer = None
+
+    def _wait_time(self, tokens):
+        self.requests.refill()
+        self.tokens.refill()
+        return max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+    def _take(self, tokens):
+        self.requests.take(1)
+        self.tokens.take(min(tokens, self.tokens.capacity))
+
+    def _next(self):
+        """Head waiter of the highest priority class, taking routes in turn."""
+        for priority, routes in self._queues.items():
+            while routes:
+                route, queue = next(iter(routes.items()))
+                while queue and queue[0][0].done():
+                    queue.popleft()  # cancelled while waiting
+                if queue:
+                    return routes, route, queue
+                del routes[route]
+        return None
+
+    def _pump(self):
+        """Grant waiting calls while capacity lasts, then sleep until the next one fits."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while (head := self._next()) is not None:
+            routes, route, queue = head
+            future, tokens = queue[0]
+            wait = self._wait_time(tokens)
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._pump)
+                return
+            queue.popleft()
+            routes.move_to_end(route)
+            self._take(tokens)
+            future.set_result(None)
+
+    def waiting(self):
+        return sum(len(queue) for routes in self._queues.values() for queue in routes.values())
+
+    async def acquire(self, route, tokens, priority):
+        start = time.perf_counter()
+        if not self.waiting() and self._wait_time(tokens) == 0:
+            self._take(tokens)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._queues[priority].setdefault(route, deque()).append((future, tokens))
+            self._pump()
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self.settle(tokens, 0, calls=0)
+                raise
+        queue_wait.observe(time.perf_counter() - start, model=self.model, priority=PRIORITY_NAMES[priority])
+
+    def settle(self, reserved, used, calls=1):
+        """Correct the reservation of one call once its real usage is known."""
+        self.requests.take(calls - 1)
+        self.tokens.take(used - reserved)
+        if self.waiting():
+            self._pump()
+
+    def depth(self):
+        return {
+            PRIORITY_NAMES[priority]: sum(len(queue) for queue in routes.values())
+            for priority, routes in self._queues.items()
+        }
+
+
+limiters = {
+    model: ModelLimiter(model, rpm / RATE_LIMIT_WORKERS, tpm / RATE_LIMIT_WORKERS)
+    for model, (rpm, tpm) in MODEL_RATE_LIMITS.items()
+}
+
+
+def estimate_tokens(*texts):
+    """Rough token count of a prompt (4 characters per token) plus the completion allowance."""
+    return sum(len(str(text)) for text in texts) // 4 + RATE_LIMIT_COMPLETION_ESTIMATE
+
+
+async def acquire(model_id, route, tokens):
+    """Wait until model_id's quota has room for one call of about tokens tokens.
+
+    Models without a configured limit pass straight through. The priority
+    comes from the calling context, see as_background.
+    """
+    limiter = limiters.get(model_id)
+    if limiter is not None:
+        await limiter.acquire(route, tokens, _priority.get())
+
+
+def settle(model_id, reserved, used, calls=1):
+    usage = _usage.get()
+    if usage is not None:
+        usage["tokens"] += used
+        usage["calls"] += calls
+    limiter = limiters.get(model_id)
+    if limiter is not None:
+        limiter.settle(reserved, used, calls)
+
+
+def _agent_usage(agent, usage):
+    model_id = agent.model.id if agent.model is not None else None
+    for run in getattr(agent.memory, "runs", None) or []:
+        for message in (run.response.messages if run.response is not None else None) or []:
+            if message.role == "assistant" and message.metrics is not None:
+                tokens, calls = usage.get(model_id, (0, 0))
+                used = (message.metrics.input_tokens or 0) + (message.metrics.output_tokens or 0)
+                usage[model_id] = (tokens + used, calls + 1)
+    for member in agent.team or []:
+        _agent_usage(member, usage)
+    return usage
+
+
+def settle_agent(agent, reserved):
+    """Settle an agent run, including the calls its team members made, against each model's quota."""
+    model_id = agent.model.id if agent.model is not None else None
+    usage = _agent_usage(agent, {})
+    tokens, calls = usage.pop(model_id, (reserved, 1))
+    settle(model_id, reserved, tokens, calls)
+    for other, (tokens, calls) in usage.items():
+        settle(other, 0, tokens, calls + 1)
+
+
+def track_usage():
+    """Add up the tokens of every call settled from the current context on; returns the running totals."""
+    usage = {"tokens": 0, "calls": 0}
+    _usage.set(usage)
+    return usage
+
+
+async def as_background(coro):
+    """Await coro with its LLM calls queued behind interactive ones."""
+    token = _priority.set(BACKGROUND)
+    try:
+        return await coro
+    finally:
+        _priority.reset(token)
+
+
+def stats():
+    return {
+        model: {
+            "queued": limiter.depth(),
+            "requests_available": round(limiter.requests.level, 2),
+            "tokens_available": round(limiter.tokens.level),
+        }
+        for model, limiter in limiters.items()
+    }
+
+
+@metrics.register_collector
+def collect_rate_limit_stats():
+    for model, limiter in limiters.items():
+        limiter.tokens.refill()
+        tokens_available.set(round(limiter.tokens.level), model=model)
+        for priority, depth in limiter.depth().items():
+            queue_depth.set(depth, model=model, priority=priority)
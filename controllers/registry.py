@@ -0,0 +1,63 @@
+import os
+import time
+import asyncio
+import threading
+from dotenv import load_dotenv
+from controllers.executor import run_blocking
+
+load_dotenv()
+
+# Build every registered agent in the background right after startup
+AGENT_WARMUP = os.getenv("AGENT_WARMUP", "1") == "1"
+
+_factories = {}
+_instances = {}
+_build_times = {}
+_lock = threading.RLock()
+
+
+def register(name, factory):
+    """Register a zero-argument factory that builds the agent called name."""
+    _factories[name] = factory
+
+
+def get_agent(name):
+    """Return the agent called name, building it (and its imports) on first use."""
+    agent = _instances.get(name)
+    if agent is None:
+        with _lock:
+            agent = _instances.get(name)
+            if agent is None:
+                start = time.perf_counter()
+                agent = _factories[name]()
+                _build_times[name] = time.perf_counter() - start
+                _instances[name] = agent
+                print(f"🤖 Built {name} in {_build_times[name] * 1000:.0f}ms")
+    return agent
+
+
+async def aget_agent(name):
+    """Like get_agent, but builds off the event loop when the agent is not built yet."""
+    agent = _instances.get(name)
+    if agent is None:
+        agent = await run_blocking("warmup", get_agent, name)
+    return agent
+
+
+async def warm_up():
+    """Build every registered agent off the event loop."""
+    for name in list(_factories):
+        try:
+            await run_blocking("warmup", get_agent, name)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Warm-up of {name} failed: {e}")
+
+
+def status():
+    """Which agents are built, and how long each build took."""
+    return {
+        name: {"built": name in _instances, "build_ms": round(_build_times[name] * 1000, 1) if name in _build_times else None}
+        for name in _factories
+    }
@@ -0,0 +1,163 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Per-upstream call policy: timeout in seconds and number of attempts
+UPSTREAMS = {
+    "yahoo": {
+        "timeout": float(os.getenv("YAHOO_TIMEOUT", "15")),
+        "attempts": int(os.getenv("YAHOO_ATTEMPTS", "3")),
+    },
+    "groq": {
+        "timeout": float(os.getenv("GROQ_TIMEOUT", "120")),
+        "attempts": int(os.getenv("GROQ_ATTEMPTS", "2")),
+    },
+    "gemini": {
+        "timeout": float(os.getenv("GEMINI_TIMEOUT", "120")),
+        "attempts": int(os.getenv("GEMINI_ATTEMPTS", "2")),
+    },
+}
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "8"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+# Fault injection for chaos testing, e.g. FAULT_INJECTION="yahoo:0.5,groq:0.1"
+# makes half of the Yahoo calls and a tenth of the Groq calls fail
+FAULT_INJECTION = {
+    upstream: float(rate)
+    for upstream, rate in (item.split(":") for item in os.getenv("FAULT_INJECTION", "").replace(" ", "").split(",") if item)
+}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+
+class InjectedFault(RuntimeError):
+    """Failure raised by fault injection."""
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets one trial call through after a cool-down."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURES, reset_timeout=BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_started = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a call may go to the upstream now."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_started = None
+            if self.state == self.CLOSED:
+                return True
+            # One trial at a time; a trial that never reported back (e.g. it
+            # was cancelled) is given up on after another reset_timeout
+            if self.state == self.HALF_OPEN and (
+                self._trial_started is None or now - self._trial_started >= self.reset_timeout
+            ):
+                self._trial_started = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"⚠️ Circuit for {self.name} opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._trial_started = None
+
+    def stats(self):
+        return {"state": self.state, "failures": self.failures}
+
+
+breakers = {name: CircuitBreaker(name) for name in UPSTREAMS}
+
+
+def is_retryable(error):
+    """Client errors (4xx other than 429) will not succeed on retry and do not trip the breaker."""
+    status = getattr(error, "status_code", None)
+    return not (isinstance(status, int) and 400 <= status < 500 and status != 429)
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff for the given zero-based attempt."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+async def call(upstream, fn, *args, fallback=None, retry=True, **kwargs):
+    """Await fn(*args, **kwargs) against upstream with timeout, retries and its circuit breaker.
+
+    retry=False makes a single attempt, for calls that are not safe or too
+    costly to repeat, such as agent runs whose tools may already have run.
+    If every attempt fails, or the breaker is open, fallback() (awaited if
+    it is a coroutine) is returned when it gives a value (e.g. the last
+    cached result); otherwise the error is raised.
+    """
+    policy = UPSTREAMS[upstream]
+    breaker = breakers[upstream]
+    attempts = policy["attempts"] if retry else 1
+    error = None
+    for attempt in range(attempts):
+        if not breaker.allow():
+            error = CircuitOpenError(f"{upstream} is unavailable (circuit open)")
+            break
+        try:
+            if random.random() < FAULT_INJECTION.get(upstream, 0.0):
+                raise InjectedFault(f"Injected {upstream} failure")
+            result = await asyncio.wait_for(fn(*args, **kwargs), policy["timeout"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                e = TimeoutError(f"{upstream} call timed out after {policy['timeout']}s")
+            error = e
+            if not is_retryable(e):
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if attempt < attempts - 1:
+                await asyncio.sleep(backoff_delay(attempt))
+            continue
+        breaker.record_success()
+        return result
+
+    if fallback is not None:
+        value = fallback()
+        if asyncio.iscoroutine(value):
+            value = await value
+        if value is not None:
+            print(f"⚠️ Serving last known value for {upstream}: {error}")
+            return value
+    raise error
+
+
+def breaker_stats():
+    return {name: breaker.stats() for name, breaker in breakers.items()}
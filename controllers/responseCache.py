@@ -0,0 +1,272 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from dotenv import load_dotenv
+from controllers.cache import TTLCache, caches, CACHE_ROUTE
+from controllers.executor import run_blocking
+
+load_dotenv()
+
+# Response cache for LLM endpoints
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite3")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "2048"))
+# Cosine similarity above which a near-duplicate question reuses an answer; 0 disables it
+LLM_CACHE_SIMILARITY = float(os.getenv("LLM_CACHE_SIMILARITY", "0"))
+
+_PUNCTUATION = re.compile(r"[^\w\s$%.]")
+_SPACES = re.compile(r"\s+")
+# Tickers ($nvda, NVDA) and numbers; near-duplicates must mention exactly the same ones
+_TICKERS = re.compile(r"\$[A-Za-z]{1,5}\b|\b[A-Z]{2,5}\b")
+_NUMBERS = re.compile(r"\d+(?:[.,]\d+)*")
+# Company names and the tickers they stand for; the tickers are also
+# recognised in lower case ("should i buy nvda")
+COMPANIES = {
+    "apple": "AAPL", "microsoft": "MSFT", "amazon": "AMZN", "google": "GOOGL", "alphabet": "GOOGL",
+    "tesla": "TSLA", "meta": "META", "facebook": "META", "nvidia": "NVDA", "amd": "AMD", "intel": "INTC",
+    "netflix": "NFLX", "broadcom": "AVGO", "oracle": "ORCL", "salesforce": "CRM", "adobe": "ADBE",
+    "qualcomm": "QCOM", "ibm": "IBM", "palantir": "PLTR", "berkshire": "BRK-B", "jpmorgan": "JPM",
+    "visa": "V", "mastercard": "MA", "walmart": "WMT", "costco": "COST", "disney": "DIS", "nike": "NKE",
+    "boeing": "BA", "exxon": "XOM", "chevron": "CVX", "pfizer": "PFE", "coca": "KO", "pepsi": "PEP",
+}
+KNOWN_TICKERS = {ticker for ticker in COMPANIES.values() if len(ticker) > 2}
+# Words two near-duplicate questions may differ in; any other differing word
+# (a company, a sector, a time frame) makes them different questions
+STOPWORDS = frozenset(
+    "a an the is are was were be been do does did i im me my we our you your it its this that these those "
+    "of for to in on at by with and or as s should would could can will what whats which who how about "
+    "please tell give stock stocks share shares good right now think".split()
+)
+
+
+def normalize_query(query):
+    """Lower-case a query and drop punctuation and repeated whitespace."""
+    query = _PUNCTUATION.sub(" ", query.lower())
+    return _SPACES.sub(" ", query).strip(" .")
+
+
+def ticker_of(word):
+    """Ticker a normalized word names ("nvidia", "nvda", "$nvda"), or None."""
+    word = word.lstrip("$")
+    if word in COMPANIES:
+        return COMPANIES[word]
+    return word.upper() if word.upper() in KNOWN_TICKERS else None
+
+
+def entities(query):
+    """Tickers and numbers of a query, which trigram similarity cannot tell apart."""
+    tickers = {match.lstrip("$").upper() for match in _TICKERS.findall(query)}
+    tickers.update(filter(None, map(ticker_of, normalize_query(query).split())))
+    numbers = frozenset(match.replace(",", "") for match in _NUMBERS.findall(query))
+    return frozenset(tickers), numbers
+
+
+def content_words(query):
+    """Words of a normalized query that are not STOPWORDS, with companies as their ticker."""
+    return frozenset(ticker_of(word) or word.lstrip("$") for word in normalize_query(query).split()) - STOPWORDS
+
+
+def cache_key(query, model, system_prompt):
+    """Stable key for a query answered by model under system_prompt."""
+    raw = "\x1f".join((model, system_prompt or "", normalize_query(query)))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class MemoryBackend:
+    """Backend on top of TTLCache; shared between workers when a shared cache tier is configured."""
+
+    def __init__(self, name, maxsize, ttl):
+        self._cache = TTLCache(name, maxsize=maxsize, ttl=ttl, shared=True)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        self._cache.set(key, value)
+
+    async def aget(self, key):
+        return await self._cache.aget(key)
+
+    async def aset(self, key, value):
+        await self._cache.aset(key, value)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+class SQLiteBackend:
+    """SQLite backend, so answers survive restarts."""
+
+    def __init__(self, path, maxsize, ttl):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + self.ttl, now),
+            )
+            self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+
+    async def aget(self, key):
+        return await run_blocking(CACHE_ROUTE, self.get, key)
+
+    async def aset(self, key, value):
+        await run_blocking(CACHE_ROUTE, self.set, key, value)
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def embed(text, dim=512):
+    """Cheap local embedding: hashed character trigrams, L2-normalised."""
+    text = f"  {normalize_query(text)}  "
+    vector = np.zeros(dim, dtype=np.float32)
+    for i in range(len(text) - 2):
+        vector[int.from_bytes(hashlib.blake2b(text[i:i + 3].encode(), digest_size=4).digest(), "little") % dim] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SimilarityIndex:
+    """Nearest-neighbour lookup of previously answered questions.
+
+    A neighbour only counts if it names the same tickers, company names and
+    numbers and differs in nothing but STOPWORDS, so "should I buy NVDA"
+    never reuses the answer to "should i buy amd" or "is nvidia a good buy".
+    """
+
+    def __init__(self, threshold, maxsize):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._vectors = []
+        self._entries = []
+        self._lock = threading.Lock()
+
+    def add(self, query, scope, key):
+        with self._lock:
+            self._vectors.append(embed(query))
+            self._entries.append((scope, entities(query), content_words(query), key))
+            if len(self._entries) > self.maxsize:
+                del self._vectors[0], self._entries[0]
+
+    def nearest(self, query, scope):
+        """Return the key of the most similar question in scope, if close enough."""
+        with self._lock:
+            if not self._vectors:
+                return None
+            scores = np.stack(self._vectors) @ embed(query)
+            entries = list(self._entries)
+        wanted, words = entities(query), content_words(query)
+        for index in np.argsort(scores)[::-1]:
+            if scores[index] < self.threshold:
+                return None
+            entry_scope, entry_entities, entry_words, key = entries[index]
+            if entry_scope == scope and entry_entities == wanted and entry_words == words:
+                return key
+        return None
+
+
+class ResponseCache:
+    """Exact (and optionally near-duplicate) cache of LLM answers."""
+
+    def __init__(self, name="llm_responses", backend=LLM_CACHE_BACKEND, maxsize=LLM_CACHE_SIZE,
+                 ttl=LLM_CACHE_TTL, similarity=LLM_CACHE_SIMILARITY, path=LLM_CACHE_PATH):
+        if backend == "sqlite":
+            self.backend = SQLiteBackend(path, maxsize, ttl)
+        else:
+            self.backend = MemoryBackend(name, maxsize, ttl)
+        self.index = SimilarityIndex(similarity, maxsize) if similarity > 0 else None
+        self.similar_hits = 0
+        caches[name] = self
+
+    def get(self, query, model, system_prompt=None):
+        """Return the cached answer for the query, or None."""
+        value = self.backend.get(cache_key(query, model, system_prompt))
+        if value is None and self.index is not None:
+            key = self.index.nearest(query, (model, system_prompt))
+            if key is not None:
+                value = self.backend.get(key)
+                if value is not None:
+                    self.similar_hits += 1
+        return value
+
+    def set(self, query, model, system_prompt, value):
+        key = cache_key(query, model, system_prompt)
+        self.backend.set(key, value)
+        if self.index is not None:
+            self.index.add(query, (model, system_prompt), key)
+
+    async def aget(self, query, model, system_prompt=None):
+        """get for async code; backend I/O runs off the event loop."""
+        value = await self.backend.aget(cache_key(query, model, system_prompt))
+        if value is None and self.index is not None:
+            key = self.index.nearest(query, (model, system_prompt))
+            if key is not None:
+                value = await self.backend.aget(key)
+                if value is not None:
+                    self.similar_hits += 1
+        return value
+
+    async def aset(self, query, model, system_prompt, value):
+        key = cache_key(query, model, system_prompt)
+        await self.backend.aset(key, value)
+        if self.index is not None:
+            self.index.add(query, (model, system_prompt), key)
+
+    def stats(self):
+        stats = self.backend.stats()
+        stats["similar_hits"] = self.similar_hits
+        return stats
+
+
+llm_cache = ResponseCache()
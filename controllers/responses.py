@@ -0,0 +1,205 @@
+import os
+import gzip
+import hashlib
+import orjson
+from dotenv import load_dotenv
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+load_dotenv()
+
+# Bodies at least this large are compressed when the client accepts it; br
+# (needs the brotli package) is preferred over gzip, at these levels
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Seconds shared caches (CDNs, proxies) may serve each GET route without
+# asking again, as route:seconds pairs; stale copies may be served as long
+# again while they revalidate. Routes not listed send no Cache-Control
+DEFAULT_CACHE_MAX_AGES = (
+    "/top-stocks:60,"
+    "/stock/{name}:15,"
+    "/stocks:15,"
+    "/stock/{name}/history:300,"
+    "/stock/{name}/indicators:60,"
+    "/indicators:60,"
+    "/stock-news:60,"
+    "/stock-analysis/{symbol}:300"
+)
+CACHE_MAX_AGES = {
+    route: int(seconds)
+    for route, seconds in (
+        item.rsplit(":", 1) for item in os.getenv("CACHE_MAX_AGES", DEFAULT_CACHE_MAX_AGES).replace(" ", "").split(",") if item
+    )
+}
+
+COMPRESSIBLE_TYPES = ("application/json", "text/html", "text/plain", "text/css", "application/javascript")
+# Longest list shown in the example response of a docs page
+EXAMPLE_LIST_ITEMS = 5
+
+_examples = {}
+
+
+def content_etag(data):
+    """Strong ETag derived from content bytes."""
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header value matches etag (weak comparison)."""
+    if not if_none_match:
+        return False
+    etag = etag[2:] if etag.startswith("W/") else etag
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+def cache_control(route_path):
+    """Cache-Control of a route template, or None."""
+    max_age = CACHE_MAX_AGES.get(route_path)
+    if max_age is None:
+        return None
+    return f"public, max-age={max_age}, stale-while-revalidate={max_age}"
+
+
+def json_response(request, content, status_code=200, headers=None):
+    """content serialized with orjson, skipping FastAPI's jsonable_encoder pass.
+
+    The content also becomes the example shown on its route's docs page.
+    """
+    route = request.scope.get("route")
+    if route is not None and status_code == 200:
+        _examples[route.path] = content
+    return ORJSONResponse(content, status_code=status_code, headers=headers)
+
+
+def _preview(value):
+    if isinstance(value, list):
+        return [_preview(item) for item in value[:EXAMPLE_LIST_ITEMS]]
+    if isinstance(value, dict):
+        return {key: _preview(item) for key, item in value.items()}
+    return value
+
+
+def example(route_path):
+    """Indented preview of the last JSON response of a route, for its docs page; None if there was none."""
+    content = _examples.get(route_path)
+    if content is None:
+        return None
+    return orjson.dumps(_preview(content), option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+def negotiate(accept_encoding):
+    """br, gzip or None: the best encoding the client accepts."""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name] = quality
+    wildcard = accepted.get("*", 0.0)
+    for encoding in ("br", "gzip") if brotli is not None else ("gzip",):
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _add_vary(headers, value):
+    vary = [v.strip() for v in headers.get("vary", "").split(",") if v.strip()]
+    if value.lower() not in (v.lower() for v in vary):
+        headers["vary"] = ", ".join(vary + [value])
+
+
+class ResponsePipeline:
+    """ASGI middleware finishing every complete (non-streamed) response.
+
+    GET responses of routes in CACHE_MAX_AGES get their Cache-Control, 200
+    responses a content-hash ETag unless they set one, with a bodiless 304
+    when If-None-Match matches, and bodies of at least COMPRESS_MIN_BYTES
+    are compressed with the best encoding the client accepts. Streamed
+    responses such as SSE pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = None
+
+        async def finish(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] == "http.response.body" and start is not None:
+                held, start = start, None
+                if message.get("more_body", False):
+                    await send(held)
+                    await send(message)
+                    return
+                await self.send_complete(scope, held, message.get("body", b""), send)
+                return
+            await send(message)
+
+        await self.app(scope, receive, finish)
+
+    async def send_complete(self, scope, start, body, send):
+        request_headers = Headers(scope=scope)
+        headers = MutableHeaders(raw=list(start["headers"]))
+        status = start["status"]
+        media_type = headers.get("content-type", "").split(";")[0].strip()
+        compressible = media_type in COMPRESSIBLE_TYPES and "content-encoding" not in headers
+        encoding = negotiate(request_headers.get("accept-encoding", "")) if compressible and len(body) >= COMPRESS_MIN_BYTES else None
+        if compressible:
+            # Set before the 304 below, which must repeat the Vary of the 200 it stands for
+            _add_vary(headers, "Accept-Encoding")
+
+        if scope["method"] in ("GET", "HEAD") and status == 200 and body:
+            route = scope.get("route")
+            policy = cache_control(route.path) if route is not None else None
+            if policy and "cache-control" not in headers:
+                headers["cache-control"] = policy
+                # The same URL serves the JSON or the docs page depending on Accept
+                _add_vary(headers, "Accept")
+            if "etag" not in headers:
+                headers["etag"] = content_etag(body)
+            # The bytes differ per encoding, so the content ETag can only be weak
+            if encoding is not None and not headers["etag"].startswith("W/"):
+                headers["etag"] = "W/" + headers["etag"]
+            if etag_matches(request_headers.get("if-none-match"), headers["etag"]):
+                for name in ("content-length", "content-type", "content-encoding"):
+                    if name in headers:
+                        del headers[name]
+                await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        if encoding is not None:
+            body = compress(body, encoding)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(body))
+            if "etag" in headers and not headers["etag"].startswith("W/"):
+                headers["etag"] = "W/" + headers["etag"]
+
+        await send({"type": "http.response.start", "status": status, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,57 @@
+import asyncio
+from controllers import sharedCache
+from controllers.executor import run_blocking
+
+# A leader-only task's lease lasts this many intervals, so a slow run keeps
+# it and another worker takes over soon after the leader dies
+LEASE_INTERVALS = 3
+
+_tasks = {}
+_background = set()
+
+
+def start_periodic(name, interval, fn, leader_only=False):
+    """Run the coroutine function fn every interval seconds until stopped.
+
+    Failures are logged and the loop carries on, so one bad refresh never
+    stops the schedule. With leader_only, fn only runs in the worker process
+    holding the task's lease in the shared cache tier, so work such as
+    upstream refreshes does not multiply with the number of workers.
+    """
+    async def loop():
+        while True:
+            try:
+                if not leader_only or await leads(name, interval):
+                    await fn()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Scheduled task {name} failed: {e}")
+            await asyncio.sleep(interval)
+
+    if name in _tasks and not _tasks[name].done():
+        return _tasks[name]
+    _tasks[name] = asyncio.create_task(loop(), name=name)
+    return _tasks[name]
+
+
+async def leads(name, interval):
+    """True if this worker runs the leader-only task name right now."""
+    return await run_blocking("cache", sharedCache.is_leader, f"scheduler:{name}", interval * LEASE_INTERVALS)
+
+
+def spawn(coro, name=None):
+    """Run a fire-and-forget coroutine, keeping a reference until it finishes."""
+    task = asyncio.create_task(coro, name=name)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return task
+
+
+async def stop_all():
+    """Cancel every scheduled task; called from the app lifespan."""
+    tasks = list(_tasks.values()) + list(_background)
+    _tasks.clear()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,172 @@
+import os
+import time
+import socket
+import sqlite3
+import threading
+import orjson
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Tier shared by every worker process behind the in-process caches: memory
+# (none, each process keeps its own), sqlite (a WAL file on local disk) or
+# redis (REDIS_URL, needs the redis package)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_PATH = os.getenv("CACHE_PATH", "data/cache.sqlite3")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_PREFIX = os.getenv("REDIS_PREFIX", "hack-agent:")
+# How long a process keeps its own copy of a shared entry before looking again
+SHARED_CACHE_LOCAL_TTL = float(os.getenv("SHARED_CACHE_LOCAL_TTL", "5"))
+
+
+class SQLiteTier:
+    """Shared entries in a SQLite file; WAL lets every worker read while one writes."""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._writes = 0
+
+    def get_many(self, keys):
+        """{key: (value, seconds left)} of the live entries among keys."""
+        now = time.time()
+        found = {}
+        with self._lock:
+            # Stay under SQLite's bound parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, value, expires_at FROM entries WHERE key IN ({','.join('?' * len(chunk))}) AND expires_at > ?",
+                    (*chunk, now),
+                ).fetchall()
+                found.update((key, (value, expires_at - now)) for key, value, expires_at in rows)
+        return found
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)", (key, value, time.time() + ttl)
+            )
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def acquire_lease(self, name, holder, ttl):
+        """Take or renew the lease name for ttl seconds; False while another holder's lease is live."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at "
+                "WHERE leases.holder = excluded.holder OR leases.expires_at <= ? RETURNING holder",
+                (name, holder, now + ttl, now),
+            ).fetchone()
+        return row is not None
+
+
+class RedisTier:
+    """Shared entries in Redis; client is anything with the redis-py get/mget/set/delete/pttl calls."""
+
+    def __init__(self, client, prefix=REDIS_PREFIX):
+        self.client = client
+        self.prefix = prefix
+
+    def get_many(self, keys):
+        names = [self.prefix + key for key in keys]
+        pipe = self.client.pipeline()
+        pipe.mget(names)
+        for name in names:
+            pipe.pttl(name)
+        values, *ttls = pipe.execute()
+        return {
+            key: (value, ttl / 1000 if ttl and ttl > 0 else SHARED_CACHE_LOCAL_TTL)
+            for key, value, ttl in zip(keys, values, ttls) if value is not None
+        }
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def acquire_lease(self, name, holder, ttl):
+        key = f"{self.prefix}lease:{name}"
+        ttl_ms = max(1, int(ttl * 1000))
+        if self.client.set(key, holder, nx=True, px=ttl_ms):
+            return True
+        current = self.client.get(key)
+        if isinstance(current, bytes):
+            current = current.decode()
+        if current == holder:
+            self.client.pexpire(key, ttl_ms)
+            return True
+        return False
+
+
+_tier = None
+_tier_lock = threading.Lock()
+
+
+def tier():
+    """The shared tier configured by CACHE_BACKEND, or None for per-process caches."""
+    global _tier
+    if _tier is None and CACHE_BACKEND != "memory":
+        with _tier_lock:
+            if _tier is None:
+                if CACHE_BACKEND == "sqlite":
+                    _tier = SQLiteTier(CACHE_PATH)
+                elif CACHE_BACKEND == "redis":
+                    import redis
+                    _tier = RedisTier(redis.Redis.from_url(REDIS_URL))
+                else:
+                    raise ValueError(f"Unknown CACHE_BACKEND {CACHE_BACKEND!r}")
+                print(f"✅ Shared cache tier: {CACHE_BACKEND}")
+    return _tier
+
+
+def is_leader(name, ttl):
+    """True if this process holds the lease name, taking it when it is free or has lapsed.
+
+    Leases let one worker run a job (e.g. a periodic refresh) for all of
+    them; the holder renews it on every call and another worker takes over
+    ttl seconds after it stops. Without a shared tier every process leads.
+    """
+    shared = tier()
+    if shared is None:
+        return True
+    try:
+        return shared.acquire_lease(name, f"{socket.gethostname()}:{os.getpid()}", ttl)
+    except Exception as e:
+        print(f"⚠️ Lease {name} check failed: {e}")
+        return False
+
+
+def use_tier(shared):
+    """Replace the shared tier, e.g. with RedisTier over a local stand-in client."""
+    global _tier
+    with _tier_lock:
+        _tier = shared
+
+
+def dumps(value):
+    """JSON bytes of a shared value; never pickle, which would let anyone who can write to the tier run code in every worker."""
+    return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS, default=str)
+
+
+def loads(data):
+    """Raises ValueError (orjson.JSONDecodeError) for data that is not JSON."""
+    return orjson.loads(data)
@@ -1,15 +1,37 @@
 from fastapi import FastAPI, Query, HTTPException
 from fastapi.responses import JSONResponse
-from agno.agent import Agent, RunResponse
-from agno.tools.yfinance import YFinanceTools
-from agno.models.google import Gemini
+from controllers.registry import register, get_agent
+from controllers.httpClients import gemini_model
+from functools import partial
+from typing import Annotated
+from pydantic import BaseModel, ConfigDict, Field, BeforeValidator, ValidationError, model_validator
+from pydantic_core import PydanticUseDefault
 import json
-import re
 import os
+import re
 import dotenv
 
 dotenv.load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# Ask Gemini for schema-constrained JSON. gemini-2.0-flash rejects that on
+# requests that also declare tools, so by default the schema is only put in
+# the prompt and the reply is validated against it
+ANALYSIS_STRUCTURED_OUTPUT = os.getenv("ANALYSIS_STRUCTURED_OUTPUT", "0") == "1"
+
+# YFinanceTools switched on per analyzer tool profile ("indicators" adds
+# IndicatorTools). core is what StockAnalysis is built from; full is every tool
+TOOL_PROFILES = {
+    "core": ("stock_price", "company_info", "stock_fundamentals", "key_financial_ratios"),
+    "full": ("stock_price", "company_info", "analyst_recommendations", "stock_fundamentals", "income_statements",
+             "historical_prices", "key_financial_ratios", "company_news", "indicators"),
+}
+# Tool profile of each endpoint running the analyzer, as endpoint:profile pairs; other callers get full
+ANALYSIS_TOOL_PROFILES = {
+    endpoint: profile
+    for endpoint, profile in (
+        item.split(":") for item in os.getenv("ANALYSIS_TOOL_PROFILES", "stock-analysis:core,prewarm:core,jobs:core").replace(" ", "").split(",") if item
+    )
+}
 
 app = FastAPI(
     title="Stock Analysis API",
@@ -53,57 +75,204 @@ detailed_instructions = [
     "All numeric values should be actual numbers, not strings."
 ]
 
-# Initialize the agent with YFinance tools
-stock_analyzer_agent = Agent(
-    model=Gemini(id="gemini-2.0-flash", api_key=GEMINI_API_KEY),
-    markdown=True,
-    tools=[YFinanceTools(
-        stock_price=True,
-        company_info=True,
-        analyst_recommendations=True,
-        stock_fundamentals=True, 
-        income_statements=True, 
-        historical_prices=True, 
-        key_financial_ratios=True,
-        company_news=True,
-        technical_indicators=True)],
-    instructions=detailed_instructions,
-)
+# The full profile sets response_model, which already hands the model the
+# StockAnalysis schema, so it keeps the rules around the example but not the example
+full_instructions = [
+    detailed_instructions[0],
+    "For each stock, you MUST format your response as a valid JSON object with the requested structure.",
+    *detailed_instructions[3:],
+]
+
+def _number(value):
+    # Lenient like the old per-field float() conversions: anything that does
+    # not convert falls back to the field default instead of failing the model
+    try:
+        return float(value.replace(",", "")) if isinstance(value, str) else float(value)
+    except (TypeError, ValueError):
+        raise PydanticUseDefault()
+
+def _whole_number(value):
+    try:
+        return int(_number(value))
+    except (OverflowError, ValueError):
+        raise PydanticUseDefault()
+
+# default_factory instead of default: the Gemini API rejects schemas with default values
+Number = Annotated[float, BeforeValidator(_number), Field(default_factory=float)]
+WholeNumber = Annotated[int, BeforeValidator(_whole_number), Field(default_factory=int)]
+
+class FinancialRatios(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    pe_ratio: Number
+    pb_ratio: Number
+    ev_ebitda: Number
+    roe: Number
+    roa: Number
+    operating_margin: Number
+    net_margin: Number
+
+class FinancialHealth(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    debt_to_equity: Number
+    current_ratio: Number
+    quick_ratio: Number
+    interest_coverage: Number
+
+class PerShareMetrics(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    eps: Number
+    book_value: Number
+    dividend_yield: Number
+    fifty_two_week_low: Number
+    fifty_two_week_high: Number
+
+class StockAnalysis(BaseModel):
+    """Financial data of a stock; mirrors create_default_stock_data."""
+    model_config = ConfigDict(extra="ignore")
+    symbol: str
+    company_name: str
+    current_price: Number
+    market_cap: WholeNumber
+    financial_ratios: FinancialRatios = Field(default_factory=FinancialRatios)
+    financial_health: FinancialHealth = Field(default_factory=FinancialHealth)
+    per_share_metrics: PerShareMetrics = Field(default_factory=PerShareMetrics)
+
+    @model_validator(mode="before")
+    @classmethod
+    def default_company_name(cls, data):
+        if isinstance(data, dict) and data.get("symbol") and not data.get("company_name"):
+            data = {**data, "company_name": f"{str(data['symbol']).upper()} Inc."}
+        return data
+
+STOCK_SECTIONS = ("financial_ratios", "financial_health", "per_share_metrics")
+
+def schema_outline(model):
+    """Field names and JSON types of a pydantic model, nested models included."""
+    outline = {}
+    for name, field in model.model_fields.items():
+        if isinstance(field.annotation, type) and issubclass(field.annotation, BaseModel):
+            outline[name] = schema_outline(field.annotation)
+        else:
+            outline[name] = {float: "number", int: "integer", str: "string"}.get(field.annotation, "any")
+    return outline
+
+def analyzer_instructions(tool_names):
+    """Short instructions for an analyzer limited to tool_names.
+
+    Without structured outputs the output structure is a one-line outline
+    instead of agno's indented schema prompt; with them Gemini gets the
+    schema as the response schema.
+    """
+    instructions = [
+        "You are a Wall Street analyst expert. Your task is to retrieve financial data about the requested stock.",
+        f"Call {', '.join(tool_names)} once each, then answer.",
+        "Percentages are plain numbers (22.5 for 22.5%); use 0 for values that are not available.",
+    ]
+    if not ANALYSIS_STRUCTURED_OUTPUT:
+        instructions.append(
+            "Reply with only this JSON object, numbers as numbers: "
+            + json.dumps(schema_outline(StockAnalysis), separators=(",", ":"))
+        )
+    return instructions
+
+def build_stock_analyzer_agent(profile="full"):
+    """Initialize the agent with the YFinance tools of a TOOL_PROFILES profile"""
+    from agno.agent import Agent
+    from agno.tools.yfinance import YFinanceTools
+    from controllers.indicatorTools import IndicatorTools
+    from controllers.toolCache import memoize
+
+    flags = TOOL_PROFILES[profile]
+    tools = [memoize(YFinanceTools(
+        stock_price="stock_price" in flags, **{flag: True for flag in flags if flag not in ("stock_price", "indicators")}
+    ))]
+    if "indicators" in flags:
+        tools.append(IndicatorTools())
+    full = profile == "full"
+    return Agent(
+        name=f"stock_analyzer_{profile}",
+        model=gemini_model("gemini-2.0-flash"),
+        markdown=full,
+        tools=tools,
+        instructions=full_instructions if full else analyzer_instructions(
+            [name for toolkit in tools for name in toolkit.functions]
+        ),
+        # The trimmed profiles describe the output themselves; parse_stock_analysis validates it either way
+        response_model=StockAnalysis if full or ANALYSIS_STRUCTURED_OUTPUT else None,
+        structured_outputs=ANALYSIS_STRUCTURED_OUTPUT,
+    )
+
+def analyzer_agent_name(endpoint):
+    """Registered analyzer agent with the tool profile of endpoint."""
+    return f"stock_analyzer_{ANALYSIS_TOOL_PROFILES.get(endpoint, 'full')}"
+
+def build_commentary_agent():
+    """Commentary-only agent used by the fast analysis path; the numbers come from yfinance"""
+    from agno.agent import Agent
+
+    return Agent(
+        model=gemini_model("gemini-2.0-flash"),
+        instructions=[
+            "You are a Wall Street analyst expert.",
+            "You receive a JSON object with a stock's price, valuation ratios, financial health and per-share metrics.",
+            "Write a short commentary (at most 4 sentences) on what these numbers say about the stock.",
+            "Only use the numbers given; a value of 0 means the metric is not available.",
+        ],
+    )
+
+for _profile in TOOL_PROFILES:
+    register(f"stock_analyzer_{_profile}", partial(build_stock_analyzer_agent, _profile))
+register("stock_analyzer_agent", partial(get_agent, "stock_analyzer_full"))
+register("commentary_agent", build_commentary_agent)
+
+def __getattr__(name):
+    # Keep `from controllers.stockAgent import stock_analyzer_agent` working; it builds on access
+    if name in ("stock_analyzer_agent", "commentary_agent"):
+        return get_agent(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+_decoder = json.JSONDecoder()
+# Braces that can start an object; other braces in prose are skipped without
+# a decode attempt, whose error alone costs a scan of the text up to it
+_OBJECT_START = re.compile(r'\{\s*["}]')
+
+def _decode_object(text, start):
+    """The JSON object starting at index start of text, or None."""
+    try:
+        value, _ = _decoder.raw_decode(text, start)
+    except (json.JSONDecodeError, RecursionError):
+        return None
+    return value if isinstance(value, dict) else None
 
 def extract_json_from_response(response_content):
-    """Extract JSON from response content, handling markdown code blocks."""
+    """Extract the JSON object from response content, preferring a ```json code block.
+
+    Without such a block, raw_decode is tried from each brace that can
+    start an object until one decodes, so braces in the prose before it do
+    not matter; raw_decode stops at the end of the object, so trailing prose
+    is never decoded.
+    """
     if not response_content:
         return None
-    
-    # If response is already a dict, return it
+    if isinstance(response_content, BaseModel):
+        return response_content.model_dump()
     if isinstance(response_content, dict):
         return response_content
-        
-    # If response is a string, try to extract JSON
-    if isinstance(response_content, str):
-        # Case 1: Check if content is wrapped in markdown code block
-        json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', response_content)
-        if json_match:
-            json_str = json_match.group(1)
-            try:
-                return json.loads(json_str)
-            except json.JSONDecodeError:
-                print(f"Failed to parse JSON from markdown code block")
-        
-        # Case 2: Check if the entire string is JSON
-        try:
-            return json.loads(response_content)
-        except json.JSONDecodeError:
-            pass
-            
-        # Case 3: Look for JSON object pattern in text
-        json_match = re.search(r'\{[\s\S]*\}', response_content)
-        if json_match:
-            try:
-                return json.loads(json_match.group(0))
-            except json.JSONDecodeError:
-                print(f"Failed to parse JSON from pattern match")
-                
+    if not isinstance(response_content, str):
+        return None
+
+    fence = response_content.find("```json")
+    if fence != -1:
+        start = response_content.find("{", fence)
+        end = response_content.find("```", fence + len("```json"))
+        if start != -1 and (end == -1 or start < end):
+            value = _decode_object(response_content, start)
+            if value is not None:
+                return value
+    for match in _OBJECT_START.finditer(response_content):
+        value = _decode_object(response_content, match.start())
+        if value is not None:
+            return value
     return None
 
 def create_default_stock_data(symbol):
@@ -138,37 +307,30 @@ def create_default_stock_data(symbol):
     }
 
 def merge_stock_data(default_data, api_data):
-    """Merge API data into default data structure, handling type conversions."""
+    """Merge API data into default data structure, handling type conversions.
+
+    Values that cannot be converted keep the default of their field.
+    """
     if not api_data:
         return default_data
-        
-    result = default_data.copy()
-    
-    # Update top-level fields
-    for field in ["symbol", "company_name"]:
-        if field in api_data:
-            result[field] = api_data[field]
-    
-    # Update numeric top-level fields with type conversion
-    for field in ["current_price", "market_cap"]:
-        if field in api_data:
-            try:
-                value = api_data[field]
-                if field == "current_price":
-                    result[field] = float(value)
-                elif field == "market_cap":
-                    result[field] = int(float(value)) if isinstance(value, (int, float, str)) else value
-            except (ValueError, TypeError):
-                print(f"Failed to convert {field} value: {api_data[field]}")
-    
-    # Update nested objects
-    for section in ["financial_ratios", "financial_health", "per_share_metrics"]:
-        if section in api_data and isinstance(api_data[section], dict):
-            for key in result[section].keys():
-                if key in api_data[section]:
-                    try:
-                        result[section][key] = float(api_data[section][key])
-                    except (ValueError, TypeError):
-                        print(f"Failed to convert {section}.{key} value: {api_data[section][key]}")
-    
-    return result
+
+    merged = dict(default_data)
+    for field in ("symbol", "company_name", "current_price", "market_cap"):
+        if api_data.get(field) is not None:
+            merged[field] = api_data[field]
+    for section in STOCK_SECTIONS:
+        if isinstance(api_data.get(section), dict):
+            merged[section] = {**default_data[section], **api_data[section]}
+    return StockAnalysis.model_validate(merged).model_dump()
+
+
+def parse_stock_analysis(symbol, content):
+    """Analysis of symbol from agent output: a StockAnalysis, a dict or text containing JSON; None if none is found."""
+    data = extract_json_from_response(content)
+    if not data:
+        return None
+    try:
+        return merge_stock_data(create_default_stock_data(symbol), data)
+    except ValidationError as e:
+        print(f"❌ Invalid analysis for {symbol}: {e}")
+        return None
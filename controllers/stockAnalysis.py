@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from dotenv import load_dotenv
+from controllers.stockAgent import parse_stock_analysis, analyzer_agent_name
+from controllers.executor import run_agent, run_blocking
+from controllers.registry import aget_agent
+from controllers.cache import SingleFlight
+from controllers.scheduler import spawn
+from controllers import resilience, rateLimiter
+
+load_dotenv()
+
+# An analysis younger than ANALYSIS_FRESH_SECONDS is served as is; up to
+# ANALYSIS_STALE_SECONDS it is served while a refresh runs in the background
+ANALYSIS_FRESH_SECONDS = float(os.getenv("ANALYSIS_FRESH_SECONDS", "21600"))
+ANALYSIS_STALE_SECONDS = float(os.getenv("ANALYSIS_STALE_SECONDS", "172800"))
+ANALYSIS_STORE_PATH = os.getenv("ANALYSIS_STORE_PATH", "data/analysis.sqlite3")
+ANALYSIS_PREWARM_MAX = int(os.getenv("ANALYSIS_PREWARM_MAX", "100"))
+# Executor route of the store's SQLite calls, which can wait on other workers' writes
+STORE_ROUTE = "analysis_store"
+
+analysis_flight = SingleFlight("analysis")
+
+
+class AnalysisParseError(ValueError):
+    """The analyzer's output could not be parsed into an analysis."""
+
+
+class AnalysisStore:
+    """Parsed, merged analyses persisted per symbol in SQLite."""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analyses (symbol TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def load(self, symbol):
+        """Return (analysis, updated_at) for symbol, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT data, updated_at FROM analyses WHERE symbol = ?", (symbol,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def save(self, symbol, data):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analyses (symbol, data, updated_at) VALUES (?, ?, ?)",
+                (symbol, json.dumps(data), time.time()),
+            )
+
+
+store = AnalysisStore(ANALYSIS_STORE_PATH)
+
+
+async def run_analysis(symbol, endpoint="stock-analysis"):
+    """Run the analyzer agent with endpoint's tool profile for symbol and persist the merged result.
+
+    Raises AnalysisParseError when the output holds no usable analysis.
+    """
+    prompt = f"Analyze the stock {symbol} and provide detailed financial information following the specified JSON format."
+    response = await resilience.call("gemini", run_agent, "analysis", await aget_agent(analyzer_agent_name(endpoint)), prompt, retry=False)
+
+    result = parse_stock_analysis(symbol, getattr(response, "content", None))
+    if result is None:
+        raise AnalysisParseError(f"Analysis output for {symbol} could not be parsed")
+    await run_blocking(STORE_ROUTE, store.save, symbol, result)
+    return result
+
+
+def refresh_analysis(symbol, endpoint="prewarm"):
+    """Refresh symbol in the background, joining a run already in flight.
+
+    Its LLM calls queue behind interactive requests.
+    """
+    return spawn(rateLimiter.as_background(analysis_flight.do(symbol, run_analysis, symbol, endpoint)), name=f"analysis-{symbol}")
+
+
+async def get_analysis(symbol, endpoint="stock-analysis"):
+    """Return (analysis, cache_status, age_seconds) for symbol.
+
+    Fresh entries are served directly, stale ones are served while a
+    refresh runs in the background, and missing or expired ones wait for a
+    run shared with any concurrent request for the same symbol. If that run
+    fails, an expired entry is still served rather than an error. endpoint
+    picks the analyzer's tool profile (ANALYSIS_TOOL_PROFILES).
+    """
+    symbol = symbol.upper()
+    entry = await run_blocking(STORE_ROUTE, store.load, symbol)
+    if entry is not None:
+        data, updated_at = entry
+        age = time.time() - updated_at
+        if age < ANALYSIS_FRESH_SECONDS:
+            return data, "HIT", age
+        if age < ANALYSIS_STALE_SECONDS:
+            refresh_analysis(symbol, endpoint)
+            return data, "STALE", age
+
+    try:
+        data = await analysis_flight.do(symbol, run_analysis, symbol, endpoint)
+    except Exception as e:
+        if entry is None:
+            raise
+        print(f"⚠️ Serving expired analysis for {symbol}: {e}")
+        return entry[0], "STALE", time.time() - entry[1]
+    return data, "MISS", 0.0
+
+
+async def commentary(data):
+    """Narrative commentary on an analysis computed without the LLM."""
+    response = await resilience.call("gemini", run_agent, "analysis", await aget_agent("commentary_agent"), json.dumps(data), retry=False)
+    return response.content
+
+
+async def prewarm(symbols):
+    """Queue background analyses for symbols that are not fresh; return the queued ones."""
+    queued = []
+    for symbol in dict.fromkeys(s.upper() for s in symbols):
+        entry = await run_blocking(STORE_ROUTE, store.load, symbol)
+        if entry is None or time.time() - entry[1] >= ANALYSIS_FRESH_SECONDS:
+            refresh_analysis(symbol)
+            queued.append(symbol)
+    return queued
@@ -0,0 +1,140 @@
+import json
+import asyncio
+import time
+from fastapi.responses import StreamingResponse
+from controllers.executor import limiter
+from controllers import metrics, rateLimiter, toolCache
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop nginx-style proxies from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse(event, data):
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def wants_stream(request, stream=False):
+    """True if the caller asked for a streamed response."""
+    return stream or "text/event-stream" in request.headers.get("accept", "")
+
+
+def event_stream(events):
+    """Wrap an SSE generator in a streaming response."""
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+class StreamTimer:
+    """Tracks time-to-first-token and total time of a streamed response."""
+
+    def __init__(self, route):
+        self.route = route
+        self.start = time.perf_counter()
+        self.first_token = None
+
+    def token(self):
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+
+    def summary(self):
+        end = time.perf_counter()
+        ttft = (self.first_token - self.start) * 1000 if self.first_token else None
+        print(f"⏱️ {self.route} stream: ttft={ttft and round(ttft)}ms total={round((end - self.start) * 1000)}ms")
+        return {"ttft_ms": ttft and round(ttft, 1), "total_ms": round((end - self.start) * 1000, 1)}
+
+
+async def replay(content):
+    """Stream an already known answer, e.g. a cache hit, as SSE."""
+    yield sse("token", {"content": content})
+    yield sse("done", {"ttft_ms": 0.0, "total_ms": 0.0, "cached": True})
+
+
+async def complete(on_complete, answer):
+    result = on_complete(answer)
+    if asyncio.iscoroutine(result):
+        await result
+
+
+async def stream_agent(route, agent, message, request, on_complete=None):
+    """Stream an agno agent run as SSE: token, tool and done events.
+
+    The upstream run is closed as soon as the client disconnects. When the
+    run finishes, on_complete is called (and awaited if async) with the full answer.
+    """
+    from agno.run.response import RunEvent
+
+    timer = StreamTimer(route)
+    reserved = rateLimiter.estimate_tokens(message)
+    await rateLimiter.acquire(agent.model.id if agent.model is not None else None, route, reserved)
+    async with limiter(route):
+        parts = []
+        stream = None
+        failed = True
+        agent = agent.deep_copy()
+        tool_cache = toolCache.start_run()
+        try:
+            stream = await agent.arun(message, stream=True, stream_intermediate_steps=True)
+            async for chunk in stream:
+                if await request.is_disconnected():
+                    print(f"⚠️ {route} client disconnected, cancelling run")
+                    break
+                if chunk.event == RunEvent.run_response.value and chunk.content:
+                    timer.token()
+                    parts.append(chunk.content)
+                    yield sse("token", {"content": chunk.content})
+                elif chunk.event in (RunEvent.tool_call_started.value, RunEvent.tool_call_completed.value):
+                    yield sse("tool", {"event": chunk.event, "content": chunk.content})
+            else:
+                if on_complete and parts:
+                    await complete(on_complete, "".join(parts))
+                yield sse("done", {**timer.summary(), "tool_cache_hits": tool_cache["hits"]})
+            failed = False
+        except Exception as e:
+            yield sse("error", {"error": str(e)})
+        finally:
+            if stream is not None:
+                await stream.aclose()
+            metrics.record_agent_run(agent, route, time.perf_counter() - timer.start, error=failed, tool_cache=tool_cache)
+            rateLimiter.settle_agent(agent, reserved)
+
+
+async def stream_chat(route, client, request, on_complete=None, **create_kwargs):
+    """Stream a Groq chat completion as SSE: token and done events."""
+    timer = StreamTimer(route)
+    prompt = [m["content"] for m in create_kwargs.get("messages", [])]
+    reserved = rateLimiter.estimate_tokens(*prompt)
+    await rateLimiter.acquire(create_kwargs.get("model"), route, reserved)
+    async with limiter(route):
+        parts = []
+        stream = None
+        usage = None
+        try:
+            stream = await client.chat.completions.create(stream=True, **create_kwargs)
+            async for chunk in stream:
+                if await request.is_disconnected():
+                    print(f"⚠️ {route} client disconnected, cancelling completion")
+                    break
+                # Groq reports the usage on the last chunk, under x_groq
+                usage = getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    timer.token()
+                    parts.append(delta)
+                    yield sse("token", {"content": delta})
+            else:
+                if on_complete and parts:
+                    await complete(on_complete, "".join(parts))
+                yield sse("done", timer.summary())
+        except Exception as e:
+            yield sse("error", {"error": str(e)})
+        finally:
+            if stream is not None:
+                await stream.close()
+            # Without usage (e.g. a disconnect), charge the prompt estimate plus what was streamed
+            used = usage.total_tokens if usage is not None else (
+                rateLimiter.estimate_tokens(*prompt, "".join(parts)) - rateLimiter.RATE_LIMIT_COMPLETION_ESTIMATE
+            )
+            rateLimiter.settle(create_kwargs.get("model"), reserved, used)
@@ -0,0 +1,147 @@
+import os
+import json
+import hashlib
+import threading
+import contextvars
+from concurrent.futures import Future
+from functools import wraps
+from inspect import iscoroutinefunction, signature
+from dotenv import load_dotenv
+from controllers import metrics
+from controllers.cache import TTLCache
+
+load_dotenv()
+
+# Seconds each agent tool's results are reused, as tool:seconds pairs; tools
+# not listed are not cached. Prices move by the second, fundamentals and
+# news within hours, encyclopedia entries within days
+DEFAULT_TOOL_CACHE_TTLS = (
+    "get_current_stock_price:30,"
+    "get_historical_stock_prices:900,"
+    "get_company_news:900,"
+    "duckduckgo_search:900,"
+    "duckduckgo_news:900,"
+    "get_company_info:21600,"
+    "get_stock_fundamentals:21600,"
+    "get_income_statements:21600,"
+    "get_key_financial_ratios:21600,"
+    "get_analyst_recommendations:21600,"
+    "search_wikipedia:86400"
+)
+TOOL_CACHE_TTLS = {
+    tool: float(ttl)
+    for tool, ttl in (
+        item.rsplit(":", 1) for item in os.getenv("TOOL_CACHE_TTLS", DEFAULT_TOOL_CACHE_TTLS).replace(" ", "").split(",") if item
+    )
+}
+TOOL_CACHE_SIZE = int(os.getenv("TOOL_CACHE_SIZE", "4096"))
+
+# Arguments naming a ticker, compared case-insensitively
+SYMBOL_ARGS = ("symbol", "ticker")
+
+tool_cache = TTLCache("tool_calls", maxsize=TOOL_CACHE_SIZE, shared=True)
+tool_cache_lookups = metrics.Counter("tool_cache_lookups_total", "Agent tool calls answered from the tool cache (hit) or run (miss)")
+
+_run_counts = contextvars.ContextVar("tool_cache_run", default=None)
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def canonical_args(kwargs):
+    """JSON of a tool call's arguments that is equal for equivalent calls."""
+    canonical = {}
+    for name, value in kwargs.items():
+        if name in ("agent", "fc"):
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if name in SYMBOL_ARGS:
+                value = value.upper()
+        canonical[name] = value
+    return json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def tool_key(tool, kwargs):
+    return f"{tool}:{hashlib.sha256(canonical_args(kwargs).encode()).hexdigest()[:32]}"
+
+
+def start_run():
+    """Count tool cache hits and misses of the agent run in the current context; returns the counts."""
+    counts = {"hits": 0, "misses": 0}
+    _run_counts.set(counts)
+    return counts
+
+
+def _count(tool, result):
+    tool_cache_lookups.inc(tool=tool, result=result)
+    counts = _run_counts.get()
+    if counts is not None:
+        counts["hits" if result == "hit" else "misses"] += 1
+
+
+def _cacheable(result):
+    # The yfinance tools report failures as "Error ..." strings instead of raising
+    return result is not None and not (isinstance(result, str) and result.startswith("Error"))
+
+
+def cached_tool(tool, fn, ttl):
+    """fn memoized for ttl seconds by tool name and canonical arguments.
+
+    Identical calls running at the same time, e.g. parallel tool calls of one
+    model turn, share a single execution.
+    """
+    params = signature(fn)
+
+    @wraps(fn)
+    def wrapper(**kwargs):
+        # Fill in defaults so calls that spell them out share the entry
+        call = params.bind(**kwargs)
+        call.apply_defaults()
+        key = tool_key(tool, call.arguments)
+        result = tool_cache.get(key)
+        if result is not None:
+            _count(tool, "hit")
+            return result
+
+        with _inflight_lock:
+            future = _inflight.get(key)
+            owner = future is None
+            if owner:
+                future = _inflight[key] = Future()
+        if not owner:
+            _count(tool, "hit")
+            return future.result()
+
+        _count(tool, "miss")
+        try:
+            result = fn(**kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            if _cacheable(result):
+                tool_cache.set(key, result, ttl)
+            return result
+        finally:
+            with _inflight_lock:
+                del _inflight[key]
+
+    wrapper.tool_cache_ttl = ttl
+    return wrapper
+
+
+def memoize(toolkit, ttls=None):
+    """Route the calls of an agno toolkit's tools listed in ttls (TOOL_CACHE_TTLS) through the tool cache.
+
+    Works on any Toolkit since it swaps the entrypoint of each registered
+    function; returns the toolkit so it can wrap the constructor call.
+    """
+    ttls = TOOL_CACHE_TTLS if ttls is None else ttls
+    for name, function in toolkit.functions.items():
+        ttl = ttls.get(name, 0)
+        entrypoint = function.entrypoint
+        if ttl <= 0 or entrypoint is None or iscoroutinefunction(entrypoint) or hasattr(entrypoint, "tool_cache_ttl"):
+            continue
+        function.entrypoint = cached_tool(name, entrypoint, ttl)
+    return toolkit
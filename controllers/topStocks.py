@@ -1,48 +1,215 @@
-import yfinance as yf
-import requests 
+import os
 import time
-session = requests.Session()
-session.headers.update({
-    "User-Agent": "Chrome/122.0.0.0"
-})
+import asyncio
+import numpy as np
+from dataclasses import dataclass
+from dotenv import load_dotenv
+from controllers.cache import TTLCache, SingleFlight
+from controllers.executor import run_blocking
+from controllers.scheduler import spawn
+from controllers import resilience
+from controllers.httpClients import yahoo_session
 
-def get_top_stocks(symbols):
-    stock_data = []
-    try:
-        top_stocks = symbols.split()
-        tickers = yf.Tickers(symbols)
-        while top_stocks:
-            stock = top_stocks.pop()
-            info = tickers.tickers[stock].info
-            stock_info = {
-                    'symbol': stock,
-                    'name': info.get('shortName', 'N/A'),
-                    'currentPrice': info.get('currentPrice', 'N/A'),
-                    'previousClose': info.get('previousClose', 'N/A'),
-                    'sector': info.get('sector', 'N/A')
-                    }
-            
-            stock_data.append(stock_info)
-        print("✅ Data fetching done successfully!")
-        return stock_data
-    except Exception as e:
-            print(f"❌ Error fetching {symbols}: {e}")
-            time.sleep(5)
-    
+load_dotenv()
+
+# Quote cache keyed by upper-cased symbol
+QUOTE_CACHE_TTL = float(os.getenv("QUOTE_CACHE_TTL", "60"))
+QUOTE_CACHE_SIZE = int(os.getenv("QUOTE_CACHE_SIZE", "2048"))
+quote_cache = TTLCache("quotes", maxsize=QUOTE_CACHE_SIZE, ttl=QUOTE_CACHE_TTL, shared=True)
+quote_flight = SingleFlight("quotes")
+
+# Last known quote per symbol, served when Yahoo is unavailable
+LAST_QUOTE_TTL = float(os.getenv("LAST_QUOTE_TTL", "86400"))
+last_quotes = TTLCache("last_quotes", maxsize=QUOTE_CACHE_SIZE, ttl=LAST_QUOTE_TTL, shared=True)
+
+# Watchlist served by /top-stocks and how often it is refreshed in the background
+TOP_STOCKS_WATCHLIST = os.getenv("TOP_STOCKS_WATCHLIST", "AAPL MSFT AMZN GOOGL TSLA META NVDA").replace(",", " ").split()
+TOP_STOCKS_REFRESH_SECONDS = float(os.getenv("TOP_STOCKS_REFRESH_SECONDS", "60"))
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Immutable result of one watchlist refresh."""
+    stocks: tuple
+    updated_at: float
+
+    def age(self):
+        return max(0.0, time.time() - self.updated_at)
+
+_snapshot = None
+# Snapshots published by the worker running the refresh, for the other workers
+snapshot_cache = TTLCache("top_stocks_snapshot", maxsize=1, ttl=LAST_QUOTE_TTL, shared=True)
 
-def get_stock(symbol):
+# Bulk quotes: prices come from one multi-symbol download, the slow .info
+# fields (name, sector) are filled lazily into a long-lived cache
+BULK_MAX_SYMBOLS = int(os.getenv("BULK_MAX_SYMBOLS", "300"))
+BULK_PRICE_TTL = float(os.getenv("BULK_PRICE_TTL", str(QUOTE_CACHE_TTL)))
+INFO_CACHE_TTL = float(os.getenv("INFO_CACHE_TTL", "86400"))
+bulk_price_cache = TTLCache("bulk_prices", maxsize=QUOTE_CACHE_SIZE, ttl=BULK_PRICE_TTL, shared=True)
+info_cache = TTLCache("quote_info", maxsize=QUOTE_CACHE_SIZE, ttl=INFO_CACHE_TTL, shared=True)
+_info_fills = set()
+
+def build_stock_info(symbol, info):
+    """Build the public quote structure from a yfinance info dict."""
+    return {
+        'symbol': symbol,
+        'name': info.get('shortName', 'N/A'),
+        'currentPrice': info.get('currentPrice', 'N/A'),
+        'previousClose': info.get('previousClose', 'N/A'),
+        'sector': info.get('sector', 'N/A')
+    }
+
+def load_stock(symbol):
+    """Fetch a quote from Yahoo and store it in the quote caches; raises on failure."""
+    import yfinance as yf
+
+    stock = yf.Ticker(symbol, session=yahoo_session())
+    info = stock.info
+    stock_info = build_stock_info(symbol, info)
+    quote_cache.set(symbol.upper(), stock_info)
+    last_quotes.set(symbol.upper(), stock_info)
+    info_cache.set(symbol.upper(), {'name': stock_info['name'], 'sector': stock_info['sector']})
+    print("✅ Data fetching done successfully!")
+    return stock_info
+
+async def fetch_quote(symbol, use_last_known=True):
+    """Fetch a quote with retries and the Yahoo circuit breaker.
+
+    When Yahoo keeps failing or its breaker is open, the last known quote is
+    returned if use_last_known is set; otherwise, or without one, None.
+    """
+    fallback = (lambda: last_quotes.aget(symbol.upper())) if use_last_known else None
     try:
-        stock = yf.Ticker(symbol)
-        info = stock.info
-        stock_info = {
-                'symbol': symbol,
-                'name': info.get('shortName', 'N/A'),
-                'currentPrice': info.get('currentPrice', 'N/A'),
-                'previousClose': info.get('previousClose', 'N/A'),
-                'sector': info.get('sector', 'N/A')
-            }
-        print("✅ Data fetching done successfully!")
-        return stock_info
+        return await resilience.call("yahoo", run_blocking, "stock", load_stock, symbol, fallback=fallback)
     except Exception as e:
         print(f"❌ Error fetching {symbol}: {e}")
-        time.sleep(5)
+        return None
+
+async def aget_stock(symbol):
+    """Cached quote lookup; concurrent misses for a symbol share one Yahoo call."""
+    key = symbol.upper()
+    stock_info = await quote_cache.aget(key)
+    if stock_info is None:
+        stock_info = await quote_flight.do(key, fetch_quote, symbol)
+    return dict(stock_info, symbol=symbol) if stock_info else stock_info
+
+async def refresh_top_stocks():
+    """Fetch fresh quotes for the watchlist and publish them as the new snapshot.
+
+    Symbols that fail keep their entry from the previous snapshot; if
+    nothing could be fetched the previous snapshot stays in place.
+    """
+    global _snapshot
+    fresh = await asyncio.gather(*(
+        quote_flight.do(f"{symbol.upper()}:fresh", fetch_quote, symbol, False)
+        for symbol in TOP_STOCKS_WATCHLIST
+    ))
+    if not any(fresh):
+        print("❌ Top stocks refresh failed, keeping the last snapshot")
+        return _snapshot
+
+    previous = {stock['symbol']: stock for stock in _snapshot.stocks} if _snapshot else {}
+    stocks = []
+    for symbol, stock_info in zip(TOP_STOCKS_WATCHLIST, fresh):
+        if stock_info:
+            stocks.append(dict(stock_info, symbol=symbol))
+        elif symbol in previous:
+            stocks.append(previous[symbol])
+    _snapshot = Snapshot(stocks=tuple(stocks), updated_at=time.time())
+    await snapshot_cache.aset("watchlist", {"stocks": stocks, "updated_at": _snapshot.updated_at})
+    return _snapshot
+
+async def get_top_stocks_snapshot():
+    """Return the current snapshot, building the first one if none exists yet.
+
+    Only one worker runs the scheduled refresh; the others pick up the
+    snapshot it published once theirs is older than the refresh interval.
+    """
+    global _snapshot
+    if _snapshot is None or _snapshot.age() >= TOP_STOCKS_REFRESH_SECONDS:
+        published = await snapshot_cache.aget("watchlist")
+        if published is not None and (_snapshot is None or published["updated_at"] > _snapshot.updated_at):
+            _snapshot = Snapshot(stocks=tuple(published["stocks"]), updated_at=published["updated_at"])
+    if _snapshot is None:
+        await refresh_top_stocks()
+    return _snapshot
+
+def parse_symbols(symbols):
+    """Split a comma or space separated symbol list into unique upper-cased symbols."""
+    return list(dict.fromkeys(s.upper() for s in symbols.replace(",", " ").split()))
+
+def last_two_closes(close):
+    """Return the last and previous non-NaN close of every column of a (bars x symbols) array."""
+    valid = ~np.isnan(close)
+    rows = np.arange(close.shape[0])[:, None]
+    last_idx = np.where(valid, rows, -1).max(axis=0)
+    prev_idx = np.where(valid & (rows < last_idx), rows, -1).max(axis=0)
+    cols = np.arange(close.shape[1])
+    last = np.where(last_idx >= 0, close[np.maximum(last_idx, 0), cols], np.nan)
+    prev = np.where(prev_idx >= 0, close[np.maximum(prev_idx, 0), cols], np.nan)
+    return last, prev
+
+def download_closes(symbols):
+    """Fetch last and previous close for many symbols with one batched download."""
+    import yfinance as yf
+
+    data = yf.download(symbols, period="5d", interval="1d", auto_adjust=False,
+                       group_by="column", progress=False, threads=True, session=yahoo_session())
+    closes = {}
+    if data is None or data.empty:
+        return closes
+    close = data["Close"].reindex(columns=symbols)
+    last, prev = last_two_closes(close.to_numpy(dtype=float))
+    for symbol, price, previous in zip(symbols, last, prev):
+        if not np.isnan(price):
+            closes[symbol] = (float(price), None if np.isnan(previous) else float(previous))
+    return closes
+
+async def fill_info(symbols):
+    """Load the .info fields of symbols in the background."""
+    try:
+        await asyncio.gather(*(
+            quote_flight.do(symbol, fetch_quote, symbol)
+            for symbol in symbols
+        ), return_exceptions=True)
+    finally:
+        _info_fills.difference_update(symbols)
+
+async def get_bulk_quotes(symbols):
+    """Columnar quotes for a list of symbols.
+
+    Prices missing from the cache are fetched in a single multi-symbol
+    download. Names and sectors come from the info cache and are filled in
+    the background for symbols seen for the first time, so they show up as
+    null until then.
+    """
+    prices = await bulk_price_cache.aget_many(symbols)
+    missing = [symbol for symbol in symbols if symbol not in prices]
+
+    if missing:
+        try:
+            fetched = await resilience.call("yahoo", run_blocking, "stock", download_closes, missing)
+        except Exception as e:
+            print(f"❌ Error fetching closes for {len(missing)} symbols: {e}")
+            fetched = {}
+        await bulk_price_cache.aset_many(fetched)
+        prices.update(fetched)
+
+    result = {"symbols": [], "price": [], "previous_close": [], "name": [], "sector": []}
+    unknown = []
+    infos = await info_cache.aget_many(symbols)
+    for symbol in symbols:
+        price, previous = prices.get(symbol, (None, None))
+        info = infos.get(symbol)
+        if info is None and symbol not in _info_fills:
+            unknown.append(symbol)
+        info = info or {}
+        result["symbols"].append(symbol)
+        result["price"].append(price)
+        result["previous_close"].append(previous)
+        result["name"].append(info.get("name"))
+        result["sector"].append(info.get("sector"))
+
+    if unknown:
+        _info_fills.update(unknown)
+        spawn(fill_info(unknown), name="quote-info-fill")
+    return result
@@ -0,0 +1,17 @@
+"""Gunicorn settings for the multi-worker deployment: gunicorn -c gunicorn.conf.py app:app"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+# One uvicorn worker per core by default; the app is async, so a worker
+# already serves many requests at once
+workers = int(os.getenv("WEB_CONCURRENCY") or multiprocessing.cpu_count())
+# Each worker enforces its share of the LLM rate limits (controllers/rateLimiter.py)
+os.environ.setdefault("RATE_LIMIT_WORKERS", str(workers))
+worker_class = "uvicorn.workers.UvicornWorker"
+# Agent runs can take minutes
+timeout = int(os.getenv("WORKER_TIMEOUT", "300"))
+graceful_timeout = 30
+keepalive = 5
+# No preload_app: every worker must open its own SQLite connections and HTTP pools after the fork
+preload_app = False
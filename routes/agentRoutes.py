@@ -1,19 +1,23 @@
 import os
 import datetime
 import json
-import requests
-from fastapi import FastAPI, APIRouter, Request, Body
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, APIRouter, Request, Body, Query
+from fastapi.responses import HTMLResponse, ORJSONResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
-from agno.agent import RunResponse
-from controllers.agent import multi_agent
+from controllers.agent import COORDINATOR_INSTRUCTIONS
+from controllers.registry import aget_agent
+from controllers.executor import run_agent
+from controllers.streaming import wants_stream, event_stream, stream_agent, stream_chat, replay
+from controllers.responseCache import llm_cache
+from controllers import health, registry, metrics, resilience, rateLimiter, httpClients, analysisJobs, orchestrator, modelRouter
+from controllers.orchestrator import AGENT_MODE
 import dotenv
-import groq
 
 # Define a Pydantic model for the request body
 class QueryRequest(BaseModel):
     query: str
+    stream: bool = False
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
@@ -21,13 +25,45 @@ templates = Jinja2Templates(directory="templates")
 dotenv.load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-groq_client = groq.Client(api_key=GROQ_API_KEY)
 
 if not GROQ_API_KEY:
     raise ValueError("Please provide a GROQ API key")
 
+def get_groq_client():
+    """The shared async Groq client."""
+    return httpClients.async_groq_client()
+
 start_time = datetime.datetime.now(datetime.timezone.utc)
 
+def api_status(name, api_key):
+    """Status of an upstream API as last seen by the background prober."""
+    if not api_key:
+        return "not configured"
+    result = health.probe_results().get(name)
+    if result is None:
+        return "unknown"
+    return "connected" if result["ok"] else "unreachable"
+
+@router.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and serving. Does no I/O."""
+    uptime = (datetime.datetime.now(datetime.timezone.utc) - start_time).total_seconds()
+    return {"status": "alive", "uptime_seconds": uptime}
+
+@router.get("/health/ready")
+async def readiness():
+    """Readiness probe: reports the background prober's last results, never calls upstreams."""
+    ready = health.is_ready()
+    return ORJSONResponse(
+        content={"status": "ready" if ready else "not ready", "required": health.HEALTH_REQUIRED, "upstreams": health.probe_results()},
+        status_code=200 if ready else 503,
+    )
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    """Prometheus metrics: request latency per route, agent and tool timings, tokens and cache counters."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @router.get("/health", response_class=HTMLResponse)
 async def health_check(request: Request):
     """Health check endpoint to verify the API server status and connections."""
@@ -39,10 +75,17 @@ async def health_check(request: Request):
             "uptime": "OK",
             "uptime_seconds": uptime,
             "api": {
-                "groq_api": "connected" if GROQ_API_KEY else "not configured",
-                "gemini_api":"connected" if GEMINI_API_KEY else "not configured",
+                "groq_api": api_status("groq", GROQ_API_KEY),
+                "gemini_api": api_status("gemini", GEMINI_API_KEY),
             },
-            "ip": requests.get('https://api.ipify.org').text,
+            "ip": health.public_ip(),
+            "upstreams": health.probe_results(),
+            "agents": registry.status(),
+            "breakers": resilience.breaker_stats(),
+            "rate_limits": rateLimiter.stats(),
+            "http_pools": httpClients.stats(),
+            "jobs": await analysisJobs.stats(),
+            "model_router": modelRouter.stats(),
 
         }
 
@@ -67,7 +110,7 @@ async def health_check(request: Request):
                 }
             )
 
-        return JSONResponse(content=response_data)
+        return ORJSONResponse(content=response_data)
 
     except Exception as e:
         error_response = {
@@ -97,10 +140,12 @@ async def health_check(request: Request):
                 }
             )
 
-        return JSONResponse(content=error_response)
+        return ORJSONResponse(content=error_response)
 
 @router.post("/agent", response_class=HTMLResponse, name="agent")
-async def agent(request: Request, payload: QueryRequest = Body(...)):
+async def agent(request: Request, payload: QueryRequest = Body(...),
+                mode: str = Query(None, pattern="^(team|parallel)$", description="team or parallel; defaults to AGENT_MODE"),
+                trace: bool = Query(False, description="Include the timing trace of a parallel run")):
     """
     API endpoint to handle user investment-related questions via POST request body
     and return AI-generated insights.
@@ -126,6 +171,8 @@ async def agent(request: Request, payload: QueryRequest = Body(...)):
                 "description": "Agent endpoint that uses a multi-AI system to provide sophisticated investment advice. Accepts a JSON body with a 'query' field.",
                 "parameters": [
                     {"name": "Request Body", "type": "JSON", "description": "JSON object containing the 'query' field."},
+                    {"name": "mode", "type": "string", "description": "team (members one after another) or parallel (concurrent fan-out)"},
+                    {"name": "trace", "type": "boolean", "description": "Include the timing trace of a parallel run"},
                     {"name": "format", "type": "string", "description": "Response format (html or json)"}
                 ],
                 "example_query": json.dumps(example_request_body, indent=2), # Show example request body
@@ -136,15 +183,58 @@ async def agent(request: Request, payload: QueryRequest = Body(...)):
 
     if not query:
         # This check might be redundant if QueryRequest enforces the field, but kept for clarity
-        return JSONResponse(content={"error": "Query field in request body is required"}, status_code=400)
+        return ORJSONResponse(content={"error": "Query field in request body is required"}, status_code=400)
+
+    # Answers are cached per routed model and mode, so small-model answers are
+    # never served for questions routed to the agent team, nor team answers
+    # for parallel runs (escalations can reach the team from any level)
+    mode = mode or AGENT_MODE
+    level = await modelRouter.route(query)
+    routed_model = modelRouter.model_for("agent", level)
+    model_id = f"{modelRouter.label_for('agent', routed_model)}:{mode}"
+    system_prompt = COORDINATOR_INSTRUCTIONS if routed_model is None else modelRouter.DIRECT_SYSTEM_PROMPT
+    cached = await llm_cache.aget(query, model_id, system_prompt)
+    if cached is not None:
+        if wants_stream(request, payload.stream):
+            return event_stream(replay(cached))
+        return ORJSONResponse(content={"question": query, "answer": cached}, headers={"X-Cache": "HIT"})
+
+    async def remember(answer):
+        await llm_cache.aset(query, model_id, system_prompt, answer)
 
     try:
-        response: RunResponse = multi_agent.run(query)
-        answer = response.content
-        return JSONResponse(content={"question": query, "answer": answer})
+        if wants_stream(request, payload.stream):
+            if routed_model is not None:
+                return event_stream(stream_chat("agent", get_groq_client(), request, on_complete=remember, model=routed_model,
+                                                messages=[{"role": "system", "content": modelRouter.DIRECT_SYSTEM_PROMPT},
+                                                          {"role": "user", "content": query}]))
+            if mode == "parallel":
+                return event_stream(orchestrator.stream_parallel(query, request, on_complete=remember))
+            return event_stream(stream_agent("agent", await aget_agent("multi_agent"), query, request, on_complete=remember))
+
+        run_trace = None
 
+        async def run_team():
+            nonlocal run_trace
+            if mode == "parallel":
+                team_answer, run_trace = await orchestrator.run_parallel(query)
+                return team_answer
+            return (await resilience.call("groq", run_agent, "agent", await aget_agent("multi_agent"), query, retry=False)).content
+
+        answer, routing = await modelRouter.answer("agent", query, level, run_team)
+        if answer:
+            await remember(answer)
+        content = {"question": query, "answer": answer}
+        if trace and run_trace is not None:
+            content["trace"] = run_trace.summary()
+        return ORJSONResponse(content=content, headers={
+            "X-Cache": "MISS", "X-Agent-Mode": mode, "X-Model-Route": routing["level"], "X-Model": routing["model"],
+        })
+
+    except resilience.CircuitOpenError as e:
+        return ORJSONResponse(content={"error": str(e)}, status_code=503)
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return ORJSONResponse(content={"error": str(e)}, status_code=500)
 
 @router.post("/chat", response_class=HTMLResponse)
 async def chat(request: Request, payload: QueryRequest = Body(...)):
@@ -183,17 +273,37 @@ async def chat(request: Request, payload: QueryRequest = Body(...)):
     # Handle regular API calls
     if not query:
         # This check might be redundant if QueryRequest enforces the field, but kept for clarity
-        return JSONResponse(content={"error": "Query field in request body is required"}, status_code=400)
+        return ORJSONResponse(content={"error": "Query field in request body is required"}, status_code=400)
 
-    try:
-        response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "system", "content": "You are an AI investment assistant."},
-                      {"role": "user", "content": query}]
-        )
+    level = await modelRouter.route(query)
+    model_id = modelRouter.model_for("chat", level)
+    system_prompt = "You are an AI investment assistant."
+    cached = await llm_cache.aget(query, model_id, system_prompt)
+    if cached is not None:
+        if wants_stream(request, payload.stream):
+            return event_stream(replay(cached))
+        return ORJSONResponse(content={"question": query, "answer": cached}, headers={"X-Cache": "HIT"})
 
-        answer = response.choices[0].message.content
-        return JSONResponse(content={"question": query, "answer": answer})
+    async def remember(answer):
+        await llm_cache.aset(query, model_id, system_prompt, answer)
+
+    if wants_stream(request, payload.stream):
+        chat_request = {
+            "model": model_id,
+            "messages": [{"role": "system", "content": system_prompt},
+                         {"role": "user", "content": query}]
+        }
+        return event_stream(stream_chat("chat", get_groq_client(), request, on_complete=remember, **chat_request))
+
+    try:
+        answer, routing = await modelRouter.answer("chat", query, level, system_prompt=system_prompt)
+        if answer:
+            await remember(answer)
+        return ORJSONResponse(content={"question": query, "answer": answer}, headers={
+            "X-Cache": "MISS", "X-Model-Route": routing["level"], "X-Model": routing["model"],
+        })
 
+    except resilience.CircuitOpenError as e:
+        return ORJSONResponse(content={"error": str(e)}, status_code=503)
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return ORJSONResponse(content={"error": str(e)}, status_code=500)
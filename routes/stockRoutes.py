@@ -1,15 +1,54 @@
-from fastapi import APIRouter, Request, HTTPException
-from fastapi.responses import HTMLResponse,JSONResponse
-from controllers.topStocks import get_top_stocks, get_stock
-from controllers.stockNews import fetch_news
-from controllers.stockAgent import stock_analyzer_agent, extract_json_from_response, create_default_stock_data, merge_stock_data
+from fastapi import APIRouter, Request, Response, HTTPException, Query
+from fastapi.responses import HTMLResponse
+from controllers.topStocks import aget_stock, get_top_stocks_snapshot, get_bulk_quotes, parse_symbols, BULK_MAX_SYMBOLS
+from controllers.stockNews import NEWS_PROMPT
+from controllers.newsDigest import get_digest, save_digest, latest_digest, digest_versions
+from controllers.registry import aget_agent
+from controllers.streaming import wants_stream, event_stream, stream_agent, replay
+from controllers.stockAnalysis import get_analysis, prewarm, commentary, AnalysisParseError, ANALYSIS_PREWARM_MAX
+from controllers.fundamentals import fast_analyses
+from controllers.analysisJobs import submit, get_job, JOB_MAX_SYMBOLS
+from controllers.cache import cache_stats
+from controllers.priceHistory import get_history, get_series, INTERVALS as HISTORY_INTERVALS, COLUMNS as HISTORY_COLUMNS
+from controllers.indicators import get_indicators, latest_indicators, INDICATORS
+from controllers.responses import json_response, example, etag_matches, cache_control
 from fastapi.templating import Jinja2Templates
+from pydantic import BaseModel, Field
+from email.utils import formatdate
 import datetime
-import json
+import time
+import numpy as np
+
+class PrewarmRequest(BaseModel):
+    symbols: list[str]
+
+class JobRequest(BaseModel):
+    symbols: list[str]
+    mode: str = Field("agent", pattern="^(agent|fast)$")
 
 templates = Jinja2Templates(directory="templates")
 router = APIRouter()
 
+def wants_html(request):
+    return "text/html" in request.headers.get("accept", "")
+
+def docs_page(request, description, parameters):
+    """The route.html docs page, rendered without fetching anything.
+
+    Its example is a preview of the last JSON response of the route.
+    """
+    route = request.scope["route"]
+    return templates.TemplateResponse("route.html", {
+        "request": request,
+        "route_path": route.path,
+        "method": "GET",
+        "full_path": f"{request.url.scheme}://{request.url.netloc}{request.url.path}",
+        "description": description,
+        "parameters": parameters,
+        "example_response": example(route.path) or "// Request this URL with Accept: application/json for a live response",
+        "current_year": datetime.datetime.now().year
+    })
+
 @router.get("/")
 @router.head("/")
 async def read_root(request: Request):
@@ -22,96 +61,243 @@ async def read_root(request: Request):
 @router.get("/top-stocks")
 async def read_top_stocks(request: Request):
     """Get top stocks in the market"""
+    if wants_html(request):
+        return docs_page(request, "Returns information about top stocks in the market", [])
     try:
-        top_stocks = ['AAPL', 'MSFT', 'AMZN', 'GOOGL', 'TSLA', 'META', 'NVDA']
-        result = get_top_stocks(" ".join(top_stocks))
-        
-        if "text/html" in request.headers.get("accept", ""):
-            return templates.TemplateResponse("route.html", {
-                "request": request,
-                "route_path": "/top-stocks",
-                "method": "GET",
-                "full_path": f"{request.url.scheme}://{request.url.netloc}/top-stocks",
-                "description": "Returns information about top stocks in the market",
-                "parameters": [],
-                "example_response": json.dumps(result, indent=2),
-                "current_year": datetime.datetime.now().year
-            })
-        return result
+        snapshot = await get_top_stocks_snapshot()
+        if snapshot is None:
+            raise HTTPException(status_code=503, detail="Top stocks are not available yet")
+        return json_response(request, list(snapshot.stocks), headers={
+            "Age": str(int(snapshot.age())),
+            "X-Snapshot-Updated": datetime.datetime.fromtimestamp(snapshot.updated_at, datetime.timezone.utc).isoformat(),
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/stock-news")
-async def stock_news(request: Request):
-    """Get latest stock market news"""
+async def stock_news(request: Request, stream: bool = False):
+    """Get latest stock market news from the scheduled digest"""
+    if wants_html(request):
+        return docs_page(request, "Returns latest news articles related to stocks and financial markets", [])
+    if wants_stream(request, stream):
+        digest = await latest_digest()
+        if digest is not None:
+            return event_stream(replay(digest["answer"]))
+        return event_stream(stream_agent("news", await aget_agent("web_agent"), NEWS_PROMPT, request, on_complete=save_digest))
     try:
-        result = fetch_news()
-        
-        if "text/html" in request.headers.get("accept", ""):
-            return templates.TemplateResponse("route.html", {
-                "request": request,
-                "route_path": "/stock-news",
-                "method": "GET",
-                "full_path": f"{request.url.scheme}://{request.url.netloc}/stock-news",
-                "description": "Returns latest news articles related to stocks and financial markets",
-                "parameters": [],
-                "example_response": json.dumps(result, indent=2),
-                "current_year": datetime.datetime.now().year
-            })
-        return result
+        digest = await get_digest()
+        headers = {
+            "ETag": digest["etag"],
+            "Last-Modified": formatdate(digest["created_at"], usegmt=True),
+            "Age": str(max(0, int(time.time() - digest["created_at"]))),
+            "X-Digest-Version": str(digest["version"]),
+        }
+        # Revalidate against the digest's own ETag without serializing it
+        if etag_matches(request.headers.get("if-none-match"), digest["etag"]):
+            # Same caching headers as the 304s ResponsePipeline sends
+            policy = cache_control("/stock-news")
+            if policy:
+                headers.update({"Cache-Control": policy, "Vary": "Accept, Accept-Encoding"})
+            return Response(status_code=304, headers=headers)
+        result = {
+            "question": digest["question"],
+            "answer": digest["answer"],
+            "version": digest["version"],
+            "updated_at": datetime.datetime.fromtimestamp(digest["created_at"], datetime.timezone.utc).isoformat(),
+        }
+        return json_response(request, result, headers=headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/stock-news/versions")
+async def stock_news_versions():
+    """Stored versions of the news digest, newest first"""
+    return {"versions": await digest_versions()}
+
 @router.get("/stock/{name}")
 async def read_stock(request: Request, name: str):
     """Get detailed information for a specific stock"""
+    if wants_html(request):
+        return docs_page(request, "Returns detailed information about a specific stock", [
+            {"name": "name", "type": "string", "description": "Stock symbol (e.g., AAPL, MSFT)"}
+        ])
     try:
-        result = get_stock(name)
-        
-        if "text/html" in request.headers.get("accept", ""):
-            return templates.TemplateResponse("route.html", {
-                "request": request,
-                "route_path": f"/stock/{{{name}}}",
-                "method": "GET",
-                "full_path": f"{request.url.scheme}://{request.url.netloc}/stock/{name}",
-                "description": "Returns detailed information about a specific stock",
-                "parameters": [
-                    {"name": "name", "type": "string", "description": "Stock symbol (e.g., AAPL, MSFT)"}
-                ],
-                "example_response": json.dumps(result, indent=2),
-                "current_year": datetime.datetime.now().year
-            })
-        return result
+        return json_response(request, await aget_stock(name))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def parse_time(value, name):
+    """Parse an ISO date or datetime query parameter into UTC epoch seconds."""
+    if value is None:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be an ISO date or datetime")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return int(parsed.timestamp())
+
+def to_list(values):
+    """Float array as a JSON-ready list with NaN as None."""
+    return [None if v != v else v for v in values.tolist()] if np.isnan(values).any() else values.tolist()
+
+@router.get("/stock/{name}/history")
+async def read_stock_history(request: Request, name: str,
+                             start: str = Query(None, description="ISO date or datetime, inclusive"),
+                             end: str = Query(None, description="ISO date or datetime, exclusive"),
+                             interval: str = Query("1d", description="Bar interval")):
+    """Get OHLCV bars for a stock from the local history store as parallel arrays"""
+    if wants_html(request):
+        return docs_page(request, "Returns OHLCV bars as parallel arrays (timestamp in UTC epoch seconds, open, high, low, close, volume) from the local history store", [
+            {"name": "name", "type": "string", "description": "Stock symbol (e.g., AAPL, MSFT)"},
+            {"name": "start", "type": "string", "description": "ISO date or datetime, inclusive"},
+            {"name": "end", "type": "string", "description": "ISO date or datetime, exclusive"},
+            {"name": "interval", "type": "string", "description": f"One of {', '.join(HISTORY_INTERVALS)}"}
+        ])
+    if interval not in HISTORY_INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of {', '.join(HISTORY_INTERVALS)}")
+    start_ts, end_ts = parse_time(start, "start"), parse_time(end, "end")
+    try:
+        bars = await get_history(name, interval, start_ts, end_ts)
+        if not len(bars["timestamp"]) and get_series(name, interval).rows() == 0:
+            raise HTTPException(status_code=404, detail=f"No {interval} history for {name.upper()}")
+        result = {"symbol": name.upper(), "interval": interval, "timestamp": bars["timestamp"].tolist()}
+        for column in HISTORY_COLUMNS:
+            result[column] = to_list(bars[column])
+        return json_response(request, result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stock/{name}/indicators")
+async def read_stock_indicators(request: Request, name: str,
+                                start: str = Query(None, description="ISO date or datetime, inclusive"),
+                                end: str = Query(None, description="ISO date or datetime, exclusive"),
+                                interval: str = Query("1d", description="Bar interval")):
+    """Get technical indicators for a stock computed from the local history store"""
+    if wants_html(request):
+        return docs_page(request, "Returns SMA, EMA, RSI, MACD, Bollinger bands and ATR as parallel arrays aligned with the history timestamps", [
+            {"name": "name", "type": "string", "description": "Stock symbol (e.g., AAPL, MSFT)"},
+            {"name": "start", "type": "string", "description": "ISO date or datetime, inclusive"},
+            {"name": "end", "type": "string", "description": "ISO date or datetime, exclusive"},
+            {"name": "interval", "type": "string", "description": f"One of {', '.join(HISTORY_INTERVALS)}"}
+        ])
+    if interval not in HISTORY_INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of {', '.join(HISTORY_INTERVALS)}")
+    start_ts, end_ts = parse_time(start, "start"), parse_time(end, "end")
+    try:
+        timestamps, values = await get_indicators(name, interval, start_ts, end_ts)
+        if not len(timestamps) and get_series(name, interval).rows() == 0:
+            raise HTTPException(status_code=404, detail=f"No {interval} history for {name.upper()}")
+        result = {"symbol": name.upper(), "interval": interval, "timestamp": timestamps.tolist()}
+        for indicator in INDICATORS:
+            result[indicator] = to_list(np.round(values[indicator], 4))
+        return json_response(request, result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/indicators")
+async def read_indicators(request: Request,
+                          symbols: str = Query(..., description="Comma or space separated stock symbols"),
+                          interval: str = Query("1d", description="Bar interval")):
+    """Get the latest technical indicators for many stocks, computed in one vectorized pass"""
+    if wants_html(request):
+        return docs_page(request, "Returns the latest SMA, EMA, RSI, MACD, Bollinger bands and ATR of each symbol", [
+            {"name": "symbols", "type": "string", "description": f"Up to {BULK_MAX_SYMBOLS} comma or space separated symbols"},
+            {"name": "interval", "type": "string", "description": f"One of {', '.join(HISTORY_INTERVALS)}"}
+        ])
+    symbol_list = parse_symbols(symbols)
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="At least one symbol is required")
+    if len(symbol_list) > BULK_MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_SYMBOLS} symbols are allowed")
+    if interval not in HISTORY_INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of {', '.join(HISTORY_INTERVALS)}")
+    try:
+        return json_response(request, await latest_indicators(symbol_list, interval))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stocks")
+async def read_stocks(request: Request, symbols: str = Query(..., description="Comma or space separated stock symbols")):
+    """Get quotes for many stocks at once as parallel arrays"""
+    if wants_html(request):
+        return docs_page(request, "Returns quotes for many stocks as parallel arrays (symbols, price, previous_close, name, sector)", [
+            {"name": "symbols", "type": "string", "description": f"Comma separated stock symbols, at most {BULK_MAX_SYMBOLS}"}
+        ])
+    symbol_list = parse_symbols(symbols)
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="At least one symbol is required")
+    if len(symbol_list) > BULK_MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_SYMBOLS} symbols are allowed")
+    try:
+        return json_response(request, await get_bulk_quotes(symbol_list))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/cache/stats")
+async def read_cache_stats():
+    """Hit/miss counters of the in-process caches"""
+    return cache_stats()
+
+@router.post("/stock-analysis/jobs", status_code=202)
+async def create_analysis_job(request: Request, payload: JobRequest):
+    """Queue analyses of many symbols; poll the returned status_url for progress and results"""
+    symbols = [s for s in payload.symbols if s.strip()]
+    if not symbols:
+        raise HTTPException(status_code=400, detail="At least one symbol is required")
+    if len(symbols) > JOB_MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {JOB_MAX_SYMBOLS} symbols are allowed")
+    job_id = await submit([s.strip() for s in symbols], payload.mode)
+    return {"job_id": job_id, "status_url": str(request.url_for("read_analysis_job", job_id=job_id))}
+
+@router.get("/stock-analysis/jobs/{job_id}")
+async def read_analysis_job(request: Request, job_id: str):
+    """Get the progress of an analysis job and the results finished so far"""
+    if wants_html(request):
+        return docs_page(request, "Returns the progress of an analysis job and the results finished so far", [
+            {"name": "job_id", "type": "string", "description": "Id returned by POST /stock-analysis/jobs"}
+        ])
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return json_response(request, job)
+
 @router.get("/stock-analysis/{symbol}")
-async def get_stock_analysis(request: Request, symbol: str):
+async def get_stock_analysis(request: Request, symbol: str, mode: str = Query("agent", pattern="^(agent|fast)$"), narrative: bool = False):
     """Get AI-powered analysis for a given stock symbol"""
+    if wants_html(request):
+        return docs_page(request, "Provides detailed AI-powered analysis of a stock", [
+            {"name": "symbol", "type": "string", "description": "Stock symbol to analyze"},
+            {"name": "mode", "type": "string", "description": "agent (default, LLM with tools) or fast (computed from yfinance)"},
+            {"name": "narrative", "type": "boolean", "description": "With mode=fast, add a short LLM commentary"}
+        ])
     try:
-        prompt = f"Analyze the stock {symbol} and provide detailed financial information following the specified JSON format."
-        response = stock_analyzer_agent.run(prompt)
-        
-        result = create_default_stock_data(symbol)
-        if hasattr(response, 'content'):
-            json_data = extract_json_from_response(response.content)
-            if json_data:
-                result = merge_stock_data(result, json_data)
-        
-        if "text/html" in request.headers.get("accept", ""):
-            return templates.TemplateResponse("route.html", {
-                "request": request,
-                "route_path": f"/stock-analysis/{{{symbol}}}",
-                "method": "GET",
-                "full_path": f"{request.url.scheme}://{request.url.netloc}/stock-analysis/{symbol}",
-                "description": "Provides detailed AI-powered analysis of a stock",
-                "parameters": [
-                    {"name": "symbol", "type": "string", "description": "Stock symbol to analyze"}
-                ],
-                "example_response": json.dumps(result, indent=2),
-                "current_year": datetime.datetime.now().year
-            })
-        return JSONResponse(content=result)
+        if mode == "fast":
+            result = (await fast_analyses([symbol]))[symbol.upper()]
+            cache_status, age = "BYPASS", 0.0
+            if narrative:
+                result["commentary"] = await commentary(result)
+        else:
+            try:
+                result, cache_status, age = await get_analysis(symbol)
+            except AnalysisParseError as e:
+                # Never let browsers or proxies cache a missing analysis as a real one
+                return json_response(request, {"error": str(e)}, status_code=502, headers={"Cache-Control": "no-store"})
+        return json_response(request, result, headers={"X-Cache": cache_status, "Age": str(int(age))})
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/stock-analysis/prewarm", status_code=202)
+async def prewarm_stock_analysis(payload: PrewarmRequest):
+    """Refresh analyses for a list of symbols in the background"""
+    if len(payload.symbols) > ANALYSIS_PREWARM_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {ANALYSIS_PREWARM_MAX} symbols are allowed")
+    return {"queued": await prewarm(payload.symbols)}
@@ -0,0 +1,46 @@
+"""Compare /stock-analysis latency of the agent path and the fast path.
+
+The agent path runs the Gemini analyzer with YFinance tools; the fast path
+computes the same structure from yfinance data. Needs GEMINI_API_KEY and
+network access:
+
+    python scripts/bench_analysis_modes.py AAPL MSFT NVDA
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.stockAnalysis import run_analysis  # noqa: E402
+from controllers.fundamentals import fast_analyses, fundamentals_cache  # noqa: E402
+
+
+async def main(symbols):
+    agent_times = []
+    for symbol in symbols:
+        start = time.perf_counter()
+        await run_analysis(symbol)
+        agent_times.append(time.perf_counter() - start)
+
+    fast_times = []
+    for symbol in symbols:
+        fundamentals_cache.clear()
+        start = time.perf_counter()
+        await fast_analyses([symbol])
+        fast_times.append(time.perf_counter() - start)
+
+    fundamentals_cache.clear()
+    start = time.perf_counter()
+    await fast_analyses(symbols)
+    batch = time.perf_counter() - start
+
+    print(f"{'symbol':<8}{'agent':>10}{'fast':>10}")
+    for symbol, agent, fast in zip(symbols, agent_times, fast_times):
+        print(f"{symbol:<8}{agent:>9.2f}s{fast:>9.2f}s")
+    print(f"fast batch of {len(symbols)}: {batch:.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main([s.upper() for s in sys.argv[1:]] or ["AAPL", "MSFT", "NVDA"]))
@@ -0,0 +1,86 @@
+"""Compare the analyzer's tool profiles: prompt size, input tokens and latency.
+
+Without --live it only builds each profile's agent and measures what is
+sent with every Gemini call: the system prompt and the tool declarations
+(about 4 characters per token). With --live it also runs each profile on
+the given symbols (needs GEMINI_API_KEY and network access) and reports
+time to first token, total time and the input tokens Gemini counted:
+
+    python scripts/bench_analysis_profiles.py
+    python scripts/bench_analysis_profiles.py --live AAPL MSFT NVDA
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.registry import get_agent  # noqa: E402
+from controllers.stockAgent import TOOL_PROFILES, parse_stock_analysis  # noqa: E402
+
+
+def prompt_size(profile):
+    """(system prompt chars, tool declaration chars, tool count) of a profile's agent."""
+    agent = get_agent(f"stock_analyzer_{profile}").deep_copy()
+    agent.update_model()
+    tools = agent.model._tools or []
+    return len(agent.get_system_message().content), len(json.dumps(tools)), len(tools)
+
+
+async def run_once(profile, symbol):
+    """(ttft seconds, total seconds, input tokens, parsed ok) of one streamed analysis."""
+    agent = get_agent(f"stock_analyzer_{profile}").deep_copy()
+    prompt = f"Analyze the stock {symbol} and provide detailed financial information following the specified JSON format."
+    start = time.perf_counter()
+    first = None
+    parts = []
+    async for chunk in await agent.arun(prompt, stream=True):
+        if chunk.content and isinstance(chunk.content, str):
+            if first is None:
+                first = time.perf_counter() - start
+            parts.append(chunk.content)
+    total = time.perf_counter() - start
+    input_tokens = sum(
+        message.metrics.input_tokens or 0
+        for run in agent.memory.runs if run.response is not None
+        for message in run.response.messages or [] if message.role == "assistant" and message.metrics is not None
+    )
+    return first or total, total, input_tokens, parse_stock_analysis(symbol, "".join(parts)) is not None
+
+
+async def live(symbols, runs):
+    print(f"\n{'profile':<8}{'ttft p50':>10}{'total p50':>11}{'input tok':>11}{'parsed':>8}")
+    for profile in TOOL_PROFILES:
+        results = [await run_once(profile, symbol) for symbol in symbols for _ in range(runs)]
+        ttfts, totals, tokens, parsed = zip(*results)
+        print(f"{profile:<8}{statistics.median(ttfts):>9.2f}s{statistics.median(totals):>10.2f}s"
+              f"{statistics.mean(tokens):>11.0f}{sum(parsed):>5}/{len(parsed)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("symbols", nargs="*", default=["AAPL", "MSFT", "NVDA"])
+    parser.add_argument("--live", action="store_true", help="Also run the profiles against Gemini")
+    parser.add_argument("-n", "--runs", type=int, default=1, help="Runs per symbol and profile")
+    args = parser.parse_args()
+
+    print(f"{'profile':<8}{'tools':>6}{'system':>9}{'tool decl':>11}{'~tokens':>9}")
+    sizes = {profile: prompt_size(profile) for profile in TOOL_PROFILES}
+    for profile, (system, declarations, count) in sizes.items():
+        print(f"{profile:<8}{count:>6}{system:>9}{declarations:>11}{(system + declarations) // 4:>9}")
+    if "full" in sizes:
+        full = sum(sizes["full"][:2])
+        for profile, (system, declarations, _) in sizes.items():
+            if profile != "full":
+                print(f"{profile} sends {1 - (system + declarations) / full:.0%} less per call than full")
+
+    if args.live:
+        asyncio.run(live([s.upper() for s in args.symbols], args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark the batched bulk quote path against N single /stock/{name} lookups (aget_stock).
+
+Both paths start from cold caches and hit Yahoo for real, so run it from a
+machine with network access:
+
+    python scripts/bench_bulk_quotes.py -n 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers import topStocks  # noqa: E402
+
+SYMBOLS = (
+    "AAPL MSFT AMZN GOOGL TSLA META NVDA BRK-B JPM V UNH XOM JNJ WMT MA PG AVGO HD CVX LLY "
+    "MRK ABBV PEP KO COST ADBE CRM BAC MCD CSCO TMO ACN NFLX ABT LIN DHR AMD WFC DIS TXN "
+    "NEE PM VZ CMCSA ORCL INTC RTX HON UPS BMY QCOM LOW SPGI INTU IBM CAT GS AMGN SBUX"
+).split()
+
+
+def clear_caches():
+    for cache in (topStocks.quote_cache, topStocks.last_quotes, topStocks.bulk_price_cache, topStocks.info_cache):
+        cache.clear()
+
+
+async def bench_single(symbols):
+    start = time.perf_counter()
+    for symbol in symbols:
+        await topStocks.aget_stock(symbol)
+    return time.perf_counter() - start
+
+
+async def bench_bulk(symbols):
+    start = time.perf_counter()
+    await topStocks.get_bulk_quotes(symbols)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", type=int, default=20, help="Number of symbols")
+    args = parser.parse_args()
+    symbols = SYMBOLS[:args.n]
+
+    clear_caches()
+    single = asyncio.run(bench_single(symbols))
+    clear_caches()
+    bulk = asyncio.run(bench_bulk(symbols))
+
+    print(f"{len(symbols)} symbols")
+    print(f"  aget_stock x{len(symbols)}: {single:.2f}s ({single / len(symbols) * 1000:.0f}ms/symbol)")
+    print(f"  bulk download:    {bulk:.2f}s ({bulk / len(symbols) * 1000:.0f}ms/symbol)")
+    print(f"  speedup: {single / bulk:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Connection-reuse benchmark: shared pool vs a new HTTP client per call.
+
+Before the shared pools, agno's Groq model built a new AsyncGroq client
+(and so a new connection pool) on every model call, and google-genai opened
+a new httpx client per request. This fires the same concurrent load through
+both patterns and reports throughput and the number of TCP connections the
+server saw.
+
+By default it targets a local keep-alive server, which shows the connection
+counts but not TLS handshake cost; pass --url to measure against a real
+HTTPS endpoint instead:
+
+    python scripts/bench_connection_reuse.py --requests 2000 --concurrency 50
+    python scripts/bench_connection_reuse.py --url https://api.groq.com/openai/v1/models
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers import httpClients  # noqa: E402
+
+
+class CountingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with CountingHandler.lock:
+            CountingHandler.connections += 1
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def start_server():
+    server = Server(("127.0.0.1", 0), CountingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+async def run(url, total, concurrency, get):
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            try:
+                (await get(url)).raise_for_status()
+            except httpx.HTTPError:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return time.perf_counter() - start, failures
+
+
+async def main(args):
+    server = None
+    url = args.url
+    if url is None:
+        server, url = start_server()
+
+    async def new_client_per_call(target):
+        async with httpx.AsyncClient() as client:
+            return await client.get(target)
+
+    shared = httpClients.async_client("benchmark")
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {url}\n")
+    print(f"{'pattern':<22}{'seconds':>9}{'req/s':>9}{'failed':>8}{'connections':>13}")
+    for name, get in [("client per call", new_client_per_call), ("shared pool", shared.get)]:
+        CountingHandler.connections = 0
+        seconds, failures = await run(url, args.requests, args.concurrency, get)
+        connections = CountingHandler.connections if server else "n/a"
+        print(f"{name:<22}{seconds:>9.2f}{args.requests / seconds:>9.0f}{failures:>8}{connections:>13}")
+
+    await httpClients.close()
+    if server:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="endpoint to hit instead of the local server")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,112 @@
+"""JSON extraction benchmark: the previous regex extractor and field-by-field merge vs raw_decode and one-pass validation.
+
+Builds large synthetic agent replies (long prose around the JSON object,
+a fenced block, text without any JSON) and times extract_json_from_response
+and merge_stock_data against the implementations they replaced.
+
+    python scripts/bench_json_extraction.py
+    python scripts/bench_json_extraction.py --prose-kb 512 --number 200
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.stockAgent import create_default_stock_data, extract_json_from_response, merge_stock_data  # noqa: E402
+
+
+def legacy_extract(response_content):
+    # The extractor as it was: fenced block, whole string, then a greedy brace match
+    if not response_content:
+        return None
+    if isinstance(response_content, dict):
+        return response_content
+    json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', response_content)
+    if json_match:
+        try:
+            return json.loads(json_match.group(1))
+        except json.JSONDecodeError:
+            pass
+    try:
+        return json.loads(response_content)
+    except json.JSONDecodeError:
+        pass
+    json_match = re.search(r'\{[\s\S]*\}', response_content)
+    if json_match:
+        try:
+            return json.loads(json_match.group(0))
+        except json.JSONDecodeError:
+            pass
+    return None
+
+
+def legacy_merge(default_data, api_data):
+    # The merge as it was, minus the prints on failed conversions
+    if not api_data:
+        return default_data
+    result = default_data.copy()
+    for field in ["symbol", "company_name"]:
+        if field in api_data:
+            result[field] = api_data[field]
+    for field in ["current_price", "market_cap"]:
+        if field in api_data:
+            try:
+                value = api_data[field]
+                result[field] = float(value) if field == "current_price" else int(float(value))
+            except (ValueError, TypeError):
+                pass
+    for section in ["financial_ratios", "financial_health", "per_share_metrics"]:
+        if section in api_data and isinstance(api_data[section], dict):
+            for key in result[section].keys():
+                if key in api_data[section]:
+                    try:
+                        result[section][key] = float(api_data[section][key])
+                    except (ValueError, TypeError):
+                        pass
+    return result
+
+
+def sample_analysis():
+    data = create_default_stock_data("AAPL")
+    data.update(company_name="Apple Inc.", current_price="187.44", market_cap=2.91e12)
+    for section in ("financial_ratios", "financial_health", "per_share_metrics"):
+        data[section] = {key: f"{i + 1.5}" for i, key in enumerate(data[section])}
+    return data
+
+
+def replies(prose_kb):
+    prose = ("Apple reported strong services growth while hardware was flat (see {note}). " * 14)[:1024] * prose_kb
+    obj = json.dumps(sample_analysis(), indent=2)
+    return {
+        "bare JSON": obj,
+        "fenced, prose after": f"```json\n{obj}\n```\n{prose}",
+        "prose, JSON, prose": f"{prose}\n{obj}\n{prose}",
+        "no JSON": prose,
+    }
+
+
+def main(args):
+    print(f"replies with {args.prose_kb} KB of prose, {args.number} runs each\n")
+    print(f"{'reply':<22}{'legacy ms':>11}{'new ms':>9}{'speed-up':>10}  found (legacy/new)")
+    for name, text in replies(args.prose_kb).items():
+        legacy = timeit.timeit(lambda: legacy_extract(text), number=args.number) / args.number
+        new = timeit.timeit(lambda: extract_json_from_response(text), number=args.number) / args.number
+        found = f"{legacy_extract(text) is not None}/{extract_json_from_response(text) is not None}"
+        print(f"{name:<22}{legacy * 1000:>11.3f}{new * 1000:>9.3f}{legacy / new:>9.1f}x  {found}")
+
+    data = sample_analysis()
+    number = args.number * 50
+    legacy = timeit.timeit(lambda: legacy_merge(create_default_stock_data("AAPL"), data), number=number) / number
+    new = timeit.timeit(lambda: merge_stock_data(create_default_stock_data("AAPL"), data), number=number) / number
+    print(f"\n{'merge + validate':<22}{legacy * 1e6:>9.1f}us{new * 1e6:>7.1f}us{legacy / new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prose-kb", type=int, default=256)
+    parser.add_argument("--number", type=int, default=50)
+    main(parser.parse_args())
@@ -0,0 +1,126 @@
+"""Compare the response pipeline with FastAPI's defaults on large bulk payloads.
+
+Builds /stocks-style parallel arrays, /indicators-style rows and a long
+/stock/{name}/history payload, then measures for each:
+
+- serialization: jsonable_encoder + JSONResponse vs orjson
+- bytes on the wire: identity, gzip and br
+- requests through two in-process apps, one with FastAPI's defaults and
+  one with json_response + ResponsePipeline, including a revalidation
+  that ends in a 304
+
+    python scripts/bench_responses.py
+    python scripts/bench_responses.py --symbols 2000 --bars 5000 -n 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.responses import ResponsePipeline, json_response, compress, brotli  # noqa: E402
+
+
+def payloads(symbols, bars):
+    rng = random.Random(7)
+    tickers = [f"S{i:04d}" for i in range(symbols)]
+    quotes = {
+        "symbols": tickers,
+        "price": [round(rng.uniform(5, 900), 2) for _ in tickers],
+        "previous_close": [round(rng.uniform(5, 900), 2) for _ in tickers],
+        "name": [f"Company {t} Inc." for t in tickers],
+        "sector": [rng.choice(["Technology", "Energy", "Healthcare", "Financial Services"]) for _ in tickers],
+    }
+    indicators = [
+        {"symbol": t, "timestamp": 1700000000, **{k: round(rng.uniform(0, 500), 4) for k in
+         ("sma", "ema", "rsi", "macd", "macd_signal", "macd_hist", "bb_upper", "bb_middle", "bb_lower", "atr")}}
+        for t in tickers
+    ]
+    history = {"symbol": "AAPL", "interval": "1d", "timestamp": [1500000000 + 86400 * i for i in range(bars)]}
+    for column in ("open", "high", "low", "close"):
+        history[column] = [round(rng.uniform(100, 200), 4) for _ in range(bars)]
+    history["volume"] = [rng.randint(10 ** 6, 10 ** 8) for _ in range(bars)]
+    return {"/stocks": quotes, "/indicators": indicators, "/stock/{name}/history": history}
+
+
+def best_of(fn, runs=5):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+
+
+def build_apps(data):
+    default_app = FastAPI()
+    pipeline_app = FastAPI(default_response_class=ORJSONResponse)
+    pipeline_app.add_middleware(ResponsePipeline)
+    for i, content in enumerate(data.values()):
+        default_app.add_api_route(f"/p{i}", lambda content=content: content)
+
+        async def fast(request: Request, content=content):
+            return json_response(request, content)
+        pipeline_app.add_api_route(f"/p{i}", fast)
+    return default_app, pipeline_app
+
+
+async def timed_requests(app, path, runs, headers):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        times, size, status = [], 0, None
+        for _ in range(runs):
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            times.append(time.perf_counter() - start)
+            size = int(response.headers.get("content-length", len(response.content)))
+            status = response.status_code
+        return statistics.median(times) * 1000, size, status, response.headers.get("etag")
+
+
+async def serve(data, runs):
+    default_app, pipeline_app = build_apps(data)
+    encoding = "br, gzip" if brotli is not None else "gzip"
+    print(f"\n{'payload':<24}{'app':<20}{'p50 ms':>8}{'bytes':>11}{'status':>8}")
+    for i, name in enumerate(data):
+        path = f"/p{i}"
+        ms, size, status, _ = await timed_requests(default_app, path, runs, {"accept-encoding": encoding})
+        print(f"{name:<24}{'fastapi defaults':<20}{ms:>8.2f}{size:>11}{status:>8}")
+        ms, size, status, etag = await timed_requests(pipeline_app, path, runs, {"accept-encoding": encoding})
+        print(f"{'':<24}{'pipeline':<20}{ms:>8.2f}{size:>11}{status:>8}")
+        ms, size, status, _ = await timed_requests(pipeline_app, path, runs, {"accept-encoding": encoding, "if-none-match": etag})
+        print(f"{'':<24}{'pipeline, revalidate':<20}{ms:>8.2f}{size:>11}{status:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=500, help="Symbols in the bulk payloads")
+    parser.add_argument("--bars", type=int, default=1260, help="Bars in the history payload")
+    parser.add_argument("-n", "--runs", type=int, default=20, help="Requests per app and payload")
+    args = parser.parse_args()
+    data = payloads(args.symbols, args.bars)
+
+    print(f"{'payload':<24}{'stdlib ms':>10}{'orjson ms':>10}{'identity':>10}{'gzip':>9}{'gzip ms':>8}{'br':>9}{'br ms':>7}")
+    for name, content in data.items():
+        stdlib_ms, _ = best_of(lambda: JSONResponse(jsonable_encoder(content)).body)
+        orjson_ms, body = best_of(lambda: ORJSONResponse(content).body)
+        gzip_ms, gzipped = best_of(lambda: compress(body, "gzip"))
+        line = f"{name:<24}{stdlib_ms:>10.2f}{orjson_ms:>10.2f}{len(body):>10}{len(gzipped):>9}{gzip_ms:>8.2f}"
+        if brotli is not None:
+            br_ms, brotlied = best_of(lambda: compress(body, "br"))
+            line += f"{len(brotlied):>9}{br_ms:>7.2f}"
+        print(line)
+
+    asyncio.run(serve(data, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Cache hit rate vs worker count: per-process caches vs the shared SQLite tier.
+
+The same total traffic is split across the worker processes, each looking
+up symbols drawn from a Zipf-like distribution and filling the cache on a
+miss (standing in for a Yahoo or LLM call). With
+per-process caches every worker pays for its own misses, so the hit rate
+falls as workers are added; with the shared tier a symbol fetched by one
+worker is a hit for all of them.
+
+    python scripts/bench_shared_cache.py
+    python scripts/bench_shared_cache.py --workers 1 2 4 8 --lookups 16000 --symbols 2000
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def worker(backend, path, seed, lookups, symbols, results):
+    os.environ.update(CACHE_BACKEND=backend, CACHE_PATH=path)
+    sys.path.insert(0, ROOT)
+    import numpy as np
+    from controllers.cache import TTLCache
+
+    cache = TTLCache("bench", maxsize=symbols, ttl=300, shared=True)
+    ranks = np.random.default_rng(seed).zipf(1.2, lookups) % symbols
+    start = time.perf_counter()
+    for rank in ranks:
+        key = f"S{rank}"
+        if cache.get(key) is None:
+            cache.set(key, {"symbol": key, "price": float(rank)})
+    results.put((cache.hits, cache.misses, time.perf_counter() - start))
+
+
+def run(backend, workers, args):
+    path = os.path.join(tempfile.mkdtemp(), "cache.sqlite3")
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(backend, path, seed, args.lookups // workers, args.symbols, results))
+        for seed in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    stats = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    hits, misses = sum(s[0] for s in stats), sum(s[1] for s in stats)
+    return hits / (hits + misses), misses, max(s[2] for s in stats)
+
+
+def main(args):
+    print(f"{args.lookups} lookups in total over {args.symbols} symbols\n")
+    print(f"{'workers':>8}{'backend':>9}{'hit rate':>10}{'upstream calls':>16}{'seconds':>9}")
+    for workers in args.workers:
+        for backend in ("memory", "sqlite"):
+            hit_rate, misses, seconds = run(backend, workers, args)
+            print(f"{workers:>8}{backend:>9}{hit_rate:>10.1%}{misses:>16}{seconds:>9.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--lookups", type=int, default=16000)
+    parser.add_argument("--symbols", type=int, default=2000)
+    main(parser.parse_args())
@@ -0,0 +1,61 @@
+"""Startup-time benchmark: import time per module and agent build times.
+
+Each module is imported in a fresh interpreter with `python -X importtime`,
+so the numbers are cold import costs. Run it from the repository root:
+
+    python scripts/bench_startup.py
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "app",
+    "routes.stockRoutes",
+    "routes.agentRoutes",
+    "controllers.agent",
+    "controllers.stockNews",
+    "controllers.stockAgent",
+    "controllers.topStocks",
+    "controllers.fundamentals",
+    "controllers.responseCache",
+]
+
+
+def import_time(module):
+    """Cumulative import time of module in microseconds, from -X importtime."""
+    env = dict(os.environ, GROQ_API_KEY=os.getenv("GROQ_API_KEY", "benchmark"))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    for line in reversed(result.stderr.splitlines()):
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise RuntimeError(f"could not import {module}: {result.stderr[-500:]}")
+
+
+def main():
+    print(f"{'module':<32}{'import ms':>10}")
+    for module in MODULES:
+        print(f"{module:<32}{import_time(module) / 1000:>10.0f}")
+
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    from controllers import registry
+    import controllers.agent, controllers.stockNews, controllers.stockAgent  # noqa: E401,F401
+
+    start = time.perf_counter()
+    asyncio.run(registry.warm_up())
+    print(f"\nagent warm-up: {(time.perf_counter() - start) * 1000:.0f}ms")
+    for name, status in registry.status().items():
+        print(f"  {name:<28}{status['build_ms']:>8}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Checks for the near-duplicate tier of the LLM response cache.
+
+Answers a set of questions, then looks up pairs that must reuse an answer
+(the same question reworded) and pairs that must not (a different stock,
+company name or number), printing the trigram score of each. Runs offline;
+exits non-zero if a check fails:
+
+    python scripts/check_response_cache.py
+    python scripts/check_response_cache.py --threshold 0.6
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.responseCache import ResponseCache, embed  # noqa: E402
+
+# (cached question, new question, whether the new one may reuse the answer)
+CASES = [
+    ("Should I buy NVDA?", "should i buy nvda", True),
+    ("Should I buy NVDA?", "Should I buy $NVDA stock?", True),
+    ("Is Apple a good buy?", "is apple a good buy", True),
+    ("Should I buy NVDA?", "Should I buy AMD?", False),
+    ("should i buy nvda", "should i buy amd", False),
+    ("should i buy nvidia stock", "should i buy tesla stock", False),
+    ("Is apple a good buy?", "Is google a good buy?", False),
+    ("Is nvidia a good buy?", "Is NVDA a good buy?", True),
+    ("What is a good P/E ratio for tech?", "What is a good P/E ratio for energy?", False),
+    ("Will the S&P 500 rise in 2025?", "Will the S&P 500 rise in 2026?", False),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=0.6, help="LLM_CACHE_SIMILARITY to check with")
+    args = parser.parse_args()
+
+    failures = 0
+    for cached, query, reuse in CASES:
+        cache = ResponseCache(name="check_response_cache", similarity=args.threshold)
+        cache.set(cached, "model", "prompt", f"answer to {cached}")
+        hit = cache.get(query, "model", "prompt") is not None
+        ok = hit == reuse
+        failures += not ok
+        score = float(embed(cached) @ embed(query))
+        print(f"{'✅' if ok else '❌'} {cached!r} -> {query!r}: {'hit' if hit else 'miss'} (score {score:.2f})")
+
+    print(f"\n{failures} failed" if failures else "\nall checks passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
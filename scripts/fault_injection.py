@@ -0,0 +1,204 @@
+"""Fault-injection checks for the upstream resilience layer.
+
+Drives controllers.resilience with upstreams that fail, hang and recover,
+and checks retries, timeouts, breaker transitions and last-known fallbacks.
+Runs offline; exits non-zero if a check fails:
+
+    python scripts/fault_injection.py
+
+To inject faults into a running server instead, start it with e.g.
+FAULT_INJECTION="yahoo:0.5,groq:0.2" and watch /health and /metrics.
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "fault-injection")
+
+from controllers import executor, resilience  # noqa: E402
+from controllers import topStocks  # noqa: E402
+
+FAILURES = []
+
+
+def check(name, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {name}{f' ({detail})' if detail else ''}")
+    if not ok:
+        FAILURES.append(name)
+
+
+def flaky_upstream(name, timeout=0.2, attempts=3, failures=3, reset=0.5):
+    resilience.UPSTREAMS[name] = {"timeout": timeout, "attempts": attempts}
+    resilience.breakers[name] = resilience.CircuitBreaker(name, failure_threshold=failures, reset_timeout=reset)
+    return resilience.breakers[name]
+
+
+class Upstream:
+    """Fake upstream that fails its first `fail` calls, optionally hanging instead."""
+
+    def __init__(self, fail=0, hang=False):
+        self.fail = fail
+        self.hang = hang
+        self.calls = 0
+
+    async def __call__(self, value="ok"):
+        self.calls += 1
+        if self.calls <= self.fail:
+            if self.hang:
+                await asyncio.sleep(60)
+            raise ConnectionError("upstream unavailable")
+        return value
+
+
+class ClientError(Exception):
+    status_code = 404
+
+
+async def ticker(stop):
+    """Count event loop ticks, to show backoff never blocks the loop."""
+    ticks = 0
+    while not stop.is_set():
+        await asyncio.sleep(0.01)
+        ticks += 1
+    return ticks
+
+
+async def main():
+    resilience.RETRY_BASE_DELAY = 0.05
+    resilience.RETRY_MAX_DELAY = 0.2
+
+    # Transient failures are retried with backoff while the loop stays responsive
+    flaky_upstream("transient")
+    upstream = Upstream(fail=2)
+    stop = asyncio.Event()
+    ticks = asyncio.create_task(ticker(stop))
+    result = await resilience.call("transient", upstream)
+    stop.set()
+    check("retries until success", result == "ok" and upstream.calls == 3, f"{upstream.calls} calls")
+    check("event loop keeps running during backoff", await ticks > 0)
+
+    # A hanging upstream is cut off by the timeout
+    flaky_upstream("hanging", timeout=0.1, attempts=1)
+    start = time.perf_counter()
+    try:
+        await resilience.call("hanging", Upstream(fail=1, hang=True))
+        check("timeout raises", False)
+    except TimeoutError:
+        check("timeout raises", time.perf_counter() - start < 0.5, f"{time.perf_counter() - start:.2f}s")
+
+    # Timed-out blocking calls keep their route slot until the thread ends,
+    # so retries against a slow upstream cannot pile up threads
+    flaky_upstream("slow", timeout=0.05, attempts=3, failures=100)
+    executor.ROUTE_LIMITS["slow"] = 1
+    running = peak = 0
+
+    def slow_call():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        time.sleep(0.15)
+        running -= 1
+
+    try:
+        await resilience.call("slow", executor.run_blocking, "slow", slow_call)
+    except TimeoutError:
+        pass
+    await asyncio.sleep(0.2)
+    check("timed-out threads hold their slot", peak == 1, f"peak {peak} threads")
+
+    # Calls made with retry=False get a single attempt
+    flaky_upstream("once", attempts=3)
+    upstream = Upstream(fail=1)
+    try:
+        await resilience.call("once", upstream, retry=False)
+    except ConnectionError:
+        pass
+    check("retry=False makes one attempt", upstream.calls == 1, f"{upstream.calls} calls")
+
+    # Client errors are not retried and do not count against the breaker
+    breaker = flaky_upstream("client", failures=1)
+    calls = 0
+
+    async def not_found():
+        nonlocal calls
+        calls += 1
+        raise ClientError("not found")
+
+    try:
+        await resilience.call("client", not_found)
+    except ClientError:
+        pass
+    check("4xx is not retried", calls == 1 and breaker.state == "closed", f"{calls} calls, {breaker.state}")
+
+    # A sustained outage opens the breaker, which then fails fast
+    breaker = flaky_upstream("outage", attempts=3, failures=3, reset=0.3)
+    upstream = Upstream(fail=10**6)
+    try:
+        await resilience.call("outage", upstream)
+    except ConnectionError:
+        pass
+    check("breaker opens after threshold", breaker.state == "open", f"{upstream.calls} calls")
+
+    calls_before = upstream.calls
+    start = time.perf_counter()
+    try:
+        await resilience.call("outage", upstream)
+        check("open breaker fails fast", False)
+    except resilience.CircuitOpenError:
+        elapsed = time.perf_counter() - start
+        check("open breaker fails fast", upstream.calls == calls_before and elapsed < 0.01, f"{elapsed * 1000:.2f}ms")
+
+    fallback = await resilience.call("outage", upstream, fallback=lambda: "last known")
+    check("open breaker serves last known value", fallback == "last known")
+
+    # After the cool-down one trial call is let through; success closes the breaker
+    await asyncio.sleep(0.35)
+    upstream.fail = 0
+    result = await resilience.call("outage", upstream)
+    check("half-open trial closes breaker", result == "ok" and breaker.state == "closed")
+
+    # A failed trial re-opens it immediately
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    await asyncio.sleep(0.35)
+    upstream.fail = 10**6
+    try:
+        await resilience.call("outage", upstream)
+    except (ConnectionError, resilience.CircuitOpenError):
+        pass
+    check("failed trial re-opens breaker", breaker.state == "open")
+
+    # Injected faults go through the same path as real ones
+    flaky_upstream("injected", attempts=1, failures=100)
+    resilience.FAULT_INJECTION["injected"] = 1.0
+    try:
+        await resilience.call("injected", Upstream())
+        check("fault injection", False)
+    except resilience.InjectedFault:
+        check("fault injection", True)
+
+    # End to end: a Yahoo outage serves the last known quote without sleeping
+    flaky_upstream("yahoo", attempts=3, failures=3, reset=30)
+    topStocks.last_quotes.set("AAPL", topStocks.build_stock_info("AAPL", {"currentPrice": 123.0}))
+
+    def yahoo_down(symbol):
+        raise ConnectionError("Too Many Requests")
+
+    topStocks.load_stock = yahoo_down
+    start = time.perf_counter()
+    quote = await topStocks.aget_stock("AAPL")
+    elapsed = time.perf_counter() - start
+    check("Yahoo outage serves last known quote", quote and quote["currentPrice"] == 123.0, f"{elapsed:.2f}s")
+    start = time.perf_counter()
+    missing = await topStocks.aget_stock("MSFT")
+    elapsed = time.perf_counter() - start
+    check("unknown symbol fails fast once open", missing is None and elapsed < 0.05, f"{elapsed * 1000:.1f}ms")
+
+    print(f"\n{len(FAILURES)} failed" if FAILURES else "\nall checks passed")
+    return 1 if FAILURES else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,105 @@
+"""Concurrent load test for the API server.
+
+Fires a burst of requests at a slow route while probing a cheap route, and
+prints throughput plus latency percentiles for both. Run it once against the
+old build and once against the new one to compare.
+
+    python scripts/load_test.py http://localhost:8000 --path /stock/AAPL -n 64 -c 16
+    python scripts/load_test.py http://localhost:8000 --path /agent --method POST \
+        --body '{"query": "Is NVDA overvalued?"}' -n 8 -c 8
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def summary(name, latencies, elapsed, errors):
+    print(f"{name}: {len(latencies)} ok, {errors} errors in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed if elapsed else 0:.2f} req/s)")
+    if latencies:
+        print(f"  p50={percentile(latencies, 50) * 1000:.0f}ms "
+              f"p95={percentile(latencies, 95) * 1000:.0f}ms "
+              f"p99={percentile(latencies, 99) * 1000:.0f}ms "
+              f"mean={statistics.mean(latencies) * 1000:.0f}ms")
+
+
+async def timed(client, method, url, body):
+    start = time.perf_counter()
+    response = await client.request(method, url, json=body, headers={"accept": "application/json"})
+    return time.perf_counter() - start, response.status_code
+
+
+async def burst(client, args, body):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            try:
+                elapsed, status = await timed(client, args.method, args.base + args.path, body)
+                if status < 400:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.requests)))
+    return latencies, time.perf_counter() - start, errors
+
+
+async def probe(client, args, stop):
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    while not stop.is_set():
+        try:
+            elapsed, status = await timed(client, "GET", args.base + args.probe, None)
+            if status < 400:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+        except httpx.HTTPError:
+            errors += 1
+        await asyncio.sleep(args.probe_interval)
+    return latencies, time.perf_counter() - start, errors
+
+
+async def main(args):
+    body = json.loads(args.body) if args.body else None
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, args, stop))
+        result = await burst(client, args, body)
+        stop.set()
+        probe_result = await probe_task
+    summary(f"{args.method} {args.path}", *result)
+    summary(f"GET {args.probe} (during burst)", *probe_result)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", help="Server base URL, e.g. http://localhost:8000")
+    parser.add_argument("--path", default="/stock/AAPL")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--body", default=None, help="JSON request body")
+    parser.add_argument("--probe", default="/", help="Cheap route probed while the burst runs")
+    parser.add_argument("--probe-interval", type=float, default=0.1)
+    parser.add_argument("-n", "--requests", type=int, default=32)
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,66 @@
+"""Measure time-to-first-token of the streaming endpoints.
+
+For each run it records, from the client side, when the first SSE token
+arrived and when the stream finished, and compares that with the time the
+same request takes without streaming.
+
+    python scripts/measure_ttft.py http://localhost:8000 --path /chat -n 5
+    python scripts/measure_ttft.py http://localhost:8000 --path /agent --query "Compare NVDA and AMD"
+    python scripts/measure_ttft.py http://localhost:8000 --path /stock-news --method GET
+"""
+import argparse
+import statistics
+import time
+
+import httpx
+
+
+def streamed(client, args):
+    start = time.perf_counter()
+    first = None
+    kwargs = {"headers": {"accept": "text/event-stream"}}
+    if args.method == "POST":
+        kwargs["json"] = {"query": args.query, "stream": True}
+    with client.stream(args.method, args.base + args.path, **kwargs) as response:
+        for line in response.iter_lines():
+            if first is None and line.startswith("event: token"):
+                first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def buffered(client, args):
+    start = time.perf_counter()
+    kwargs = {"headers": {"accept": "application/json"}}
+    if args.method == "POST":
+        kwargs["json"] = {"query": args.query}
+    client.request(args.method, args.base + args.path, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", help="Server base URL, e.g. http://localhost:8000")
+    parser.add_argument("--path", default="/chat")
+    parser.add_argument("--method", default="POST")
+    parser.add_argument("--query", default="Should I buy NVDA?")
+    parser.add_argument("-n", "--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    ttfts, stream_totals, totals = [], [], []
+    with httpx.Client(timeout=300) as client:
+        for _ in range(args.runs):
+            ttft, total = streamed(client, args)
+            if ttft is not None:
+                ttfts.append(ttft)
+            stream_totals.append(total)
+            totals.append(buffered(client, args))
+
+    print(f"{args.method} {args.path} over {args.runs} runs")
+    if ttfts:
+        print(f"  streamed  ttft   median={statistics.median(ttfts) * 1000:.0f}ms")
+    print(f"  streamed  total  median={statistics.median(stream_totals) * 1000:.0f}ms")
+    print(f"  buffered  total  median={statistics.median(totals) * 1000:.0f}ms (first byte = total)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Simulate the LLM rate limiter: fairness across routes and priority classes.
+
+Runs offline against controllers.rateLimiter with a made-up model limit.
+Interactive calls from two routes and a burst of background prewarm calls
+compete for one model's requests-per-minute budget; the output shows the
+order calls were granted in and how long each class waited:
+
+    python scripts/rate_limit_sim.py --rpm 120 --calls 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers import rateLimiter  # noqa: E402
+
+MODEL = "simulated-model"
+
+
+async def call(route, background, granted, waits):
+    start = time.perf_counter()
+    if background:
+        await rateLimiter.as_background(rateLimiter.acquire(MODEL, route, 100))
+    else:
+        await rateLimiter.acquire(MODEL, route, 100)
+    waits.setdefault(route, []).append(time.perf_counter() - start)
+    granted.append(route)
+
+
+async def main(args):
+    limiter = rateLimiter.ModelLimiter(MODEL, args.rpm, args.tpm)
+    # Start with an empty request bucket so every call has to queue
+    limiter.requests.level = 0
+    rateLimiter.limiters[MODEL] = limiter
+
+    granted, waits = [], {}
+    tasks = [asyncio.create_task(call("prewarm", True, granted, waits)) for _ in range(args.calls)]
+    await asyncio.sleep(0)
+    tasks += [asyncio.create_task(call("agent", False, granted, waits)) for _ in range(args.calls)]
+    tasks += [asyncio.create_task(call("chat", False, granted, waits)) for _ in range(args.calls // 4)]
+    await asyncio.gather(*tasks)
+
+    print("grant order:", " ".join(route[0] for route in granted))
+    print(f"\n{'route':<10}{'calls':>6}{'mean wait s':>13}{'max wait s':>12}")
+    for route, values in waits.items():
+        print(f"{route:<10}{len(values):>6}{statistics.mean(values):>13.2f}{max(values):>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rpm", type=float, default=120, help="requests per minute of the simulated model")
+    parser.add_argument("--tpm", type=float, default=1_000_000, help="tokens per minute of the simulated model")
+    parser.add_argument("--calls", type=int, default=20, help="background and /agent calls; /chat gets a quarter")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,56 @@
+"""Compare /agent in team and parallel mode and print the fan-out timeline.
+
+Runs the same question through both modes of a running server, reports the
+wall-clock time of each, and draws the trace of the parallel run so the
+overlap of the member agents is visible.
+
+    python scripts/trace_agent.py http://localhost:8000
+    python scripts/trace_agent.py http://localhost:8000 --query "Compare NVDA and AMD given recent news" -n 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.orchestrator import render  # noqa: E402
+
+
+def run(client, args, mode):
+    # A unique suffix keeps the response cache from answering
+    query = f"{args.query} [{mode} {time.time_ns()}]"
+    start = time.perf_counter()
+    response = client.post(f"{args.base}/agent", params={"mode": mode, "trace": "true"},
+                           json={"query": query}, headers={"accept": "application/json"})
+    response.raise_for_status()
+    return time.perf_counter() - start, response.json().get("trace")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", help="Server base URL, e.g. http://localhost:8000")
+    parser.add_argument("--query", default="Compare NVDA and AMD given recent news")
+    parser.add_argument("-n", "--runs", type=int, default=1)
+    args = parser.parse_args()
+
+    timings = {"team": [], "parallel": []}
+    trace = None
+    with httpx.Client(timeout=600) as client:
+        for _ in range(args.runs):
+            for mode in timings:
+                seconds, run_trace = run(client, args, mode)
+                timings[mode].append(seconds)
+                trace = run_trace or trace
+
+    for mode, seconds in timings.items():
+        print(f"{mode:<9} median={statistics.median(seconds):.1f}s over {len(seconds)} runs")
+    if trace:
+        print(f"\nLast parallel run:\n{render(trace)}")
+
+
+if __name__ == "__main__":
+    main()